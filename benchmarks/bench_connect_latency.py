@@ -0,0 +1,106 @@
+"""Measure connection latency per authentication method and key type.
+
+For each key, the first load (parse and decrypt) is timed separately, then
+connections are opened with the key cached by `KeyStore` and with the key
+reloaded every time, as before the cache. The SFTP target is read from the
+same `.env` file used by the tool; keys must be authorized on the target.
+
+Usage:
+    python -m benchmarks.bench_connect_latency --key ~/.ssh/id_ed25519 \\
+        --key ~/.ssh/id_rsa --connections 20
+"""
+
+import argparse
+import os
+import statistics
+import time
+from typing import Callable, List, Optional
+
+from sftp_file_transfer.components.env_loader import EnvLoader
+from sftp_file_transfer.components.key_store import KeyStore
+from sftp_file_transfer.components.sftp_manager import (
+    SFTPManager,
+    SFTPManagerConfig,
+)
+
+
+def _config(
+    key_filepath: Optional[str] = None,
+    use_agent: bool = False,
+) -> SFTPManagerConfig:
+    env = EnvLoader()
+    return SFTPManagerConfig(
+        sftp_host=env.SFTP_HOST,
+        sftp_port=int(env.SFTP_PORT),
+        sftp_user=env.SFTP_USER,
+        sftp_password='' if key_filepath or use_agent else env.SFTP_PASSWORD,
+        key_filepath=key_filepath,
+        key_password=os.getenv('SFTP_KEY_PASSWORD') or None,
+        use_agent=use_agent,
+    )
+
+
+def _time_connections(
+    config: SFTPManagerConfig,
+    connections: int,
+    before: Optional[Callable[[], None]] = None,
+) -> List[float]:
+    """Open and close connections one after the other, timing each one."""
+    timings = []
+    for _ in range(connections):
+        if before is not None:
+            before()
+        start = time.perf_counter()
+        manager = SFTPManager(config)
+        manager.reconnect()
+        timings.append(time.perf_counter() - start)
+        manager.close()
+    return timings
+
+
+def _report(label: str, timings: List[float]) -> None:
+    timings_ms = sorted(t * 1000 for t in timings)
+    p95 = timings_ms[min(len(timings_ms) - 1, int(len(timings_ms) * 0.95))]
+    print(
+        f'{label:<40} {statistics.mean(timings_ms):>9.1f} '
+        f'{statistics.median(timings_ms):>9.1f} {p95:>9.1f}'
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--key', action='append', default=[])
+    parser.add_argument('--agent', action='store_true')
+    parser.add_argument('--password', action='store_true')
+    parser.add_argument('--connections', type=int, default=10)
+    args = parser.parse_args()
+
+    print(f'{"method":<40} {"mean ms":>9} {"p50 ms":>9} {"p95 ms":>9}')
+    if args.password:
+        _report('password', _time_connections(_config(), args.connections))
+    if args.agent:
+        _report(
+            'ssh-agent',
+            _time_connections(_config(use_agent=True), args.connections),
+        )
+    for key_file in args.key:
+        KeyStore.clear()
+        start = time.perf_counter()
+        key = KeyStore.load(key_file, os.getenv('SFTP_KEY_PASSWORD') or None)
+        load_ms = (time.perf_counter() - start) * 1000
+        name = f'{key.get_name()} ({key.get_bits()} bits)'
+        print(f'{name + " first load":<40} {load_ms:>9.1f}')
+
+        config = _config(key_filepath=key_file)
+        _report(
+            f'{name} cached',
+            _time_connections(config, args.connections),
+        )
+        _report(
+            f'{name} reloaded',
+            _time_connections(config, args.connections, KeyStore.clear),
+        )
+
+
+if __name__ == '__main__':
+    main()
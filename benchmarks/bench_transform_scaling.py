@@ -0,0 +1,123 @@
+"""Measure how upload transforms scale with the number of worker processes.
+
+Each transform runs over the same in-memory content, first inline on the
+calling thread, as the SFTP I/O thread would without a pool, then through
+`TransformPipeline` pools of increasing size. The transformed blocks are
+discarded, so only the CPU work and the hand-off to the pool are measured.
+
+Usage:
+    python -m benchmarks.bench_transform_scaling --size-mb 256 \\
+        --workers 1 2 4 8
+"""
+
+import argparse
+import base64
+import io
+import os
+import random
+import time
+from typing import Dict, List
+
+from sftp_file_transfer.components.transform_pipeline import (
+    DEFAULT_TRANSFORM_BLOCK_SIZE,
+    TransformOptions,
+    TransformPipeline,
+)
+
+MEGABYTE = 1024 * 1024
+
+
+def _content(size: int) -> bytes:
+    """Build log-like content that compresses like real transfer files."""
+    words = [os.urandom(4).hex() for _ in range(2048)]
+    rng = random.Random(0)
+    lines = []
+    total = 0
+    while total < size:
+        line = ' '.join(rng.choices(words, k=12)).encode() + b'\n'
+        lines.append(line)
+        total += len(line)
+    return b''.join(lines)[:size]
+
+
+def _cases() -> Dict[str, TransformOptions]:
+    key = base64.b64encode(os.urandom(32)).decode()
+    cases = {
+        'sha256': TransformOptions(block_hash='sha256'),
+        'gzip': TransformOptions(transforms=['gzip']),
+        'encrypt': TransformOptions(
+            transforms=['encrypt'],
+            encryption_key=key,
+        ),
+        'gzip+encrypt': TransformOptions(
+            transforms=['gzip', 'encrypt'],
+            encryption_key=key,
+        ),
+    }
+    try:
+        import zstandard  # noqa: F401, PLC0415
+    except ImportError:
+        print('zstandard is not installed, skipping zstd.')
+    else:
+        cases['zstd'] = TransformOptions(transforms=['zstd'])
+    return cases
+
+
+def _throughput(
+    options: TransformOptions,
+    content: bytes,
+    executor: str,
+    workers: int,
+) -> float:
+    """Transform the content once and return the throughput in MB/s."""
+    pipeline = TransformPipeline.from_options(
+        TransformOptions(
+            **options,
+            transform_executor=executor,
+            transform_workers=workers,
+        ),
+    )
+    # Start the pool before timing, as it is shared by later uploads.
+    for _ in pipeline.transform_blocks([b'warm-up'] * workers):
+        pass
+    start = time.perf_counter()
+    for _ in pipeline.run(io.BytesIO(content)):
+        pass
+    return len(content) / MEGABYTE / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size-mb', type=int, default=256)
+    parser.add_argument(
+        '--workers',
+        type=int,
+        nargs='+',
+        default=sorted({1, 2, 4, os.cpu_count() or 1}),
+    )
+    parser.add_argument(
+        '--executor',
+        choices=['process', 'thread'],
+        default='process',
+    )
+    args = parser.parse_args()
+
+    content = _content(args.size_mb * MEGABYTE)
+    print(
+        f'{args.size_mb} MB in {DEFAULT_TRANSFORM_BLOCK_SIZE // MEGABYTE} MB '
+        f'blocks, {os.cpu_count()} CPUs, {args.executor} pools.',
+    )
+    header: List[str] = ['inline'] + [f'{n} workers' for n in args.workers]
+    print(f'{"transform":<14}' + ''.join(f'{h:>14}' for h in header))
+    for name, options in _cases().items():
+        inline = _throughput(options, content, 'inline', 1)
+        row = [f'{inline:>7.1f} MB/s']
+        for workers in args.workers:
+            rate = _throughput(options, content, args.executor, workers)
+            row.append(f'{rate:>6.1f} ({rate / inline:.1f}x)')
+        print(f'{name:<14}' + ''.join(f'{cell:>14}' for cell in row))
+    TransformPipeline.shutdown()
+
+
+if __name__ == '__main__':
+    main()
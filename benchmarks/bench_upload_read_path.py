@@ -0,0 +1,150 @@
+"""Compare the memory-mapped upload reader against `SFTPClient.put`.
+
+Each mode runs in its own process so peak memory is not shared between
+them. The SFTP target is read from the same `.env` file used by the tool.
+
+Usage:
+    python -m benchmarks.bench_upload_read_path --size-mb 512 --parallel 4
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from sftp_file_transfer.components.env_loader import EnvLoader
+from sftp_file_transfer.components.sftp_manager import (
+    SFTPManager,
+    SFTPManagerConfig,
+)
+
+MODES = ('put', 'zero_copy')
+GIGABYTE = 1024**3
+
+
+def _peak_rss_bytes() -> int:
+    """Return the peak resident set size of this process, if available."""
+    try:
+        import resource  # noqa: PLC0415
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _config() -> SFTPManagerConfig:
+    env = EnvLoader()
+    return SFTPManagerConfig(
+        sftp_host=env.SFTP_HOST,
+        sftp_port=int(env.SFTP_PORT),
+        sftp_user=env.SFTP_USER,
+        sftp_password=env.SFTP_PASSWORD,
+        key_filepath=os.getenv('SFTP_KEY_FILE') or None,
+        key_password=os.getenv('SFTP_KEY_PASSWORD') or None,
+        use_agent=os.getenv('SFTP_USE_AGENT') == '1',
+    )
+
+
+def _upload(local_file: Path, remote_path: str, mode: str) -> None:
+    with SFTPManager(_config()) as sftp:
+        sftp.upload_file(
+            local_path=local_file,
+            remote_path=remote_path,
+            zero_copy=mode == 'zero_copy',
+        )
+
+
+def run_mode(args: argparse.Namespace) -> dict:
+    """Upload the sample file `parallel` times concurrently in one mode."""
+    local_file = Path(args.file)
+    tracemalloc.start()
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.parallel) as pool:
+        futures = [
+            pool.submit(
+                _upload,
+                local_file,
+                f'{args.remote}/bench_{args.mode}_{index}.bin',
+                args.mode,
+            )
+            for index in range(args.parallel)
+        ]
+    for future in futures:
+        future.result()
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    _, peak_python = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    sent = local_file.stat().st_size * args.parallel
+    return {
+        'mode': args.mode,
+        'gigabytes': sent / GIGABYTE,
+        'wall_seconds': wall,
+        'cpu_seconds_per_gb': cpu / (sent / GIGABYTE),
+        'peak_python_alloc_mb': peak_python / 1024**2,
+        'peak_rss_mb': _peak_rss_bytes() / 1024**2,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size-mb', type=int, default=256)
+    parser.add_argument('--parallel', type=int, default=1)
+    parser.add_argument('--remote', default='.')
+    parser.add_argument('--mode', choices=MODES)
+    parser.add_argument('--file')
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sample = Path(tmp) / 'sample.bin'
+        with open(sample, 'wb') as f:
+            for _ in range(args.size_mb):
+                f.write(os.urandom(1024 * 1024))
+
+        print(
+            f'{"mode":<10} {"GB":>6} {"wall s":>8} {"CPU s/GB":>9} '
+            f'{"py peak MB":>11} {"RSS MB":>8}'
+        )
+        for mode in MODES:
+            output = subprocess.run(
+                [
+                    sys.executable,
+                    '-m',
+                    'benchmarks.bench_upload_read_path',
+                    '--mode',
+                    mode,
+                    '--file',
+                    str(sample),
+                    '--parallel',
+                    str(args.parallel),
+                    '--remote',
+                    args.remote,
+                ],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(
+                f'{result["mode"]:<10} {result["gigabytes"]:>6.2f} '
+                f'{result["wall_seconds"]:>8.2f} '
+                f'{result["cpu_seconds_per_gb"]:>9.2f} '
+                f'{result["peak_python_alloc_mb"]:>11.1f} '
+                f'{result["peak_rss_mb"]:>8.1f}'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+import heapq
+from bisect import bisect_right
+from datetime import date, datetime, time, timedelta
+from logging import Logger
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from sftp_file_transfer.components.file_manager import FileManager
+from sftp_file_transfer.components.logger_setup import setup_logger
+from sftp_file_transfer.components.transfer_planner import (
+    PlannedFile,
+    TransferPlanner,
+)
+
+logger: Logger = setup_logger()
+
+
+class BacklogPlanner:
+    """Plan the transfer of several days of files from a single scan.
+
+    The files are selected once by `FileManager.select_files`, which lists
+    each directory once and stats each file once. They are bucketed by the
+    local day of their modification time by comparing it with precomputed
+    midnight timestamps, instead of converting every timestamp to a date.
+    Whole days are then assigned to workers, oldest first, so the days are
+    sent in parallel.
+    """
+
+    @staticmethod
+    def day_boundaries(since: date, until: date) -> List[float]:
+        """Compute the local midnight timestamps delimiting a range of days.
+
+        Args:
+            since (date): The first day of the range.
+            until (date): The last day of the range, included.
+
+        Raises:
+            ValueError: If the range is empty.
+
+        Returns:
+            List[float]: The start of each day, followed by the end of the
+                last day.
+        """
+        if since > until:
+            raise ValueError(f'The range {since} to {until} is empty.')
+        days = (until - since).days + 2
+        return [
+            datetime.combine(since + timedelta(days=i), time()).timestamp()
+            for i in range(days)
+        ]
+
+    @classmethod
+    def scan_days(
+        cls,
+        directories: List[Union[str, Path]],
+        since: date,
+        until: date,
+        extension: Optional[str] = None,
+    ) -> Dict[date, List[PlannedFile]]:
+        """Bucket the files of the directories by modification day.
+
+        Args:
+            directories (List[Union[str, Path]]): The directories to scan.
+            since (date): The first day to select.
+            until (date): The last day to select, included.
+            extension (Optional[str]): Only select files with this extension.
+
+        Returns:
+            Dict[date, List[PlannedFile]]: The files of each day with files,
+                oldest day first and oldest file first within a day.
+        """
+        boundaries = cls.day_boundaries(since, until)
+        entries = FileManager.select_files(directories, extension)
+        buckets: Dict[int, List[PlannedFile]] = {}
+        for entry in entries:
+            day = bisect_right(boundaries, entry['mtime']) - 1
+            if 0 <= day < len(boundaries) - 1:
+                buckets.setdefault(day, []).append(entry)
+
+        days = {
+            since + timedelta(days=day): sorted(
+                buckets[day],
+                key=lambda e: e['mtime'],
+            )
+            for day in sorted(buckets)
+        }
+        logger.info(
+            f'Selected {sum(len(e) for e in days.values())} of {len(entries)} '
+            f'files over {len(days)} days from {since} to {until}.',
+        )
+        return days
+
+    @staticmethod
+    def assign_days(
+        days: Dict[date, List[PlannedFile]],
+        workers: int = 1,
+    ) -> List[List[PlannedFile]]:
+        """Assign whole days to workers, balancing the bytes per worker.
+
+        Days are taken oldest first and each one goes to the worker with the
+        fewest bytes assigned so far.
+
+        Args:
+            days (Dict[date, List[PlannedFile]]): The files of each day.
+            workers (int): The number of workers. Defaults to 1.
+
+        Raises:
+            ValueError: If the number of workers is lower than 1.
+
+        Returns:
+            List[List[PlannedFile]]: One list of entries per worker.
+        """
+        if workers < 1:
+            raise ValueError('The number of workers must be at least 1.')
+        bins: List[List[PlannedFile]] = [[] for _ in range(workers)]
+        loads = [(0, index) for index in range(workers)]
+        for day in sorted(days):
+            load, index = heapq.heappop(loads)
+            bins[index].extend(days[day])
+            size = sum(entry['size'] for entry in days[day])
+            heapq.heappush(loads, (load + size, index))
+        return bins
+
+    @classmethod
+    def plan(  # noqa: PLR0913, PLR0917
+        cls,
+        directories: List[Union[str, Path]],
+        since: date,
+        until: date,
+        remote_path: str,
+        extension: Optional[str] = None,
+        workers: int = 1,
+        day_dirs: bool = False,
+    ) -> List[List[PlannedFile]]:
+        """Scan, bucket and assign a range of days of files to workers.
+
+        Args:
+            directories (List[Union[str, Path]]): The directories to scan.
+            since (date): The first day to select.
+            until (date): The last day to select, included.
+            remote_path (str): The remote directory the files are sent to.
+            extension (Optional[str]): Only select files with this extension.
+            workers (int): The number of workers. Defaults to 1.
+            day_dirs (bool): Whether each day is sent to its own remote
+                subdirectory, named after the day as YYYY-MM-DD.
+
+        Returns:
+            List[List[PlannedFile]]: One list of entries per worker.
+        """
+        days = cls.scan_days(directories, since, until, extension)
+        if day_dirs:
+            for day, entries in days.items():
+                for entry in entries:
+                    entry['remote_dir'] = f'{remote_path}/{day.isoformat()}'
+        plan = cls.assign_days(days, workers)
+        logger.info(
+            f'Planned {len(days)} days over {workers} workers, makespan of '
+            f'{TransferPlanner.makespan(plan)} bytes.',
+        )
+        return plan
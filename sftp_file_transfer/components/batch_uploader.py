@@ -0,0 +1,260 @@
+from concurrent.futures import ThreadPoolExecutor
+from logging import Logger
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from sftp_file_transfer.components.job_journal import JobJournal
+from sftp_file_transfer.components.logger_setup import setup_logger
+from sftp_file_transfer.components.sftp_manager import (
+    SFTPManager,
+    SFTPManagerConfig,
+)
+from sftp_file_transfer.components.transfer_limiter import TransferLimiter
+from sftp_file_transfer.components.transfer_planner import PlannedFile
+
+logger: Logger = setup_logger()
+
+CONFIRM_ATTEMPTS = 3
+
+
+class BatchUploader:
+    """Upload a planned batch of files, one SFTP connection per worker.
+
+    Parameters:
+        config (SFTPManagerConfig): The connection parameters used to open
+            a connection for each worker.
+        manager (Optional[SFTPManager]): An already connected manager. When
+            given, it is reused by the first worker instead of opening a new
+            connection.
+        journal (Optional[JobJournal]): When given, the batch and each
+            uploaded file are recorded, so a batch interrupted by a crash
+            can be finished with `resume`.
+        limiter (Optional[TransferLimiter]): Caps on connections and bytes
+            in flight shared with other uploaders. Unlimited when not given.
+
+    With the `batch_confirm` setting, each worker sends its files without a
+    remote `stat` per file, then checks them against one listing per remote
+    directory and sends the files that do not match again, up to
+    `CONFIRM_ATTEMPTS` times. With `confirm_mtime`, each upload is also
+    stamped with the modification time of its local file, which the
+    listing must show. Delta and transformed uploads, whose remote size
+    differs from the local one, are confirmed one by one.
+    """
+
+    def __init__(
+        self,
+        config: SFTPManagerConfig,
+        manager: Optional[SFTPManager] = None,
+        journal: Optional[JobJournal] = None,
+        limiter: Optional[TransferLimiter] = None,
+    ):
+        self.config = config
+        self.manager = manager
+        self.journal = journal
+        self.limiter = limiter or TransferLimiter()
+
+    def upload(
+        self,
+        plan: List[List[PlannedFile]],
+        remote_path: str,
+    ) -> None:
+        """Upload every planned file to the remote directory.
+
+        Args:
+            plan (List[List[PlannedFile]]): One list of entries per worker,
+                as returned by `TransferPlanner.plan`.
+            remote_path (str): The remote directory the files are sent to.
+
+        Raises:
+            Exception: The first error raised by a worker, after every
+                worker has finished.
+        """
+        if self.journal is not None:
+            self.journal.start(plan, remote_path)
+        self._run(plan, remote_path)
+
+    def resume(self) -> bool:
+        """Upload the remaining files of a batch interrupted by a crash.
+
+        Raises:
+            ValueError: If the uploader has no journal.
+            Exception: The first error raised by a worker, after every
+                worker has finished.
+
+        Returns:
+            bool: Whether an interrupted batch was found.
+        """
+        if self.journal is None:
+            raise ValueError('Resuming a batch requires a journal.')
+        pending = self.journal.pending()
+        if pending is None:
+            return False
+        remote_path, plan = pending
+        logger.info(f'Resuming interrupted batch to {remote_path}.')
+        self._run(plan, remote_path)
+        return True
+
+    def _run(self, plan: List[List[PlannedFile]], remote_path: str) -> None:
+        """Upload the planned bins in parallel and close the journal."""
+        bins = [entries for entries in plan if entries]
+        if not bins:
+            logger.info('No files to upload.')
+        elif len(bins) == 1:
+            self._upload_bin(bins[0], remote_path, self.manager)
+        else:
+            self._upload_bins(bins, remote_path)
+        if self.journal is not None:
+            self.journal.finish()
+
+    def _upload_bins(
+        self,
+        bins: List[List[PlannedFile]],
+        remote_path: str,
+    ) -> None:
+        """Upload each bin on its own worker thread."""
+        with ThreadPoolExecutor(max_workers=len(bins)) as pool:
+            futures = [
+                pool.submit(
+                    self._upload_bin,
+                    entries,
+                    remote_path,
+                    self.manager if index == 0 else None,
+                )
+                for index, entries in enumerate(bins)
+            ]
+        errors = [f.exception() for f in futures if f.exception()]
+        for error in errors:
+            logger.error(f'Worker failed during batch upload: {error}')
+        if errors:
+            raise errors[0]
+
+    def _upload_bin(
+        self,
+        entries: List[PlannedFile],
+        remote_path: str,
+        manager: Optional[SFTPManager] = None,
+    ) -> None:
+        """Upload the entries assigned to a single worker.
+
+        Args:
+            entries (List[PlannedFile]): The entries to upload, in order.
+            remote_path (str): The remote directory the files are sent to.
+            manager (Optional[SFTPManager]): A connected manager to reuse.
+                A new connection is opened and closed when not given.
+        """
+        with self.limiter.connection():
+            if manager is None:
+                with SFTPManager(self.config, self.limiter) as sftp:
+                    self._send(entries, remote_path, sftp)
+            else:
+                self._send(entries, remote_path, manager)
+
+    def _send(
+        self,
+        entries: List[PlannedFile],
+        remote_path: str,
+        manager: SFTPManager,
+    ) -> None:
+        """Send the entries of a worker over its connection, in order.
+
+        Raises:
+            IOError: If some files still do not match their remote copy
+                after `CONFIRM_ATTEMPTS` batched confirmations.
+        """
+        directories: Set[str] = set()
+        if not self.config.get('batch_confirm') or any(
+            self.config.get(key) for key in ('delta_transfer', 'transforms')
+        ):
+            for entry in entries:
+                self._send_file(entry, remote_path, manager, directories)
+                if self.journal is not None:
+                    self.journal.mark_done(entry['path'])
+            return
+
+        pending = entries
+        for attempt in range(CONFIRM_ATTEMPTS):
+            if attempt:
+                logger.warning(
+                    f'Sending {len(pending)} unconfirmed files again.',
+                )
+            for entry in pending:
+                self._send_file(
+                    entry, remote_path, manager, directories, confirm=False
+                )
+            mismatches = self._confirm(pending, remote_path, manager)
+            if self.journal is not None:
+                for entry in pending:
+                    if entry['path'] not in mismatches:
+                        self.journal.mark_done(entry['path'])
+            pending = [e for e in pending if e['path'] in mismatches]
+            if not pending:
+                return
+        raise IOError(
+            'Uploads do not match their local files: '
+            f'{", ".join(str(entry["path"]) for entry in pending)}',
+        )
+
+    def _send_file(
+        self,
+        entry: PlannedFile,
+        remote_path: str,
+        manager: SFTPManager,
+        directories: Set[str],
+        confirm: bool = True,
+    ) -> None:
+        """Send one entry, creating its remote directory the first time.
+
+        Unconfirmed uploads are stamped with the modification time the
+        local file had before it was sent, for `_confirm` to compare.
+        """
+        directory, name = self._target(entry, remote_path)
+        if directory != remote_path and directory not in directories:
+            manager.make_directory(directory, exist_ok=True)
+            directories.add(directory)
+        with self.limiter.bytes_in_flight(entry['size']):
+            manager.upload_file(
+                local_path=entry['path'],
+                remote_path=f'{directory}/{name}',
+                confirm=confirm,
+                preserve_mtime=bool(
+                    not confirm and self.config.get('confirm_mtime'),
+                ),
+            )
+
+    def _confirm(
+        self,
+        entries: List[PlannedFile],
+        remote_path: str,
+        manager: SFTPManager,
+    ) -> Set[Path]:
+        """Check the sent entries with one listing per remote directory.
+
+        The local files are stat'ed again, so files that changed since
+        they were sent no longer match and are sent again.
+
+        Returns:
+            Set[Path]: The local paths of the entries that do not match.
+        """
+        expected: Dict[str, Dict[str, Tuple[int, Optional[float]]]] = {}
+        paths: Dict[Tuple[str, str], Path] = {}
+        for entry in entries:
+            directory, name = self._target(entry, remote_path)
+            stat = entry['path'].stat()
+            expected.setdefault(directory, {})[name] = (
+                stat.st_size,
+                stat.st_mtime if self.config.get('confirm_mtime') else None,
+            )
+            paths[directory, name] = entry['path']
+        return {
+            paths[directory, name]
+            for directory, files in expected.items()
+            for name in manager.confirm_uploads(directory, files)
+        }
+
+    @staticmethod
+    def _target(entry: PlannedFile, remote_path: str) -> Tuple[str, str]:
+        """Return the remote directory and name of an entry."""
+        return (
+            entry.get('remote_dir', remote_path),
+            entry.get('remote_name', entry['path'].name),
+        )
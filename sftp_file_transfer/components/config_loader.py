@@ -0,0 +1,81 @@
+import os
+
+from sftp_file_transfer.components.defaults import (
+    DEFAULT_PROFILE_PATH,
+    DEFAULT_SEGMENT_CONCURRENCY,
+    DEFAULT_SEGMENT_SIZE,
+)
+from sftp_file_transfer.components.env_loader import EnvLoader
+from sftp_file_transfer.components.sftp_manager import SFTPManagerConfig
+from sftp_file_transfer.components.transport_tuner import TransportTuner
+
+MEGABYTE = 1024 * 1024
+
+
+def _flag(name: str) -> bool:
+    return os.getenv(name) == '1'
+
+
+def _number(name: str, default=None):
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def load_config() -> SFTPManagerConfig:
+    """Build the SFTP connection and transfer settings from the environment.
+
+    Both the command line and the scheduler read their settings here, so
+    the same `.env` file configures them the same way. Command line options
+    are applied on top. The transport profile saved by `autotune` is
+    applied, if any.
+
+    Returns:
+        SFTPManagerConfig: The connection and transfer settings.
+    """
+    env = EnvLoader()
+    config = SFTPManagerConfig(
+        sftp_host=env.SFTP_HOST,
+        sftp_port=int(env.SFTP_PORT),
+        sftp_user=env.SFTP_USER,
+        sftp_password=env.SFTP_PASSWORD,
+        key_filepath=os.getenv('SFTP_KEY_FILE') or None,
+        key_password=os.getenv('SFTP_KEY_PASSWORD') or None,
+        use_agent=_flag('SFTP_USE_AGENT'),
+        encryption_key=os.getenv('SFTP_ENCRYPTION_KEY') or None,
+        delta_transfer=_flag('DELTA_TRANSFER'),
+        delta_verify=_flag('DELTA_VERIFY'),
+        batch_confirm=_flag('BATCH_CONFIRM'),
+        confirm_mtime=_flag('CONFIRM_MTIME'),
+        block_hash=os.getenv('BLOCK_HASH') or None,
+        segment_verify=_flag('SEGMENT_VERIFY'),
+    )
+    transforms = os.getenv('TRANSFORMS')
+    if transforms:
+        config['transforms'] = transforms.split(';')
+    for key, name in (
+        ('compression_level', 'COMPRESSION_LEVEL'),
+        ('transform_workers', 'TRANSFORM_WORKERS'),
+    ):
+        value = _number(name)
+        if value is not None:
+            config[key] = value
+    segment_threshold = _number('SEGMENT_THRESHOLD_MB')
+    if segment_threshold is not None:
+        config['segment_threshold'] = segment_threshold * MEGABYTE
+        config['segment_size'] = MEGABYTE * _number(
+            'SEGMENT_SIZE_MB',
+            DEFAULT_SEGMENT_SIZE // MEGABYTE,
+        )
+        config['segment_concurrency'] = _number(
+            'SEGMENT_CONCURRENCY',
+            DEFAULT_SEGMENT_CONCURRENCY,
+        )
+    config.update(
+        TransportTuner.load_profile(
+            os.getenv('SFTP_TRANSPORT_PROFILE', DEFAULT_PROFILE_PATH),
+        ),
+    )
+    keepalive = _number('SSH_KEEPALIVE')
+    if keepalive:
+        config['keepalive'] = keepalive
+    return config
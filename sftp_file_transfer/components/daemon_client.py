@@ -0,0 +1,40 @@
+import json
+import socket
+from pathlib import Path
+from typing import Any, Dict, Union
+
+DEFAULT_SOCKET_PATH = Path.home() / '.sftp_file_transfer' / 'daemon.sock'
+
+
+def send_request(
+    socket_path: Union[str, Path],
+    request: Dict[str, Any],
+) -> Dict[str, Any]:
+    """Send a request to the transfer daemon and wait for its response.
+
+    This module only depends on the standard library, so submitting a job
+    does not pay for importing the SFTP stack.
+
+    Args:
+        socket_path (Union[str, Path]): The daemon's Unix domain socket.
+        request (Dict[str, Any]): The request, with an `action` key.
+
+    Raises:
+        RuntimeError: If Unix domain sockets are not supported.
+        ConnectionError: If the daemon closes the connection without
+            answering.
+
+    Returns:
+        Dict[str, Any]: The daemon's response.
+    """
+    if not hasattr(socket, 'AF_UNIX'):
+        raise RuntimeError('Unix domain sockets are not supported here.')
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(str(socket_path))
+        with sock.makefile('rwb') as stream:
+            stream.write(json.dumps(request).encode() + b'\n')
+            stream.flush()
+            line = stream.readline()
+    if not line:
+        raise ConnectionError('The transfer daemon closed the connection.')
+    return json.loads(line)
@@ -0,0 +1,247 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from logging import Logger
+from pathlib import Path
+from typing import Dict, List, Optional, TypedDict, Union
+
+from sftp_file_transfer.components.defaults import POOL_START_METHOD
+from sftp_file_transfer.components.logger_setup import setup_logger
+from sftp_file_transfer.components.transfer_planner import PlannedFile
+
+logger: Logger = setup_logger()
+
+DEFAULT_HASH_CACHE_PATH = (
+    Path.home() / '.sftp_file_transfer' / 'hash_cache.json'
+)
+COLLISION_POLICIES = ('rename', 'skip', 'error')
+HASH_BLOCK_SIZE = 1024 * 1024  # 1 MB
+
+
+def hash_file(path: str) -> str:
+    """Hash the content of a file.
+
+    Defined at module level so it can run in a process pool.
+
+    Args:
+        path (str): The file to hash.
+
+    Returns:
+        str: The hexadecimal BLAKE2b digest of the content.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as file:
+        while block := file.read(HASH_BLOCK_SIZE):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class DedupResult(TypedDict):
+    """The outcome of a deduplication.
+
+    Attributes:
+        entries (List[PlannedFile]): The files to send, one per content.
+        duplicates (Dict[str, str]): Each skipped file and the file sent
+            with the same content.
+        collisions (Dict[str, List[str]]): Each name shared by files with
+            different contents and those files.
+    """
+
+    entries: List[PlannedFile]
+    duplicates: Dict[str, str]
+    collisions: Dict[str, List[str]]
+
+
+class Deduplicator:
+    """Send each content once when merging several source directories.
+
+    Only files sharing their size or their name with another candidate are
+    hashed. Hashes are computed in a process pool and kept in a persistent
+    cache keyed by path, size, modification time and inode, so unchanged
+    files are never hashed again. Files that no longer exist are dropped
+    from the cache whenever it is saved.
+
+    Parameters:
+        cache_path (Optional[Union[str, Path]]): The persistent hash cache.
+            Hashes are not kept between runs when not given.
+        processes (Optional[int]): The size of the process pool. Defaults
+            to the number of CPUs.
+        collisions (str): How files with the same name but different
+            contents are handled, one of `COLLISION_POLICIES`: `rename`
+            sends them with the start of their hash appended to the name,
+            `skip` only sends the first one and `error` raises.
+    """
+
+    _cache_lock = threading.Lock()
+
+    def __init__(
+        self,
+        cache_path: Optional[Union[str, Path]] = None,
+        processes: Optional[int] = None,
+        collisions: str = 'rename',
+    ):
+        if collisions not in COLLISION_POLICIES:
+            raise ValueError(
+                f'Invalid collision policy: {collisions}. '
+                f'Expected one of {", ".join(COLLISION_POLICIES)}.',
+            )
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.processes = processes or os.cpu_count() or 1
+        self.collisions = collisions
+
+    def deduplicate(self, files: List[Path]) -> DedupResult:
+        """Select one file per content and resolve name collisions.
+
+        The first file of each content is kept, in the given order.
+
+        Args:
+            files (List[Path]): The candidate files, possibly from several
+                directories.
+
+        Raises:
+            ValueError: If names collide and the policy is `error`.
+
+        Returns:
+            DedupResult: The files to send and what was left out.
+        """
+        stats = {path: path.stat() for path in dict.fromkeys(files)}
+        by_size = defaultdict(list)
+        by_name = defaultdict(list)
+        for path, stat in stats.items():
+            by_size[stat.st_size].append(path)
+            by_name[path.name].append(path)
+        candidates = {
+            path
+            for groups in (by_size, by_name)
+            for paths in groups.values()
+            if len(paths) > 1
+            for path in paths
+        }
+        digests = self.hash_files(
+            {path: stats[path] for path in candidates},
+        )
+
+        result = DedupResult(entries=[], duplicates={}, collisions={})
+        kept: Dict[str, Path] = {}
+        names: Dict[str, str] = {}
+        for path, stat in stats.items():
+            content = digests.get(path) or f'size:{stat.st_size}:{path}'
+            if content in kept:
+                result['duplicates'][str(path)] = str(kept[content])
+                continue
+            kept[content] = path
+            entry = PlannedFile(
+                path=path,
+                size=stat.st_size,
+                mtime=stat.st_mtime,
+            )
+            if names.setdefault(path.name, content) != content:
+                result['collisions'].setdefault(
+                    path.name,
+                    [str(kept[names[path.name]])],
+                ).append(str(path))
+                if self.collisions == 'skip':
+                    del kept[content]
+                    continue
+                entry['remote_name'] = (
+                    f'{path.stem}-{digests[path][:8]}{path.suffix}'
+                )
+            result['entries'].append(entry)
+
+        if result['collisions'] and self.collisions == 'error':
+            raise ValueError(
+                'Files with different contents share the names: '
+                f'{", ".join(sorted(result["collisions"]))}',
+            )
+        for name, paths in result['collisions'].items():
+            logger.warning(f'Name collision for {name}: {paths}.')
+        logger.info(
+            f'Deduplicated {len(stats)} files to {len(result["entries"])}, '
+            f'hashing {len(candidates)}.',
+        )
+        return result
+
+    def hash_files(self, stats: Dict[Path, os.stat_result]) -> Dict[Path, str]:
+        """Hash files, reusing the cached hashes of unchanged files.
+
+        Args:
+            stats (Dict[Path, os.stat_result]): The files to hash and their
+                current attributes.
+
+        Returns:
+            Dict[Path, str]: The digest of each file.
+        """
+        cache = self._load_cache()
+        digests: Dict[Path, str] = {}
+        misses: List[Path] = []
+        for path, stat in stats.items():
+            record = cache.get(str(path))
+            if record and record == self._record(stat, record['digest']):
+                digests[path] = record['digest']
+            else:
+                misses.append(path)
+
+        if len(misses) > 1 and self.processes > 1:
+            workers = min(self.processes, len(misses))
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context(POOL_START_METHOD),
+            ) as pool:
+                hashed = pool.map(hash_file, map(str, misses), chunksize=4)
+                digests.update(zip(misses, hashed))
+        else:
+            digests.update((path, hash_file(str(path))) for path in misses)
+
+        if misses and self.cache_path is not None:
+            self._save_cache({
+                str(path): self._record(stats[path], digests[path])
+                for path in misses
+            })
+        logger.info(
+            f'Hashed {len(misses)} files, {len(stats) - len(misses)} cached.',
+        )
+        return digests
+
+    @staticmethod
+    def _record(stat: os.stat_result, digest: Optional[str]) -> dict:
+        return {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'inode': stat.st_ino,
+            'digest': digest,
+        }
+
+    def _load_cache(self) -> Dict[str, dict]:
+        if self.cache_path is None or not self.cache_path.is_file():
+            return {}
+        try:
+            with self.cache_path.open(encoding='utf-8') as cache:
+                return json.load(cache)
+        except ValueError:
+            logger.warning(f'Ignoring corrupt hash cache {self.cache_path}.')
+            return {}
+
+    def _save_cache(self, records: Dict[str, dict]) -> None:
+        """Merge records into the cache file, replacing it atomically.
+
+        Records of files that no longer exist are dropped, so the cache does
+        not grow with every file that was ever hashed.
+        """
+        with self._cache_lock:
+            cache = {
+                path: record
+                for path, record in self._load_cache().items()
+                if os.path.exists(path)
+            }
+            cache.update(records)
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_path.with_name(
+                f'{self.cache_path.name}.{os.getpid()}.tmp',
+            )
+            with tmp_path.open('w', encoding='utf-8') as tmp:
+                json.dump(cache, tmp)
+            os.replace(tmp_path, self.cache_path)
@@ -0,0 +1,21 @@
+import multiprocessing
+from pathlib import Path
+
+# Defaults shared with the command line interface. This module only depends
+# on the standard library, so building the CLI does not import the SFTP stack.
+
+DEFAULT_SEGMENT_SIZE = 256 * 1024 * 1024  # 256 MB
+DEFAULT_SEGMENT_CONCURRENCY = 4
+DEFAULT_REMOVE_WINDOW = 64
+DEFAULT_PROFILE_PATH = (
+    Path.home() / '.sftp_file_transfer' / 'transport_profile.json'
+)
+DEFAULT_PROBE_SIZE = 32 * 1024 * 1024  # 32 MB
+TRANSFORM_NAMES = ('gzip', 'zstd', 'encrypt')
+# Process pools start their workers from a fresh interpreter instead of
+# forking this one, whose SFTP, logging and scheduler threads may hold locks.
+POOL_START_METHOD = (
+    'forkserver'
+    if 'forkserver' in multiprocessing.get_all_start_methods()
+    else 'spawn'
+)
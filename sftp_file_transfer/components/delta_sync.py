@@ -0,0 +1,581 @@
+import hashlib
+import json
+import mmap
+import zlib
+from logging import Logger
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, TypedDict
+
+from paramiko import SFTPAttributes, SFTPClient
+from paramiko.sftp import CMD_EXTENDED, int64
+
+from sftp_file_transfer.components.logger_setup import setup_logger
+
+logger: Logger = setup_logger()
+
+DEFAULT_DELTA_BLOCK_SIZE = 128 * 1024  # 128 KB
+SIGNATURE_SUFFIX = '.sftpsig'
+MAX_LITERAL_RATIO = 0.5
+_ADLER_MOD = 65521
+_WRITE_BLOCK_SIZE = 1024 * 1024  # 1 MB
+_VERIFY_BATCH = 64  # blocks read back per readv request
+
+# ('copy', remote offset, length) or ('data', local offset, length), applied
+# in order so each operation lands right after the previous one.
+DeltaOp = Tuple[str, int, int]
+
+
+class FileSignature(TypedDict):
+    """Block signatures of a file, as stored in its remote sidecar.
+
+    `size` and `mtime` are the remote attributes at the time the signature
+    was written, used to detect a sidecar that went stale.
+    """
+
+    block_size: int
+    size: int
+    mtime: Optional[int]
+    digest: str
+    blocks: List[Tuple[int, str]]
+
+
+class DeltaSync:
+    """Compute and apply rsync-style deltas against a remote file.
+
+    The remote file is described by block signatures made of an Adler-32
+    weak checksum, which can be rolled one byte at a time, and a BLAKE2b
+    strong hash. They are read from a sidecar written next to the remote
+    file on the previous delta upload, or computed by reading the remote
+    file when the sidecar is missing or stale.
+    """
+
+    @staticmethod
+    def strong_hash(data) -> str:
+        """Return the strong hash of a block.
+
+        Args:
+            data (bytes): The block content.
+
+        Returns:
+            str: The hex digest of the block.
+        """
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+    @classmethod
+    def signature(
+        cls,
+        chunks: Iterable[bytes],
+        block_size: int = DEFAULT_DELTA_BLOCK_SIZE,
+    ) -> FileSignature:
+        """Compute the block signatures of a stream of chunks.
+
+        Args:
+            chunks (Iterable[bytes]): The file content, in order, in chunks
+                of any size.
+            block_size (int): The signature block size.
+                Defaults to DEFAULT_DELTA_BLOCK_SIZE.
+
+        Returns:
+            FileSignature: The signature of the content.
+        """
+        digest = hashlib.sha256()
+        blocks: List[Tuple[int, str]] = []
+        pending = bytearray()
+        size = 0
+        for chunk in chunks:
+            digest.update(chunk)
+            size += len(chunk)
+            start = 0
+            if pending:
+                start = block_size - len(pending)
+                pending += chunk[:start]
+                if len(pending) < block_size:
+                    continue
+                blocks.append((
+                    zlib.adler32(pending),
+                    cls.strong_hash(pending),
+                ))
+                pending = bytearray()
+            end = start + (len(chunk) - start) // block_size * block_size
+            for offset in range(start, end, block_size):
+                block = chunk[offset : offset + block_size]
+                blocks.append((zlib.adler32(block), cls.strong_hash(block)))
+            pending += chunk[end:]
+        if pending:
+            blocks.append((zlib.adler32(pending), cls.strong_hash(pending)))
+        return FileSignature(
+            block_size=block_size,
+            size=size,
+            mtime=None,
+            digest=digest.hexdigest(),
+            blocks=blocks,
+        )
+
+    @staticmethod
+    def is_append(data, signature: FileSignature) -> bool:
+        """Check whether the content only appends to the signed file.
+
+        Args:
+            data (memoryview): The new content.
+            signature (FileSignature): The signature of the old content.
+
+        Returns:
+            bool: True if the old content is a prefix of the new one.
+        """
+        size = signature['size']
+        if len(data) < size:
+            return False
+        return hashlib.sha256(data[:size]).hexdigest() == signature['digest']
+
+    @classmethod
+    def compute_delta(  # noqa: PLR0912, PLR0915
+        cls,
+        data,
+        signature: FileSignature,
+        max_literal_ratio: float = MAX_LITERAL_RATIO,
+    ) -> Optional[List[DeltaOp]]:
+        """Compute the operations rebuilding the content from the old file.
+
+        Blocks are first tried at block-aligned positions, so content edited
+        in place re-synchronises without rolling. On a miss the weak checksum
+        is rolled one byte at a time until a block matches again.
+
+        Args:
+            data (memoryview): The new content.
+            signature (FileSignature): The signature of the old content.
+            max_literal_ratio (float): The share of the new content above
+                which sending a delta is not worth it.
+                Defaults to MAX_LITERAL_RATIO.
+
+        Returns:
+            Optional[List[DeltaOp]]: The operations, or None if the new
+                content shares too little with the old one.
+        """
+        block_size = signature['block_size']
+        old_size = signature['size']
+        size = len(data)
+        budget = max_literal_ratio * size
+        index: Dict[int, List[Tuple[int, str]]] = {}
+        for number, (weak, strong) in enumerate(signature['blocks']):
+            index.setdefault(weak, []).append((number, strong))
+
+        def match(start: int, weak: int, length: int) -> Optional[int]:
+            candidates = index.get(weak)
+            if not candidates:
+                return None
+            strong = cls.strong_hash(data[start : start + length])
+            for number, expected in candidates:
+                offset = number * block_size
+                if expected == strong and (
+                    min(block_size, old_size - offset) == length
+                ):
+                    return offset
+            return None
+
+        ops: List[DeltaOp] = []
+
+        def emit(kind: str, offset: int, length: int) -> None:
+            if ops and ops[-1][0] == kind:
+                last_kind, last_offset, last_length = ops[-1]
+                if last_offset + last_length == offset:
+                    ops[-1] = (kind, last_offset, last_length + length)
+                    return
+            ops.append((kind, offset, length))
+
+        literal_total = 0
+        literal_start = pos = 0
+        weak: Optional[int] = None
+        while pos + block_size <= size:
+            fresh = weak is None
+            if fresh:
+                weak = zlib.adler32(data[pos : pos + block_size])
+            offset = match(pos, weak, block_size)
+            if offset is not None:
+                if pos > literal_start:
+                    emit('data', literal_start, pos - literal_start)
+                    literal_total += pos - literal_start
+                emit('copy', offset, block_size)
+                pos += block_size
+                literal_start = pos
+                weak = None
+                continue
+
+            if literal_total + pos - literal_start > budget:
+                return None
+            next_pos = pos + block_size
+            if fresh and next_pos + block_size <= size:
+                next_weak = zlib.adler32(
+                    data[next_pos : next_pos + block_size]
+                )
+                if match(next_pos, next_weak, block_size) is not None:
+                    pos, weak = next_pos, next_weak
+                    continue
+            if next_pos >= size:
+                break
+            weak = cls._roll(weak, data[pos], data[next_pos], block_size)
+            pos += 1
+
+        tail = size - pos
+        if 0 < tail < block_size:
+            offset = match(pos, zlib.adler32(data[pos:size]), tail)
+            if offset is not None:
+                if pos > literal_start:
+                    emit('data', literal_start, pos - literal_start)
+                emit('copy', offset, tail)
+                return ops
+        if size > literal_start:
+            emit('data', literal_start, size - literal_start)
+            literal_total += size - literal_start
+        if literal_total > budget:
+            return None
+        return ops
+
+    @staticmethod
+    def _roll(weak: int, out_byte: int, in_byte: int, block_size: int) -> int:
+        """Slide an Adler-32 checksum one byte forward."""
+        a = weak & 0xFFFF
+        b = weak >> 16
+        a = (a - out_byte + in_byte) % _ADLER_MOD
+        b = (b - block_size * out_byte + a - 1) % _ADLER_MOD
+        return (b << 16) | a
+
+    @staticmethod
+    def is_in_place(ops: List[DeltaOp]) -> bool:
+        """Check whether every copied block stays at its current offset.
+
+        Args:
+            ops (List[DeltaOp]): The delta operations.
+
+        Returns:
+            bool: True if the remote file can be patched in place.
+        """
+        position = 0
+        for kind, offset, length in ops:
+            if kind == 'copy' and offset != position:
+                return False
+            position += length
+        return True
+
+    @classmethod
+    def upload(  # noqa: PLR0913, PLR0917
+        cls,
+        sftp: SFTPClient,
+        local_path: Path,
+        remote_path: str,
+        full_upload: Callable[[], SFTPAttributes],
+        block_size: int = DEFAULT_DELTA_BLOCK_SIZE,
+        verify_all: bool = False,
+    ) -> SFTPAttributes:
+        """Upload a file by sending only what changed on the remote copy.
+
+        Pure appends only send the new tail. Other changes rebuild the file
+        next to the remote copy with the `copy-data` extension when the
+        server supports it, then replace it. Edits that keep blocks at their
+        offsets copy the remote file whole before the changed ranges are
+        written. The blocks holding the written ranges are then read back
+        and checked against the new signature, so the check costs about as
+        much as the data sent. Anything else falls back to `full_upload`.
+
+        Copied blocks are trusted to the sidecar, which is only used while
+        the remote size and modification time match it. With `verify_all`,
+        the whole remote file is read back and checked against the SHA-256
+        of the local file instead, so even a sidecar gone stale without
+        those changing cannot go unnoticed.
+
+        Args:
+            sftp (SFTPClient): A connected SFTP client.
+            local_path (Path): The local file path to upload.
+            remote_path (str): The remote file path on the SFTP server.
+            full_upload (Callable[[], SFTPAttributes]): Uploads the whole file
+                when no delta can be applied.
+            block_size (int): The signature block size used for new sidecars.
+                Defaults to DEFAULT_DELTA_BLOCK_SIZE.
+            verify_all (bool): Whether to read the whole remote file back
+                instead of the written blocks only. Defaults to False.
+
+        Raises:
+            IOError: If the rebuilt remote file has an unexpected size.
+
+        Returns:
+            SFTPAttributes: The attributes of the uploaded remote file.
+        """
+        sidecar = f'{remote_path}{SIGNATURE_SUFFIX}'
+        size = local_path.stat().st_size
+        old = cls._remote_signature(sftp, remote_path, sidecar, block_size)
+        if old is None or size == 0:
+            result = full_upload()
+            with open(local_path, 'rb') as f:
+                chunks = iter(lambda: f.read(_WRITE_BLOCK_SIZE), b'')
+                new = cls.signature(chunks, block_size)
+            cls._write_signature(sftp, sidecar, new, result)
+            return result
+
+        with (
+            open(local_path, 'rb') as local_file,
+            mmap.mmap(local_file.fileno(), 0, access=mmap.ACCESS_READ) as m,
+            memoryview(m) as view,
+        ):
+            new = cls.signature([view], block_size)
+            if cls.is_append(view, old):
+                mode = 'append'
+                sent = size - old['size']
+                ops = [('copy', 0, old['size']), ('data', old['size'], sent)]
+                if sent:
+                    # A half-appended file must not keep a matching sidecar.
+                    cls._remove_quietly(sftp, sidecar)
+                    cls._append(sftp, remote_path, view, old['size'])
+                result = sftp.stat(remote_path)
+            else:
+                ops = cls.compute_delta(view, old)
+                sent = sum(n for kind, _, n in ops or [] if kind == 'data')
+                if ops is None:
+                    logger.info(f'Delta not worth it for {local_path}.')
+                    result = None
+                elif cls.is_in_place(ops):
+                    mode = 'patch'
+                    copies = [('copy', 0, min(size, old['size']))]
+                    result = cls._rebuild(sftp, remote_path, view, ops, copies)
+                else:
+                    mode = 'rebuild'
+                    result = cls._rebuild(sftp, remote_path, view, ops, ops)
+
+        if result is not None and not (
+            cls._remote_digest(sftp, remote_path) == new['digest']
+            if verify_all
+            else cls._verify_written(sftp, remote_path, ops, new)
+        ):
+            logger.warning(
+                f'Delta upload of {local_path} does not match the local '
+                'file, sending it whole.',
+            )
+            result = None
+        if result is None:
+            result = full_upload()
+        else:
+            logger.info(
+                f'Delta upload ({mode}) of {local_path} sent {sent} of '
+                f'{size} bytes.',
+            )
+        if result.st_size != size:
+            raise IOError(
+                f'Size mismatch in delta upload: {result.st_size} != {size}',
+            )
+        cls._write_signature(sftp, sidecar, new, result)
+        return result
+
+    @classmethod
+    def _remote_signature(
+        cls,
+        sftp: SFTPClient,
+        remote_path: str,
+        sidecar: str,
+        block_size: int,
+    ) -> Optional[FileSignature]:
+        """Load the signature of the remote file.
+
+        Args:
+            sftp (SFTPClient): A connected SFTP client.
+            remote_path (str): The remote file path.
+            sidecar (str): The remote sidecar path.
+            block_size (int): The block size used if the signature has to be
+                computed from the remote file.
+
+        Returns:
+            Optional[FileSignature]: The signature, or None if the remote file
+                does not exist.
+        """
+        try:
+            attrs = sftp.stat(remote_path)
+        except FileNotFoundError:
+            return None
+        try:
+            with sftp.open(sidecar, 'rb') as f:
+                f.prefetch()
+                signature: FileSignature = json.loads(f.read())
+            if (
+                signature['size'] == attrs.st_size
+                and signature['mtime'] == attrs.st_mtime
+            ):
+                return signature
+            logger.info(f'Ignoring stale signature sidecar {sidecar}.')
+        except (IOError, ValueError, KeyError):
+            logger.info(f'No signature sidecar for {remote_path}.')
+
+        with sftp.open(remote_path, 'rb') as f:
+            f.prefetch(attrs.st_size)
+            chunks = iter(lambda: f.read(_WRITE_BLOCK_SIZE), b'')
+            return cls.signature(chunks, block_size)
+
+    @staticmethod
+    def _write_signature(
+        sftp: SFTPClient,
+        sidecar: str,
+        signature: FileSignature,
+        attrs: SFTPAttributes,
+    ) -> None:
+        """Write the sidecar describing the freshly uploaded remote file."""
+        signature['size'] = attrs.st_size
+        signature['mtime'] = attrs.st_mtime
+        with sftp.open(sidecar, 'wb') as f:
+            f.write(json.dumps(signature).encode())
+
+    @staticmethod
+    def _write_data(remote_file, view, ops: List[DeltaOp]) -> None:
+        """Write the literal operations of a delta at their target offsets."""
+        remote_file.set_pipelined(True)
+        position = 0
+        for kind, offset, length in ops:
+            if kind == 'data':
+                remote_file.seek(position)
+                end = offset + length
+                for start in range(offset, end, _WRITE_BLOCK_SIZE):
+                    stop = min(start + _WRITE_BLOCK_SIZE, end)
+                    remote_file.write(view[start:stop])
+            position += length
+
+    @classmethod
+    def _append(
+        cls,
+        sftp: SFTPClient,
+        remote_path: str,
+        view,
+        old_size: int,
+    ) -> None:
+        """Write the new tail of an appended file after its old content."""
+        ops = [('copy', 0, old_size), ('data', old_size, len(view) - old_size)]
+        with sftp.open(remote_path, 'r+b', bufsize=0) as remote_file:
+            cls._write_data(remote_file, view, ops)
+
+    @staticmethod
+    def _remote_digest(sftp: SFTPClient, remote_path: str) -> str:
+        """Return the SHA-256 hex digest of a remote file, read in full."""
+        digest = hashlib.sha256()
+        with sftp.open(remote_path, 'rb') as f:
+            f.prefetch()
+            for chunk in iter(lambda: f.read(_WRITE_BLOCK_SIZE), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @classmethod
+    def _verify_written(
+        cls,
+        sftp: SFTPClient,
+        remote_path: str,
+        ops: List[DeltaOp],
+        signature: FileSignature,
+    ) -> bool:
+        """Check the blocks holding the written ranges of a delta.
+
+        Only the signature blocks overlapping a literal operation are read,
+        with a few pipelined `readv` requests.
+
+        Args:
+            sftp (SFTPClient): A connected SFTP client.
+            remote_path (str): The remote file path.
+            ops (List[DeltaOp]): The operations applied to the remote file.
+            signature (FileSignature): The signature of the new content.
+
+        Returns:
+            bool: Whether every written block matches the signature.
+        """
+        block_size = signature['block_size']
+        numbers = set()
+        position = 0
+        for kind, _, length in ops:
+            if kind == 'data' and length:
+                numbers.update(
+                    range(
+                        position // block_size,
+                        (position + length - 1) // block_size + 1,
+                    ),
+                )
+            position += length
+        numbers = sorted(numbers)
+        size = signature['size']
+        with sftp.open(remote_path, 'rb') as f:
+            for start in range(0, len(numbers), _VERIFY_BATCH):
+                batch = numbers[start : start + _VERIFY_BATCH]
+                ranges = [
+                    (n * block_size, min(block_size, size - n * block_size))
+                    for n in batch
+                ]
+                blocks = zip(batch, f.readv(ranges))
+                if any(
+                    cls.strong_hash(block) != signature['blocks'][n][1]
+                    for n, block in blocks
+                ):
+                    return False
+        return True
+
+    @classmethod
+    def _rebuild(  # noqa: PLR0913, PLR0917
+        cls,
+        sftp: SFTPClient,
+        remote_path: str,
+        view,
+        ops: List[DeltaOp],
+        copies: List[DeltaOp],
+    ) -> Optional[SFTPAttributes]:
+        """Rebuild the remote file from its own blocks and the new data.
+
+        The `copies` are made server-side with the `copy-data` extension into
+        a temporary file, the literal operations of `ops` are written over
+        it, and it then replaces the remote file. The live file is never
+        written, so an interrupted rebuild leaves it intact.
+
+        Returns:
+            Optional[SFTPAttributes]: The attributes of the rebuilt file, or
+                None if the server does not support `copy-data`.
+        """
+        temp_path = f'{remote_path}.delta-tmp'
+        with (
+            sftp.open(remote_path, 'rb') as source,
+            sftp.open(temp_path, 'wb', bufsize=0) as target,
+        ):
+            try:
+                cls._copy_blocks(sftp, source, target, copies)
+            except IOError as e:
+                logger.info(f'Server-side copy unavailable ({e}).')
+                copied = False
+            else:
+                cls._write_data(target, view, ops)
+                copied = True
+        if not copied:
+            cls._remove_quietly(sftp, temp_path)
+            return None
+
+        try:
+            sftp.posix_rename(temp_path, remote_path)
+        except IOError:
+            sftp.remove(remote_path)
+            sftp.rename(temp_path, remote_path)
+        return sftp.stat(remote_path)
+
+    @staticmethod
+    def _copy_blocks(sftp: SFTPClient, source, target, ops) -> None:
+        """Copy unchanged blocks server-side with the `copy-data` extension.
+
+        Copies are synchronous requests, so they all go before the pipelined
+        writes whose acknowledgements they would otherwise consume.
+        """
+        position = 0
+        for kind, offset, length in ops:
+            if kind == 'copy':
+                sftp._request(  # noqa: SLF001
+                    CMD_EXTENDED,
+                    'copy-data',
+                    source.handle,
+                    int64(offset),
+                    int64(length),
+                    target.handle,
+                    int64(position),
+                )
+            position += length
+
+    @staticmethod
+    def _remove_quietly(sftp: SFTPClient, remote_path: str) -> None:
+        """Remove a remote file, ignoring a missing one."""
+        try:
+            sftp.remove(remote_path)
+        except IOError:
+            pass
@@ -14,6 +14,10 @@ logger: Logger = setup_logger()
 def require_env_vars(func: Callable) -> Callable:
     """Decorator to ensure required environment variables are set.
 
+    `SFTP_PASSWORD` is optional, as keys may also come from command line
+    options or scheduled jobs. `SFTPManager` fails the authentication when
+    there is neither a password nor a key.
+
     Args:
         func (callable): The function to decorate.
 
@@ -31,7 +35,6 @@ def require_env_vars(func: Callable) -> Callable:
             'SFTP_HOST',
             'SFTP_PORT',
             'SFTP_USER',
-            'SFTP_PASSWORD',
         }
         for var in required_vars:
             if not os.getenv(var):
@@ -74,7 +77,10 @@ class EnvLoader:
 
     @require_env_vars
     def __getattribute__(self, name: str) -> Any:
-        if name in {'SFTP_HOST', 'SFTP_PORT', 'SFTP_USER', 'SFTP_PASSWORD'}:
+        if name in {'SFTP_HOST', 'SFTP_PORT', 'SFTP_USER'}:
             logger.info(f'Accessing environment variable: {name}')
             return os.getenv(name)
+        if name == 'SFTP_PASSWORD':
+            logger.info(f'Accessing environment variable: {name}')
+            return os.getenv(name, '')
         return super().__getattribute__(name)
@@ -1,10 +1,12 @@
-from datetime import datetime
+import os
+from datetime import datetime, timedelta
 from logging import Logger
 from pathlib import Path
 from shutil import SameFileError, SpecialFileError, copyfile
-from typing import List, Union
+from typing import List, Optional, Union
 
 from sftp_file_transfer.components.logger_setup import setup_logger
+from sftp_file_transfer.components.transfer_planner import PlannedFile
 
 logger: Logger = setup_logger()
 
@@ -87,6 +89,60 @@ class FileManager:
         logger.info(f'Fetched {extension} files from {dir_path}: {files}')
         return files
 
+    @staticmethod
+    def select_files(
+        directories: List[Union[str, Path]],
+        extension: Optional[str] = None,
+        t_delta: Optional[int] = None,
+    ) -> List[PlannedFile]:
+        """Select the files of several directories, stat'ing each one once.
+
+        The size and modification time collected while scanning are used to
+        filter by date and are kept for transfer planning.
+
+        Args:
+            directories (List[Union[str, Path]]): The directories to fetch
+                files from.
+            extension (Optional[str]): Only select files with this extension.
+            t_delta (Optional[int]): Only select files modified this many
+                days ago. 0 means today.
+
+        Returns:
+            List[PlannedFile]: The selected files, directory by directory.
+        """
+        target_day = (
+            (datetime.now() - timedelta(days=t_delta)).date()
+            if t_delta is not None
+            else None
+        )
+        entries: List[PlannedFile] = []
+        for directory in directories:
+            dir_path = Path(directory).absolute()
+            selected = 0
+            with os.scandir(dir_path) as scan:
+                for item in scan:
+                    if not item.is_file() or (
+                        extension and Path(item.name).suffix != extension
+                    ):
+                        continue
+                    stat = item.stat()
+                    if (
+                        target_day is not None
+                        and datetime.fromtimestamp(stat.st_mtime).date()
+                        != target_day
+                    ):
+                        continue
+                    entries.append(
+                        PlannedFile(
+                            path=dir_path / item.name,
+                            size=stat.st_size,
+                            mtime=stat.st_mtime,
+                        ),
+                    )
+                    selected += 1
+            logger.info(f'Selected {selected} files from {dir_path}.')
+        return entries
+
     @staticmethod
     def sort_files_by_date(
         files: List[Path],
@@ -0,0 +1,151 @@
+import json
+import os
+import threading
+from logging import Logger
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from sftp_file_transfer.components.logger_setup import setup_logger
+from sftp_file_transfer.components.transfer_planner import PlannedFile
+
+logger: Logger = setup_logger()
+
+DEFAULT_JOURNAL_PATH = (
+    Path.home() / '.sftp_file_transfer' / 'batch_journal.jsonl'
+)
+
+
+class JobJournal:
+    """Write-ahead journal of a batch upload, used to resume it after a crash.
+
+    The journal is a JSON lines file. Its first record holds the planned
+    batch and every following record marks a file as uploaded. Each record
+    is flushed and synced to disk before the call returns, so a batch
+    interrupted at any point resumes with only the files that were not
+    confirmed. The journal is removed once the batch completes.
+
+    Parameters:
+        path (Union[str, Path]): The journal file.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def start(self, plan: List[List[PlannedFile]], remote_path: str) -> None:
+        """Record a new batch, replacing any previous journal.
+
+        Args:
+            plan (List[List[PlannedFile]]): One list of entries per worker,
+                as returned by `TransferPlanner.plan`.
+            remote_path (str): The remote directory the files are sent to.
+        """
+        record = {
+            'type': 'plan',
+            'remote_path': remote_path,
+            'plan': [
+                [{**entry, 'path': str(entry['path'])} for entry in entries]
+                for entries in plan
+            ],
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f'{self.path.name}.tmp')
+        with self._lock:
+            with tmp_path.open('w', encoding='utf-8') as journal:
+                journal.write(json.dumps(record) + '\n')
+                journal.flush()
+                os.fsync(journal.fileno())
+            os.replace(tmp_path, self.path)
+        logger.info(f'Journaled batch of {self._count(plan)} files.')
+
+    def mark_done(self, path: Path) -> None:
+        """Record that a file was uploaded. Safe to call from any worker.
+
+        Args:
+            path (Path): The local path of the uploaded file.
+        """
+        line = json.dumps({'type': 'done', 'path': str(path)}) + '\n'
+        with self._lock, self.path.open('a', encoding='utf-8') as journal:
+            journal.write(line)
+            journal.flush()
+            os.fsync(journal.fileno())
+
+    def finish(self) -> None:
+        """Remove the journal of a completed batch."""
+        with self._lock:
+            self.path.unlink(missing_ok=True)
+
+    def pending(self) -> Optional[Tuple[str, List[List[PlannedFile]]]]:
+        """Read the files of an interrupted batch that were not uploaded.
+
+        A record torn by a crash at the end of the journal is discarded.
+        Files that no longer exist locally are skipped.
+
+        Returns:
+            Optional[Tuple[str, List[List[PlannedFile]]]]: The remote
+                directory and the remaining entries per worker, or None if
+                there is no interrupted batch.
+        """
+        with self._lock:
+            if not self.path.exists():
+                return None
+            records = self._read_records()
+        if not records or records[0].get('type') != 'plan':
+            logger.warning(f'Ignoring invalid journal {self.path}.')
+            return None
+
+        done = {r['path'] for r in records[1:] if r.get('type') == 'done'}
+        plan: List[List[PlannedFile]] = []
+        for entries in records[0]['plan']:
+            remaining: List[PlannedFile] = []
+            for entry in entries:
+                if entry['path'] in done:
+                    continue
+                path = Path(entry['path'])
+                if not path.is_file():
+                    logger.warning(f'Skipping missing journaled file {path}.')
+                    continue
+                remaining.append(PlannedFile(**{**entry, 'path': path}))
+            plan.append(remaining)
+        logger.info(
+            f'Journal {self.path} has {self._count(plan)} files left '
+            f'of {self._count(records[0]["plan"])}.',
+        )
+        return records[0]['remote_path'], plan
+
+    def batch_files(self) -> Dict[str, float]:
+        """Read every file of the journaled batch, uploaded or not.
+
+        Returns:
+            Dict[str, float]: The modification time each local path had
+                when the batch was planned, empty if there is no batch.
+        """
+        with self._lock:
+            if not self.path.exists():
+                return {}
+            records = self._read_records()
+        if not records or records[0].get('type') != 'plan':
+            return {}
+        return {
+            entry['path']: entry['mtime']
+            for entries in records[0]['plan']
+            for entry in entries
+        }
+
+    def _read_records(self) -> List[dict]:
+        """Parse the journal, truncating a torn last record."""
+        with self.path.open('rb+') as journal:
+            data = journal.read()
+            complete = data.rfind(b'\n') + 1
+            if complete < len(data):
+                logger.warning(f'Discarding a torn record in {self.path}.')
+                journal.truncate(complete)
+        return [
+            json.loads(line)
+            for line in data[:complete].splitlines()
+            if line.strip()
+        ]
+
+    @staticmethod
+    def _count(plan: List[list]) -> int:
+        return sum(len(entries) for entries in plan)
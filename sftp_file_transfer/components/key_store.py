@@ -0,0 +1,101 @@
+import threading
+from logging import Logger
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from paramiko import Agent, AgentKey, PKey
+
+from sftp_file_transfer.components.logger_setup import setup_logger
+
+logger: Logger = setup_logger()
+
+
+class _SerializedAgent(Agent):
+    """An ssh-agent connection whose requests never interleave.
+
+    Paramiko writes each request and reads its reply on the one agent
+    socket without a lock, so concurrent signatures could read each other's
+    replies. The shared agent keys sign through this connection.
+    """
+
+    def __init__(self):
+        self._request_lock = threading.Lock()
+        super().__init__()
+
+    def _send_message(self, msg):
+        with self._request_lock:
+            return super()._send_message(msg)
+
+
+class KeyStore:
+    """Load private keys once per process and share them between connections.
+
+    Key files are parsed and decrypted the first time they are used, then
+    served from memory until the file changes, so pooled and parallel
+    connections only pay for the signature during authentication. RSA,
+    ECDSA and Ed25519 keys are detected from the file itself.
+    """
+
+    _keys: Dict[Tuple[Path, int], PKey] = {}
+    _agent: Optional[Agent] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def load(
+        cls,
+        path: Union[str, Path],
+        password: Optional[str] = None,
+    ) -> PKey:
+        """Get the private key stored in a file.
+
+        Args:
+            path (Union[str, Path]): The private key file, in PEM or OpenSSH
+                format.
+            password (Optional[str]): The passphrase of an encrypted key.
+
+        Raises:
+            paramiko.SSHException: If the key cannot be read or decrypted.
+
+        Returns:
+            PKey: The private key.
+        """
+        path = Path(path).expanduser().resolve()
+        cache_key = (path, path.stat().st_mtime_ns)
+        with cls._lock:
+            key = cls._keys.get(cache_key)
+            if key is None:
+                key = PKey.from_path(
+                    path,
+                    passphrase=password.encode() if password else None,
+                )
+                cls._keys = {
+                    k: v for k, v in cls._keys.items() if k[0] != path
+                }
+                cls._keys[cache_key] = key
+                logger.info(f'Loaded {key.get_name()} key from {path}.')
+        return key
+
+    @classmethod
+    def agent_keys(cls) -> List[AgentKey]:
+        """Get the keys offered by the running ssh-agent.
+
+        The agent connection is opened once and kept for the process. Its
+        requests are serialized, so the keys can sign for several
+        connections authenticating at the same time.
+
+        Returns:
+            List[AgentKey]: The agent keys, empty when no agent is running.
+        """
+        with cls._lock:
+            if cls._agent is None:
+                cls._agent = _SerializedAgent()
+            return list(cls._agent.get_keys())
+
+    @classmethod
+    def clear(cls) -> None:
+        """Forget the cached keys and close the agent connection."""
+        with cls._lock:
+            cls._keys = {}
+            if cls._agent is not None:
+                cls._agent.close()
+                cls._agent = None
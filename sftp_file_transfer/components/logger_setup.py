@@ -51,6 +51,9 @@ def setup_logger(
 
     logger = getLogger(log_name)
     logger.setLevel(default_level)
+    if logger.handlers:
+        # Every module sets up the same logger; only attach handlers once.
+        return logger
 
     handler = RotatingFileHandler(
         filename=log_path,
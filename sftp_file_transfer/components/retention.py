@@ -0,0 +1,98 @@
+import stat
+import time
+from fnmatch import fnmatch
+from logging import Logger
+from typing import Iterable, List, Optional, TypedDict
+
+from paramiko import SFTPAttributes
+
+from sftp_file_transfer.components.delta_sync import SIGNATURE_SUFFIX
+from sftp_file_transfer.components.logger_setup import setup_logger
+
+logger: Logger = setup_logger()
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+class RetentionPolicy(TypedDict, total=False):
+    """Rules selecting remote files to remove.
+
+    A file is removed as soon as it breaks any of the rules that are set.
+    Files are ranked newest first for `keep_last` and `max_total_bytes`.
+
+    Attributes:
+        max_age_days (Optional[float]): Remove files older than this.
+        keep_last (Optional[int]): Keep only this many of the newest files.
+        max_total_bytes (Optional[int]): Keep the newest files whose
+            cumulative size stays within this budget.
+        pattern (Optional[str]): Only consider files whose name matches this
+            glob pattern.
+    """
+
+    max_age_days: Optional[float]
+    keep_last: Optional[int]
+    max_total_bytes: Optional[int]
+    pattern: Optional[str]
+
+
+class Retention:
+    """Select remote files to prune according to a retention policy."""
+
+    @staticmethod
+    def select_for_removal(
+        entries: Iterable[SFTPAttributes],
+        policy: RetentionPolicy,
+        now: Optional[float] = None,
+    ) -> List[SFTPAttributes]:
+        """Select the entries of a remote listing that must be removed.
+
+        Only regular files are considered. Delta signature sidecars are never
+        selected on their own, but the sidecar of a selected file is.
+
+        Args:
+            entries (Iterable[SFTPAttributes]): The remote directory listing.
+            policy (RetentionPolicy): The retention rules.
+            now (Optional[float]): The reference timestamp for ages.
+                Defaults to the current time.
+
+        Returns:
+            List[SFTPAttributes]: The entries to remove, newest first.
+        """
+        now = time.time() if now is None else now
+        pattern = policy.get('pattern')
+        max_age_days = policy.get('max_age_days')
+        keep_last = policy.get('keep_last')
+        max_total_bytes = policy.get('max_total_bytes')
+
+        files: List[SFTPAttributes] = []
+        sidecars = {}
+        for entry in entries:
+            if entry.st_mode is not None and not stat.S_ISREG(entry.st_mode):
+                continue
+            if entry.filename.endswith(SIGNATURE_SUFFIX):
+                sidecars[entry.filename] = entry
+            elif pattern is None or fnmatch(entry.filename, pattern):
+                files.append(entry)
+        files.sort(key=lambda e: e.st_mtime or 0, reverse=True)
+
+        selected: List[SFTPAttributes] = []
+        total = 0
+        for rank, entry in enumerate(files):
+            total += entry.st_size or 0
+            age = now - (entry.st_mtime or 0)
+            expired = (
+                max_age_days is not None
+                and age > max_age_days * SECONDS_PER_DAY
+            )
+            over_count = keep_last is not None and rank >= keep_last
+            over_size = max_total_bytes is not None and total > max_total_bytes
+            if expired or over_count or over_size:
+                selected.append(entry)
+                sidecar = sidecars.get(f'{entry.filename}{SIGNATURE_SUFFIX}')
+                if sidecar is not None:
+                    selected.append(sidecar)
+
+        logger.info(
+            f'Retention selected {len(selected)} of {len(files)} files.',
+        )
+        return selected
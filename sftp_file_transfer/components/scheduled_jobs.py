@@ -0,0 +1,244 @@
+import json
+import threading
+from logging import Logger
+from pathlib import Path
+from typing import Dict, List, Optional, TypedDict, Union
+
+from sftp_file_transfer.components.batch_uploader import BatchUploader
+from sftp_file_transfer.components.deduplicator import (
+    DEFAULT_HASH_CACHE_PATH,
+    Deduplicator,
+)
+from sftp_file_transfer.components.file_manager import FileManager
+from sftp_file_transfer.components.job_journal import JobJournal
+from sftp_file_transfer.components.logger_setup import setup_logger
+from sftp_file_transfer.components.sftp_manager import SFTPManagerConfig
+from sftp_file_transfer.components.transfer_limiter import TransferLimiter
+from sftp_file_transfer.components.transfer_planner import (
+    PlannedFile,
+    TransferPlanner,
+)
+
+logger: Logger = setup_logger()
+
+DEFAULT_JOBS_JOURNAL_DIR = Path.home() / '.sftp_file_transfer' / 'jobs'
+TRIGGER_KEYS = ('at', 'every_minutes', 'cron')
+CONNECTION_KEYS = (
+    'sftp_host',
+    'sftp_port',
+    'sftp_user',
+    'sftp_password',
+    'key_filepath',
+    'key_password',
+    'use_agent',
+)
+
+
+class ScheduledJob(TypedDict, total=False):
+    """A transfer run by the scheduler.
+
+    Exactly one of `at`, `every_minutes` or `cron` sets when the job runs.
+
+    Attributes:
+        name (str): A unique name for the job.
+        local_paths (List[str]): The local directories to send files from.
+        remote_path (str): The remote directory the files are sent to.
+        file_extension (Optional[str]): Only send files with this extension.
+        t_delta (Optional[int]): Only send files modified this many days ago.
+        schedule (str): The order in which files are sent.
+        workers (int): The number of connections used by the job.
+        at (str): Run every day at this time, as HH:MM:SS.
+        every_minutes (float): Run at this interval.
+        cron (str): Run according to this cron expression.
+        tz (str): The time zone of `at` and `cron`.
+        journal_path (str): The journal used to resume the job after a
+            crash. Defaults to a file named after the job.
+        deduplicate (bool): Send each content found in `local_paths` once.
+        collisions (str): How files sharing a name with different contents
+            are handled when deduplicating: `rename`, `skip` or `error`.
+        hash_cache_path (str): The hash cache used when deduplicating.
+        sftp_host (str): Overrides the host of the connection settings.
+        sftp_port (int): Overrides the port of the connection settings.
+        sftp_user (str): Overrides the user of the connection settings.
+        sftp_password (str): Overrides the password of the connection
+            settings.
+        key_filepath (str): Overrides the private key of the connection
+            settings.
+        key_password (str): Overrides the passphrase of the private key.
+        use_agent (bool): Overrides whether the ssh-agent keys are tried.
+    """
+
+    name: str
+    local_paths: List[str]
+    remote_path: str
+    file_extension: Optional[str]
+    t_delta: Optional[int]
+    schedule: str
+    workers: int
+    at: str
+    every_minutes: float
+    cron: str
+    tz: str
+    journal_path: str
+    deduplicate: bool
+    collisions: str
+    hash_cache_path: str
+    sftp_host: str
+    sftp_port: int
+    sftp_user: str
+    sftp_password: str
+    key_filepath: str
+    key_password: str
+    use_agent: bool
+
+
+class JobRunner:
+    """Run a scheduled job, never more than one instance at a time.
+
+    Parameters:
+        config (SFTPManagerConfig): The connection settings, which the job
+            may override.
+        job (ScheduledJob): The job to run.
+        limiter (Optional[TransferLimiter]): Caps on connections and bytes
+            in flight shared by every job.
+
+    Raises:
+        ValueError: If the job is missing a setting, does not have exactly
+            one trigger or has an invalid collision policy.
+    """
+
+    def __init__(
+        self,
+        config: SFTPManagerConfig,
+        job: ScheduledJob,
+        limiter: Optional[TransferLimiter] = None,
+    ):
+        missing = [
+            key
+            for key in ('name', 'local_paths', 'remote_path')
+            if not job.get(key)
+        ]
+        if missing:
+            raise ValueError(f'Job is missing {", ".join(missing)}.')
+        if sum(key in job for key in TRIGGER_KEYS) != 1:
+            raise ValueError(
+                f'Job {job["name"]} must set exactly one of '
+                f'{", ".join(TRIGGER_KEYS)}.',
+            )
+        self.job = job
+        self.name = job['name']
+        self.config = SFTPManagerConfig(**config)
+        self.config.update({k: job[k] for k in CONNECTION_KEYS if k in job})
+        self.limiter = limiter or TransferLimiter()
+        self.journal = JobJournal(
+            job.get('journal_path')
+            or DEFAULT_JOBS_JOURNAL_DIR / f'{self.name}.jsonl',
+        )
+        self.deduplicator = (
+            Deduplicator(
+                job.get('hash_cache_path', DEFAULT_HASH_CACHE_PATH),
+                collisions=job.get('collisions', 'rename'),
+            )
+            if job.get('deduplicate')
+            else None
+        )
+        self._running = threading.Lock()
+
+    @staticmethod
+    def load_jobs(path: Union[str, Path]) -> List[ScheduledJob]:
+        """Read the jobs defined in a JSON file.
+
+        Args:
+            path (Union[str, Path]): A JSON file holding a list of jobs.
+
+        Raises:
+            ValueError: If the file does not hold a list or two jobs share
+                a name.
+
+        Returns:
+            List[ScheduledJob]: The jobs.
+        """
+        with Path(path).open(encoding='utf-8') as jobs_file:
+            jobs = json.load(jobs_file)
+        if not isinstance(jobs, list):
+            raise ValueError(f'{path} must hold a list of jobs.')
+        names = [job.get('name') for job in jobs]
+        duplicates = sorted({n for n in names if names.count(n) > 1})
+        if duplicates:
+            raise ValueError(f'Duplicate job names: {", ".join(duplicates)}')
+        return [ScheduledJob(**job) for job in jobs]
+
+    def run(self) -> bool:
+        """Resume the job if it was interrupted, then run it.
+
+        The interrupted batch is finished before the new one is planned,
+        and its files are left out of the new batch unless they changed
+        since. Nothing connects until there is a file to send, and every
+        connection first takes a slot from the limiter.
+
+        Returns:
+            bool: Whether the job ran, False if an instance was already
+                running.
+        """
+        if not self._running.acquire(blocking=False):
+            logger.warning(f'Job {self.name} is still running, skipping.')
+            return False
+        try:
+            journaled = self.journal.batch_files()
+            if journaled:
+                self._resume()
+            plan = self._plan(journaled)
+            if not any(plan):
+                logger.info(f'Job {self.name} has no files to send.')
+                return True
+            self._uploader().upload(plan, self.job['remote_path'])
+        finally:
+            self._running.release()
+        return True
+
+    def resume(self) -> bool:
+        """Finish the batch of the job interrupted by a crash, if any.
+
+        Returns:
+            bool: Whether an interrupted batch was resumed.
+        """
+        with self._running:
+            return self._resume()
+
+    def _resume(self) -> bool:
+        if self.journal.pending() is None:
+            return False
+        return self._uploader().resume()
+
+    def _plan(self, journaled: Dict[str, float]) -> List[List[PlannedFile]]:
+        """Select, deduplicate and plan the files of a new batch.
+
+        Args:
+            journaled (Dict[str, float]): The files of the batch that was
+                just resumed, with their modification times.
+
+        Returns:
+            List[List[PlannedFile]]: One list of entries per worker.
+        """
+        entries = [
+            entry
+            for entry in FileManager.select_files(
+                self.job['local_paths'],
+                self.job.get('file_extension'),
+                self.job.get('t_delta'),
+            )
+            if journaled.get(str(entry['path'])) != entry['mtime']
+        ]
+        if self.deduplicator is not None:
+            entries = self.deduplicator.deduplicate(
+                [entry['path'] for entry in entries],
+            )['entries']
+        return TransferPlanner.plan_entries(
+            entries,
+            self.job.get('schedule', 'none'),
+            self.job.get('workers', 1),
+        )
+
+    def _uploader(self) -> BatchUploader:
+        # Without a manager, each worker connects once it holds a slot.
+        return BatchUploader(self.config, None, self.journal, self.limiter)
@@ -1,9 +1,33 @@
+import hashlib
 import logging
+import mmap
+import os
+import stat
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from logging import Logger
 from pathlib import Path
-from typing import List, Optional, TypedDict
+from queue import Empty, SimpleQueue
+from typing import (
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypedDict,
+)
 
-from paramiko import RSAKey, SFTPAttributes, SFTPClient, Transport
+import paramiko
+from paramiko import (
+    AuthenticationException,
+    SFTPAttributes,
+    SFTPClient,
+    SFTPFile,
+    Transport,
+)
+from paramiko.common import DEFAULT_MAX_PACKET_SIZE, DEFAULT_WINDOW_SIZE
+from paramiko.sftp import CMD_FSETSTAT, CMD_REMOVE
 from tenacity import (
     before_sleep_log,
     retry,
@@ -13,14 +37,116 @@ from tenacity import (
     wait_exponential,
 )
 
+from sftp_file_transfer.components.defaults import (
+    DEFAULT_REMOVE_WINDOW,
+    DEFAULT_SEGMENT_CONCURRENCY,
+    DEFAULT_SEGMENT_SIZE,
+)
+from sftp_file_transfer.components.delta_sync import (
+    DEFAULT_DELTA_BLOCK_SIZE,
+    DeltaSync,
+)
+from sftp_file_transfer.components.key_store import KeyStore
 from sftp_file_transfer.components.logger_setup import setup_logger
+from sftp_file_transfer.components.retention import (
+    Retention,
+    RetentionPolicy,
+)
+from sftp_file_transfer.components.transfer_limiter import TransferLimiter
+from sftp_file_transfer.components.transform_pipeline import (
+    TransformOptions,
+    TransformPipeline,
+)
 
 logger: Logger = setup_logger()
 CLIENT_NOT_CONNECTED = 'SFTP client is not connected.'
+MMAP_THRESHOLD = 8 * 1024 * 1024  # 8 MB
+READ_BLOCK_SIZE = 1024 * 1024  # 1 MB
+# Pipelined removals use SFTPClient internals known to these paramiko
+# versions, [low, high). Other versions remove files one at a time.
+PIPELINED_REMOVE_VERSIONS = ((2, 0), (5, 0))
+_PIPELINE_INTERNALS = (
+    '_adjust_cwd',
+    '_async_request',
+    '_convert_status',
+    '_read_response',
+)
+
+_read_buffers = threading.local()
+
+
+class SFTPTransferOptions(TypedDict, total=False):
+    """Optional transfer settings for the SFTP manager.
+
+    Files of at least `segment_threshold` bytes are split into segments of
+    `segment_size` bytes, transferred by `segment_concurrency` connections.
+    Segmented transfers are disabled when no threshold is set.
+
+    With `delta_transfer`, uploads of files that already exist remotely only
+    send the blocks that changed, using signatures of `delta_block_size`.
+    The written blocks are read back to check them, or the whole file with
+    `delta_verify`.
+
+    With `batch_confirm`, batch uploads skip the remote `stat` after each
+    file and check every file of a worker against a single listing of the
+    remote directory instead, see `confirm_uploads`. `confirm_mtime` also
+    stamps each remote copy with the modification time of its local file
+    and requires the listing to show it, so a copy that was not replaced
+    is caught even with the same size, whatever the server clock says.
+    """
+
+    segment_threshold: Optional[int]
+    segment_size: int
+    segment_concurrency: int
+    segment_verify: bool
+    delta_transfer: bool
+    delta_block_size: int
+    delta_verify: bool
+    batch_confirm: bool
+    confirm_mtime: bool
+
+
+class SFTPTransportOptions(TypedDict, total=False):
+    """Optional SSH transport settings for the SFTP manager.
+
+    The `ciphers`, `macs` and `kex` algorithms are offered before paramiko's
+    defaults, which remain as fallbacks during negotiation. `window_size`
+    and `max_packet_size` are advertised for the data the server sends us:
+    larger values keep more of a download in flight on high-bandwidth,
+    high-latency links, but uploads follow the server's window. `keepalive`
+    sends a keepalive packet after this many idle seconds.
+    """
 
+    ciphers: List[str]
+    macs: List[str]
+    kex: List[str]
+    window_size: int
+    max_packet_size: int
+    keepalive: int
 
-class SFTPManagerConfig(TypedDict):
-    """Configuration for the SFTP manager."""
+
+class SFTPAuthOptions(TypedDict, total=False):
+    """Optional authentication settings for the SFTP manager.
+
+    With `use_agent`, the keys of the running ssh-agent are tried before
+    the key file and the password.
+    """
+
+    use_agent: bool
+
+
+class SFTPManagerConfig(
+    SFTPTransferOptions,
+    SFTPTransportOptions,
+    SFTPAuthOptions,
+    TransformOptions,
+):
+    """Configuration for the SFTP manager.
+
+    `key_filepath` may hold an RSA, ECDSA or Ed25519 private key, which is
+    loaded once per process, see `KeyStore`. When `transforms` or
+    `block_hash` are set, uploads go through a `TransformPipeline`.
+    """
 
     sftp_host: str
     sftp_port: int
@@ -30,6 +156,26 @@ class SFTPManagerConfig(TypedDict):
     key_password: Optional[str]
 
 
+class _PipelinedResults:
+    """Collect the status of pipelined requests answered out of band.
+
+    Paramiko hands responses of requests not being waited on to the object
+    registered with the request, through `_async_response`.
+    """
+
+    def __init__(self, sftp: SFTPClient):
+        self.sftp = sftp
+        self.pending: Dict[int, str] = {}
+        self.errors: Dict[str, Exception] = {}
+
+    def _async_response(self, t, msg, num) -> None:
+        path = self.pending.pop(num)
+        try:
+            self.sftp._convert_status(msg)  # noqa: SLF001
+        except IOError as e:
+            self.errors[path] = e
+
+
 class SFTPManager:
     """Manage SFTP operations using Paramiko.
 
@@ -47,6 +193,9 @@ class SFTPManager:
         target (SFTPManagerConfig): A dictionary containing SFTP connection
             parameters including host, port, user, password, key file path,
             and key password.
+        limiter (Optional[TransferLimiter]): The connection slots shared
+            with other transfers, which also bound the extra connections of
+            segmented transfers. Unlimited when not given.
     """
 
     @classmethod
@@ -71,6 +220,7 @@ class SFTPManager:
     def __init__(
         self,
         target: SFTPManagerConfig,
+        limiter: Optional[TransferLimiter] = None,
     ):
         self.check_args(
             sftp_host=target['sftp_host'],
@@ -84,6 +234,39 @@ class SFTPManager:
         self.password = target['sftp_password']
         self.key_filepath = target['key_filepath']
         self.key_password = target['key_password']
+        self.use_agent = target.get('use_agent', False)
+        self.segment_threshold = target.get('segment_threshold')
+        self.segment_size = target.get('segment_size', DEFAULT_SEGMENT_SIZE)
+        self.segment_concurrency = target.get(
+            'segment_concurrency',
+            DEFAULT_SEGMENT_CONCURRENCY,
+        )
+        self.segment_verify = target.get('segment_verify', False)
+        self.delta_transfer = target.get('delta_transfer', False)
+        self.delta_block_size = target.get(
+            'delta_block_size',
+            DEFAULT_DELTA_BLOCK_SIZE,
+        )
+        self.delta_verify = target.get('delta_verify', False)
+        self.ciphers = target.get('ciphers') or []
+        self.macs = target.get('macs') or []
+        self.kex = target.get('kex') or []
+        self.window_size = target.get('window_size', DEFAULT_WINDOW_SIZE)
+        self.max_packet_size = target.get(
+            'max_packet_size',
+            DEFAULT_MAX_PACKET_SIZE,
+        )
+        self.keepalive = target.get('keepalive', 0)
+        self.pipeline = (
+            TransformPipeline.from_options(target)
+            if target.get('transforms') or target.get('block_hash')
+            else None
+        )
+        if self.pipeline is not None and self.delta_transfer:
+            raise ValueError(
+                'Delta transfers cannot be combined with upload transforms.',
+            )
+        self.limiter = limiter or TransferLimiter()
         self._transport: Optional[Transport] = None
         self._sftp: Optional[SFTPClient] = None
 
@@ -112,23 +295,110 @@ class SFTPManager:
 
     def _connect(self) -> None:
         """Establish an SFTP connection."""
-        self._transport = Transport((self.host, self.port))
+        self._transport, self._sftp = self._open_client()
+
+    def _open_client(self) -> Tuple[Transport, SFTPClient]:
+        """Open a new, independent SFTP connection to the target.
+
+        Returns:
+            Tuple[Transport, SFTPClient]: The connected transport and its
+                SFTP client.
+        """
+        transport = Transport(
+            (self.host, self.port),
+            default_window_size=self.window_size,
+            default_max_packet_size=self.max_packet_size,
+        )
+        options = transport.get_security_options()
+        options.ciphers = self.prefer(options.ciphers, self.ciphers)
+        options.digests = self.prefer(options.digests, self.macs)
+        options.kex = self.prefer(options.kex, self.kex)
+        try:
+            self._authenticate(transport)
+        except Exception:
+            transport.close()
+            raise
+        if self.keepalive:
+            transport.set_keepalive(self.keepalive)
+
+        return transport, SFTPClient.from_transport(transport)
+
+    def _authenticate(self, transport: Transport) -> None:
+        """Authenticate with the agent keys, the key file or the password.
+
+        Args:
+            transport (Transport): The transport to authenticate.
+
+        Raises:
+            AuthenticationException: If every method was rejected, or if
+                there is neither a key nor a password to try.
+        """
+        keys = KeyStore.agent_keys() if self.use_agent else []
         if self.key_filepath:
-            private_key = RSAKey.from_private_key_file(
-                self.key_filepath,
-                password=self.key_password,
+            keys.append(KeyStore.load(self.key_filepath, self.key_password))
+        if not keys and not self.password:
+            raise AuthenticationException(
+                'No password, key file or ssh-agent configured.',
             )
-            self._transport.connect(
-                username=self.user,
-                pkey=private_key,
-            )
-        else:
-            self._transport.connect(
-                username=self.user,
-                password=self.password,
+        transport.start_client()
+        error: Optional[Exception] = None
+        for key in keys:
+            try:
+                transport.auth_publickey(self.user, key)
+                return
+            except AuthenticationException as e:
+                error = e
+        if self.password:
+            transport.auth_password(self.user, self.password)
+            return
+        raise error or AuthenticationException('No key was accepted.')
+
+    @staticmethod
+    def prefer(
+        available: Sequence[str],
+        preferred: Sequence[str],
+    ) -> Tuple[str, ...]:
+        """Move the preferred algorithms to the front of the available ones.
+
+        Args:
+            available (Sequence[str]): The algorithms supported, in order.
+            preferred (Sequence[str]): The algorithms to offer first.
+
+        Raises:
+            ValueError: If a preferred algorithm is not supported.
+
+        Returns:
+            Tuple[str, ...]: The algorithms to offer, in order.
+        """
+        unsupported = [name for name in preferred if name not in available]
+        if unsupported:
+            raise ValueError(
+                f'Unsupported SSH algorithms: {", ".join(unsupported)}',
             )
+        return tuple(preferred) + tuple(
+            name for name in available if name not in preferred
+        )
+
+    def is_connected(self) -> bool:
+        """Check whether the SFTP connection is open and usable.
+
+        Returns:
+            bool: True if the transport is active.
+        """
+        return self._transport is not None and self._transport.is_active()
 
-        self._sftp = SFTPClient.from_transport(self._transport)
+    def negotiated_cipher(self) -> Optional[str]:
+        """Get the cipher used to send data on the current connection.
+
+        Returns:
+            Optional[str]: The cipher name, or None if not connected.
+        """
+        return self._transport.local_cipher if self._transport else None
+
+    def reconnect(self) -> None:
+        """Close the SFTP connection, if any, and open a new one."""
+        self.close()
+        self._connect()
 
     def close(self) -> None:
         """Close the SFTP connection."""
@@ -149,24 +419,291 @@ class SFTPManager:
         self,
         local_path: Path,
         remote_path: str,
+        zero_copy: bool = True,
+        confirm: bool = True,
+        preserve_mtime: bool = False,
     ) -> SFTPAttributes:
         """Upload a file to the SFTP server.
 
         Args:
             local_path (Path): The local file path to upload.
             remote_path (str): The remote file path on the SFTP server.
+            zero_copy (bool): Whether to send the file through the
+                memory-mapped reader instead of `SFTPClient.put`.
+                Defaults to True.
+            confirm (bool): Whether to `stat` the remote file to check its
+                size. Delta and segmented uploads are always confirmed.
+                Defaults to True.
+            preserve_mtime (bool): Whether to give the remote file the
+                modification time the local file had before it was sent,
+                in whole seconds. The time is set on the open remote file,
+                pipelined behind the writes, except for segmented, delta and
+                `SFTPClient.put` uploads, which set it once they finish.
+                Defaults to False.
+
+        With upload transforms, the file is sent through the transform
+        pipeline instead, and their suffix is appended to `remote_path`.
+
+        Returns:
+            SFTPAttributes: The attributes of the uploaded remote file, empty
+                if it was not confirmed, like `SFTPClient.put`.
         """
         if not Path(local_path).is_file():
             raise FileNotFoundError(f'Local file {local_path} does not exist.')
         if not self._sftp:
             raise RuntimeError(CLIENT_NOT_CONNECTED)
-        result = self._sftp.put(
-            localpath=str(local_path.resolve()),
-            remotepath=remote_path,
-        )
+        mtime = int(local_path.stat().st_mtime) if preserve_mtime else None
+        if self.pipeline is not None:
+            remote_path += self.pipeline.suffix
+            result = self._put_transformed(
+                local_path,
+                remote_path,
+                confirm,
+                mtime,
+            )
+        elif self.delta_transfer:
+            result = DeltaSync.upload(
+                self._sftp,
+                local_path,
+                remote_path,
+                full_upload=lambda: self._put(
+                    local_path, remote_path, zero_copy
+                ),
+                block_size=self.delta_block_size,
+                verify_all=self.delta_verify,
+            )
+            if mtime is not None:
+                self._sftp.utime(remote_path, (mtime, mtime))
+        else:
+            result = self._put(
+                local_path,
+                remote_path,
+                zero_copy,
+                confirm,
+                mtime,
+            )
         logger.info(f'Uploaded {local_path.absolute()} to {remote_path}.')
         return result
 
+    def _put(  # noqa: PLR0913, PLR0917
+        self,
+        local_path: Path,
+        remote_path: str,
+        zero_copy: bool = True,
+        confirm: bool = True,
+        mtime: Optional[int] = None,
+    ) -> SFTPAttributes:
+        """Send the whole file, in segments when it is large enough.
+
+        Args:
+            local_path (Path): The local file path to upload.
+            remote_path (str): The remote file path on the SFTP server.
+            zero_copy (bool): Whether to use the memory-mapped reader.
+                Defaults to True.
+            confirm (bool): Whether to check the size of the remote file.
+                Segmented uploads are always checked. Defaults to True.
+            mtime (Optional[int]): The modification time given to the
+                remote file, if any.
+
+        Returns:
+            SFTPAttributes: The attributes of the uploaded remote file, empty
+                if it was not confirmed, like `SFTPClient.put`.
+        """
+        segmented = self._should_segment(local_path.stat().st_size)
+        if zero_copy and not segmented:
+            return self._put_zero_copy(local_path, remote_path, confirm, mtime)
+        if segmented:
+            result = self._upload_segmented(local_path, remote_path)
+        else:
+            result = self._sftp.put(
+                localpath=str(local_path.resolve()),
+                remotepath=remote_path,
+                confirm=confirm,
+            )
+        # The segments are written over several handles, and `put` gives no
+        # access to its handle, so the time is set once the file is whole.
+        if mtime is not None:
+            self._sftp.utime(remote_path, (mtime, mtime))
+        return result
+
+    def _put_zero_copy(
+        self,
+        local_path: Path,
+        remote_path: str,
+        confirm: bool = True,
+        mtime: Optional[int] = None,
+    ) -> SFTPAttributes:
+        """Upload a file without copying its content into new bytes objects.
+
+        Files of at least `MMAP_THRESHOLD` bytes are memory-mapped and their
+        slices are written straight into the SFTP write requests. Smaller or
+        non-mappable files are read into a buffer reused by the thread.
+
+        Args:
+            local_path (Path): The local file path to upload.
+            remote_path (str): The remote file path on the SFTP server.
+            confirm (bool): Whether to check the size of the remote file.
+                Defaults to True.
+            mtime (Optional[int]): The modification time given to the
+                remote file, if any.
+
+        Raises:
+            IOError: If the remote size does not match the bytes sent.
+
+        Returns:
+            SFTPAttributes: The attributes of the uploaded remote file, empty
+                if it was not confirmed, like `SFTPClient.put`.
+        """
+        with (
+            open(local_path, 'rb') as local_file,
+            self._sftp.open(remote_path, 'wb', bufsize=0) as remote_file,
+        ):
+            remote_file.set_pipelined(True)
+            size = self._write_mapped(local_file, remote_file)
+            if size is None:
+                size = self._write_buffered(local_file, remote_file)
+            self._set_mtime(remote_file, mtime)
+
+        if not confirm:
+            return SFTPAttributes()
+        result = self._sftp.stat(remote_path)
+        if result.st_size != size:
+            raise IOError(
+                f'Size mismatch in upload: {result.st_size} != {size}',
+            )
+        return result
+
+    def _put_transformed(
+        self,
+        local_path: Path,
+        remote_path: str,
+        confirm: bool = True,
+        mtime: Optional[int] = None,
+    ) -> SFTPAttributes:
+        """Upload a file through the transform pipeline.
+
+        Blocks are transformed by the pipeline's pool while the transformed
+        blocks already handed back are written to the remote file.
+
+        Args:
+            local_path (Path): The local file path to upload.
+            remote_path (str): The remote file path on the SFTP server.
+            confirm (bool): Whether to check the size of the remote file.
+                Defaults to True.
+
+        Raises:
+            IOError: If the remote size does not match the bytes sent.
+
+        Returns:
+            SFTPAttributes: The attributes of the uploaded remote file, empty
+                if it was not confirmed, like `SFTPClient.put`.
+        """
+        size = 0
+        with (
+            open(local_path, 'rb') as local_file,
+            self._sftp.open(remote_path, 'wb', bufsize=0) as remote_file,
+        ):
+            remote_file.set_pipelined(True)
+            for block in self.pipeline.run(local_file):
+                remote_file.write(block)
+                size += len(block)
+            self._set_mtime(remote_file, mtime)
+
+        digest = self.pipeline.digest()
+        if digest is not None:
+            logger.info(
+                f'{self.pipeline.block_hash} digest of the blocks of '
+                f'{local_path}: {digest}.',
+            )
+        if not confirm:
+            return SFTPAttributes()
+        result = self._sftp.stat(remote_path)
+        if result.st_size != size:
+            raise IOError(
+                f'Size mismatch in transformed upload: {result.st_size} != '
+                f'{size}',
+            )
+        return result
+
+    @staticmethod
+    def _set_mtime(remote_file: SFTPFile, mtime: Optional[int]) -> None:
+        """Set the modification time of a remote file behind its writes.
+
+        The `fsetstat` request is pipelined like the writes of the open
+        file, instead of waited for, and its status is checked when the
+        file is closed.
+
+        Args:
+            remote_file (SFTPFile): The open, pipelined remote file.
+            mtime (Optional[int]): The modification time, or None to leave
+                the file as is.
+        """
+        if mtime is None:
+            return
+        attributes = SFTPAttributes()
+        attributes.st_atime = attributes.st_mtime = mtime
+        remote_file.sftp._async_request(  # noqa: SLF001
+            remote_file,
+            CMD_FSETSTAT,
+            remote_file.handle,
+            attributes,
+        )
+
+    @staticmethod
+    def _write_mapped(local_file, remote_file) -> Optional[int]:
+        """Write a memory-mapped local file into a remote file.
+
+        Args:
+            local_file (BinaryIO): The open local file.
+            remote_file (SFTPFile): The open remote file.
+
+        Returns:
+            Optional[int]: The number of bytes written, or None if the file is
+                too small or cannot be memory-mapped.
+        """
+        size = os.fstat(local_file.fileno()).st_size
+        if size < MMAP_THRESHOLD:
+            return None
+        try:
+            mapped = mmap.mmap(
+                local_file.fileno(),
+                0,
+                access=mmap.ACCESS_READ,
+            )
+        except (OSError, ValueError):
+            return None
+        # Pages already sent are dropped so large files do not inflate RSS.
+        release = getattr(mmap, 'MADV_DONTNEED', None)
+        with mapped, memoryview(mapped) as view:
+            if hasattr(mmap, 'MADV_SEQUENTIAL'):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            for offset in range(0, size, READ_BLOCK_SIZE):
+                remote_file.write(view[offset : offset + READ_BLOCK_SIZE])
+                if release is not None:
+                    mapped.madvise(release, offset, READ_BLOCK_SIZE)
+        return size
+
+    @staticmethod
+    def _write_buffered(local_file, remote_file) -> int:
+        """Write a local file into a remote file through a reused buffer.
+
+        Args:
+            local_file (BinaryIO): The open local file.
+            remote_file (SFTPFile): The open remote file.
+
+        Returns:
+            int: The number of bytes written.
+        """
+        buffer = getattr(_read_buffers, 'buffer', None)
+        if buffer is None:
+            buffer = _read_buffers.buffer = bytearray(READ_BLOCK_SIZE)
+        size = 0
+        with memoryview(buffer) as view:
+            while count := local_file.readinto(buffer):
+                remote_file.write(view[:count])
+                size += count
+        return size
+
     @retry(
         wait=wait_exponential(multiplier=1, min=4, max=10),
         stop=stop_after_attempt(5),
@@ -184,9 +721,259 @@ class SFTPManager:
         """
         if not self._sftp:
             raise RuntimeError(CLIENT_NOT_CONNECTED)
-        self._sftp.get(remote_path, local_path)
+        if self.segment_threshold is not None and self._should_segment(
+            self._sftp.stat(remote_path).st_size,
+        ):
+            self._download_segmented(remote_path, Path(local_path))
+        else:
+            self._sftp.get(remote_path, local_path)
         logger.info(f'Downloaded {remote_path} to {local_path}.')
 
+    @staticmethod
+    def split_segments(size: int, segment_size: int) -> List[Tuple[int, int]]:
+        """Split a file size into contiguous byte ranges.
+
+        Args:
+            size (int): The total size in bytes.
+            segment_size (int): The maximum size of each range.
+
+        Raises:
+            ValueError: If the segment size is not positive.
+
+        Returns:
+            List[Tuple[int, int]]: The (offset, length) of each range.
+        """
+        if segment_size <= 0:
+            raise ValueError('The segment size must be positive.')
+        return [
+            (offset, min(segment_size, size - offset))
+            for offset in range(0, size, segment_size)
+        ]
+
+    def _should_segment(self, size: int) -> bool:
+        """Check whether a file of the given size is transferred in segments.
+
+        Args:
+            size (int): The file size in bytes.
+
+        Returns:
+            bool: True if segmented transfers are enabled, the file reaches
+                the threshold and spans more than one segment.
+        """
+        return (
+            self.segment_threshold is not None
+            and size >= self.segment_threshold
+            and size > self.segment_size
+            and self.segment_concurrency > 1
+        )
+
+    def _run_segments(self, segments: List[Tuple[int, int]], worker) -> None:
+        """Run a segment worker over concurrent connections.
+
+        The first worker reuses the manager's connection, the others open
+        their own, as long as the limiter has free connection slots.
+        Workers pull segments from a shared queue until it is empty. A
+        failing worker empties the queue, so the others stop after their
+        current segment.
+
+        Args:
+            segments (List[Tuple[int, int]]): The (offset, length) ranges.
+            worker (Callable[[SFTPClient, SimpleQueue], None]): The function
+                that transfers queued segments over the given client.
+
+        Raises:
+            Exception: The first error raised by a worker, after every
+                worker has finished.
+        """
+        queue: SimpleQueue = SimpleQueue()
+        for segment in segments:
+            queue.put(segment)
+
+        def work(index: int) -> None:
+            if index == 0:
+                worker(self._sftp, queue)
+                return
+            transport, sftp = self._open_client()
+            try:
+                worker(sftp, queue)
+            finally:
+                sftp.close()
+                transport.close()
+
+        def run(index: int) -> None:
+            try:
+                work(index)
+            except Exception:
+                for _ in self._drain(queue):
+                    pass
+                raise
+
+        wanted = min(self.segment_concurrency, len(segments))
+        with self.limiter.extra_connections(wanted - 1) as extra:
+            if extra < wanted - 1:
+                logger.info(
+                    f'Only {extra} of {wanted - 1} extra segment '
+                    'connections are free.',
+                )
+            workers = 1 + extra
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(run, i) for i in range(workers)]
+        errors = [f.exception() for f in futures if f.exception()]
+        if errors:
+            raise errors[0]
+
+    def _upload_segmented(
+        self,
+        local_path: Path,
+        remote_path: str,
+    ) -> SFTPAttributes:
+        """Upload a file as byte ranges written concurrently at their offsets.
+
+        Args:
+            local_path (Path): The local file path to upload.
+            remote_path (str): The remote file path on the SFTP server.
+
+        Raises:
+            IOError: If the assembled remote file does not match the local
+                file.
+
+        Returns:
+            SFTPAttributes: The attributes of the uploaded remote file.
+        """
+        size = local_path.stat().st_size
+        segments = self.split_segments(size, self.segment_size)
+        logger.info(
+            f'Uploading {local_path} in {len(segments)} segments over '
+            f'{min(self.segment_concurrency, len(segments))} connections.',
+        )
+        with self._sftp.open(remote_path, 'wb'):
+            pass
+
+        def worker(sftp: SFTPClient, queue: SimpleQueue) -> None:
+            with (
+                sftp.open(remote_path, 'r+b', bufsize=0) as remote_file,
+                open(local_path, 'rb') as local_file,
+                mmap.mmap(
+                    local_file.fileno(), 0, access=mmap.ACCESS_READ
+                ) as mapped,
+                memoryview(mapped) as view,
+            ):
+                remote_file.set_pipelined(True)
+                for offset, length in self._drain(queue):
+                    remote_file.seek(offset)
+                    for start, block in self._split_range(offset, length):
+                        remote_file.write(view[start : start + block])
+
+        self._run_segments(segments, worker)
+        if self.segment_verify:
+            self._verify_segments(segments, remote_path, local_path)
+
+        result = self._sftp.stat(remote_path)
+        if result.st_size != size:
+            raise IOError(
+                f'Size mismatch in segmented upload: {result.st_size} != '
+                f'{size}',
+            )
+        return result
+
+    def _download_segmented(self, remote_path: str, local_path: Path) -> None:
+        """Download a file as byte ranges read concurrently at their offsets.
+
+        Args:
+            remote_path (str): The remote file path on the SFTP server.
+            local_path (Path): The local file path to save the downloaded file.
+
+        Raises:
+            IOError: If the assembled local file does not match the remote
+                file.
+        """
+        size = self._sftp.stat(remote_path).st_size
+        segments = self.split_segments(size, self.segment_size)
+        logger.info(
+            f'Downloading {remote_path} in {len(segments)} segments over '
+            f'{min(self.segment_concurrency, len(segments))} connections.',
+        )
+        with open(local_path, 'wb') as local_file:
+            local_file.truncate(size)
+
+        def worker(sftp: SFTPClient, queue: SimpleQueue) -> None:
+            with (
+                sftp.open(remote_path, 'rb') as remote_file,
+                open(local_path, 'r+b') as local_file,
+            ):
+                for offset, length in self._drain(queue):
+                    local_file.seek(offset)
+                    blocks = self._split_range(offset, length)
+                    for data in remote_file.readv(blocks):
+                        local_file.write(data)
+
+        self._run_segments(segments, worker)
+        if self.segment_verify:
+            self._verify_segments(segments, remote_path, local_path)
+
+        if local_path.stat().st_size != size:
+            raise IOError(
+                f'Size mismatch in segmented download: '
+                f'{local_path.stat().st_size} != {size}',
+            )
+
+    def _verify_segments(
+        self,
+        segments: List[Tuple[int, int]],
+        remote_path: str,
+        local_path: Path,
+    ) -> None:
+        """Compare each remote byte range with the local file, concurrently.
+
+        Args:
+            segments (List[Tuple[int, int]]): The (offset, length) ranges.
+            remote_path (str): The remote file path on the SFTP server.
+            local_path (Path): The local file path.
+
+        Raises:
+            IOError: If a remote range differs from the local one.
+        """
+
+        def worker(sftp: SFTPClient, queue: SimpleQueue) -> None:
+            with (
+                sftp.open(remote_path, 'rb') as remote_file,
+                open(local_path, 'rb') as local_file,
+            ):
+                for offset, length in self._drain(queue):
+                    remote_hash = hashlib.sha256()
+                    blocks = self._split_range(offset, length)
+                    for data in remote_file.readv(blocks):
+                        remote_hash.update(data)
+                    local_hash = hashlib.sha256()
+                    local_file.seek(offset)
+                    for _, block in blocks:
+                        local_hash.update(local_file.read(block))
+                    if remote_hash.digest() != local_hash.digest():
+                        raise IOError(
+                            f'Segment at offset {offset} of {remote_path} '
+                            'does not match after transfer.',
+                        )
+
+        self._run_segments(segments, worker)
+        logger.info(f'Verified {len(segments)} segments of {remote_path}.')
+
+    @classmethod
+    def _split_range(cls, offset: int, length: int) -> List[Tuple[int, int]]:
+        """Split a byte range into blocks of at most `READ_BLOCK_SIZE`."""
+        return [
+            (offset + start, block)
+            for start, block in cls.split_segments(length, READ_BLOCK_SIZE)
+        ]
+
+    @staticmethod
+    def _drain(queue: SimpleQueue):
+        """Yield items from a queue shared by workers until it is empty."""
+        while True:
+            try:
+                yield queue.get_nowait()
+            except Empty:
+                return
+
     def list_files(self, remote_path: str) -> List[Path]:
         """List files in a remote directory.
 
@@ -205,18 +992,71 @@ class SFTPManager:
         logger.info(f'Listing files in {remote_path}.')
         return [Path(file) for file in self._sftp.listdir(remote_path)]
 
-    def make_directory(self, remote_path: str) -> None:
+    def confirm_uploads(
+        self,
+        remote_path: str,
+        expected: Dict[str, Tuple[int, Optional[float]]],
+    ) -> List[str]:
+        """Check uploaded files against one listing of their directory.
+
+        This replaces a `stat` round trip per file with a single attribute
+        listing of the remote directory.
+
+        Args:
+            remote_path (str): The remote directory holding the files.
+            expected (Dict[str, Tuple[int, Optional[float]]]): The name of
+                each file with its expected size and, if given, the
+                modification time set on the remote copy by `upload_file`
+                with `preserve_mtime`.
+
+        Raises:
+            RuntimeError: If the SFTP client is not connected.
+
+        Returns:
+            List[str]: The names of the files missing or not matching,
+                in the order of `expected`.
+        """
+        confirmed = set()
+        for entry in self.iter_attributes(remote_path):
+            if entry.filename not in expected:
+                continue
+            size, mtime = expected[entry.filename]
+            if entry.st_size == size and (
+                mtime is None or entry.st_mtime == int(mtime)
+            ):
+                confirmed.add(entry.filename)
+        mismatches = [name for name in expected if name not in confirmed]
+        logger.info(
+            f'Confirmed {len(confirmed)} of {len(expected)} uploads in '
+            f'{remote_path}.',
+        )
+        return mismatches
+
+    def make_directory(
+        self,
+        remote_path: str,
+        exist_ok: bool = False,
+    ) -> None:
         """Create a directory on the SFTP server.
 
         Args:
             remote_path (str): The remote directory path to create.
+            exist_ok (bool): Whether an existing directory is accepted.
 
         Raises:
             RuntimeError: If the SFTP client is not connected.
+            OSError: If the directory cannot be created.
         """
         if not self._sftp:
             raise RuntimeError(CLIENT_NOT_CONNECTED)
-        self._sftp.mkdir(remote_path)
+        try:
+            self._sftp.mkdir(remote_path)
+        except OSError:
+            if not exist_ok or not stat.S_ISDIR(
+                self._sftp.stat(remote_path).st_mode or 0,
+            ):
+                raise
+            return
         logger.info(f'Created directory {remote_path} on SFTP server.')
 
     def remove_directory(self, remote_path: str) -> None:
@@ -232,3 +1072,144 @@ class SFTPManager:
             raise RuntimeError(CLIENT_NOT_CONNECTED)
         self._sftp.rmdir(remote_path)
         logger.info(f'Removed directory {remote_path} from SFTP server.')
+
+    def remove_file(self, remote_path: str) -> None:
+        """Remove a file on the SFTP server.
+
+        Args:
+            remote_path (str): The remote file path to remove.
+
+        Raises:
+            RuntimeError: If the SFTP client is not connected.
+        """
+        if not self._sftp:
+            raise RuntimeError(CLIENT_NOT_CONNECTED)
+        self._sftp.remove(remote_path)
+        logger.info(f'Removed file {remote_path} from SFTP server.')
+
+    def remove_files(
+        self,
+        remote_paths: List[str],
+        window: int = DEFAULT_REMOVE_WINDOW,
+    ) -> Dict[str, Exception]:
+        """Remove many files, keeping up to `window` removals in flight.
+
+        Requests are pipelined on the connection instead of waiting for a
+        round trip per file, when the installed paramiko is one of the
+        `PIPELINED_REMOVE_VERSIONS`. Otherwise they go one at a time through
+        `SFTPClient.remove`. Failures do not stop the other removals.
+
+        Args:
+            remote_paths (List[str]): The remote file paths to remove.
+            window (int): The maximum number of outstanding removals.
+                Defaults to DEFAULT_REMOVE_WINDOW.
+
+        Raises:
+            RuntimeError: If the SFTP client is not connected.
+
+        Returns:
+            Dict[str, Exception]: The error of each path that failed.
+        """
+        if not self._sftp:
+            raise RuntimeError(CLIENT_NOT_CONNECTED)
+        if self._can_pipeline():
+            errors = self._remove_pipelined(remote_paths, window)
+        else:
+            errors = {}
+            for remote_path in remote_paths:
+                try:
+                    self._sftp.remove(remote_path)
+                except IOError as e:
+                    errors[remote_path] = e
+
+        for remote_path, error in errors.items():
+            logger.error(f'Could not remove {remote_path}: {error}')
+        logger.info(
+            f'Removed {len(remote_paths) - len(errors)} of '
+            f'{len(remote_paths)} files from SFTP server.',
+        )
+        return errors
+
+    def _can_pipeline(self) -> bool:
+        """Check whether the SFTP client internals allow pipelining."""
+        low, high = PIPELINED_REMOVE_VERSIONS
+        return low <= paramiko.__version_info__[:2] < high and all(
+            hasattr(self._sftp, name) for name in _PIPELINE_INTERNALS
+        )
+
+    def _remove_pipelined(
+        self,
+        remote_paths: List[str],
+        window: int,
+    ) -> Dict[str, Exception]:
+        """Send removals without waiting, reading responses as they come.
+
+        Args:
+            remote_paths (List[str]): The remote file paths to remove.
+            window (int): The maximum number of outstanding removals.
+
+        Returns:
+            Dict[str, Exception]: The error of each path that failed.
+        """
+        results = _PipelinedResults(self._sftp)
+        for remote_path in remote_paths:
+            while len(results.pending) >= window:
+                self._sftp._read_response()  # noqa: SLF001
+            num = self._sftp._async_request(  # noqa: SLF001
+                results,
+                CMD_REMOVE,
+                self._sftp._adjust_cwd(remote_path),  # noqa: SLF001
+            )
+            results.pending[num] = remote_path
+        while results.pending:
+            self._sftp._read_response()  # noqa: SLF001
+        return results.errors
+
+    def iter_attributes(self, remote_path: str) -> Iterator[SFTPAttributes]:
+        """Stream the entries of a remote directory with their attributes.
+
+        Args:
+            remote_path (str): The remote directory path.
+
+        Raises:
+            RuntimeError: If the SFTP client is not connected.
+
+        Returns:
+            Iterator[SFTPAttributes]: The directory entries.
+        """
+        if not self._sftp:
+            raise RuntimeError(CLIENT_NOT_CONNECTED)
+        logger.info(f'Listing attributes in {remote_path}.')
+        return self._sftp.listdir_iter(remote_path)
+
+    def prune(
+        self,
+        remote_path: str,
+        policy: RetentionPolicy,
+        dry_run: bool = False,
+        window: int = DEFAULT_REMOVE_WINDOW,
+    ) -> List[str]:
+        """Remove the files of a remote directory that break a policy.
+
+        Args:
+            remote_path (str): The remote directory path.
+            policy (RetentionPolicy): The retention rules.
+            dry_run (bool): Only report the files that would be removed.
+                Defaults to False.
+            window (int): The maximum number of outstanding removals.
+                Defaults to DEFAULT_REMOVE_WINDOW.
+
+        Returns:
+            List[str]: The remote paths removed, or that would be removed.
+        """
+        selected = Retention.select_for_removal(
+            self.iter_attributes(remote_path),
+            policy,
+        )
+        paths = [f'{remote_path}/{entry.filename}' for entry in selected]
+        if dry_run:
+            for path in paths:
+                logger.info(f'Would remove {path}.')
+            return paths
+        errors = self.remove_files(paths, window)
+        return [path for path in paths if path not in errors]
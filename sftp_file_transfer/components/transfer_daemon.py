@@ -0,0 +1,285 @@
+import itertools
+import json
+import os
+import socket
+import socketserver
+import threading
+from logging import Logger
+from pathlib import Path
+from queue import SimpleQueue
+from typing import Any, Dict, List, Optional, TypedDict, Union
+
+from sftp_file_transfer.components.file_manager import FileManager
+from sftp_file_transfer.components.logger_setup import setup_logger
+from sftp_file_transfer.components.sftp_manager import (
+    SFTPManager,
+    SFTPManagerConfig,
+)
+from sftp_file_transfer.components.transfer_planner import (
+    PlannedFile,
+    TransferPlanner,
+)
+
+logger: Logger = setup_logger()
+
+MAX_JOB_HISTORY = 1000
+
+
+class JobRequest(TypedDict, total=False):
+    """A transfer job submitted to the daemon.
+
+    Attributes:
+        local_paths (List[str]): The local directories to send files from.
+        remote_path (str): The remote directory the files are sent to.
+        file_extension (Optional[str]): Only send files with this extension.
+        t_delta (Optional[int]): Only send files modified this many days ago.
+        schedule (str): The order in which files are sent.
+    """
+
+    local_paths: List[str]
+    remote_path: str
+    file_extension: Optional[str]
+    t_delta: Optional[int]
+    schedule: str
+
+
+class JobStatus(TypedDict):
+    """The progress of a job known to the daemon."""
+
+    job_id: int
+    state: str
+    total: int
+    completed: int
+    errors: Dict[str, str]
+
+
+class _Job:
+    """Track the completion of the files of a submitted job."""
+
+    def __init__(self, job_id: int, remote_path: str, total: int):
+        self.remote_path = remote_path
+        self.status = JobStatus(
+            job_id=job_id,
+            state='running' if total else 'done',
+            total=total,
+            completed=0,
+            errors={},
+        )
+        self.done = threading.Event()
+        if not total:
+            self.done.set()
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> JobStatus:
+        with self._lock:
+            status = JobStatus(**self.status)
+            status['errors'] = dict(self.status['errors'])
+            return status
+
+    def complete(self, path: Path, error: Optional[Exception]) -> None:
+        with self._lock:
+            self.status['completed'] += 1
+            if error is not None:
+                self.status['errors'][str(path)] = str(error)
+            if self.status['completed'] == self.status['total']:
+                self.status['state'] = (
+                    'failed' if self.status['errors'] else 'done'
+                )
+                self.done.set()
+
+
+class TransferDaemon:
+    """Keep warm SFTP connections and run jobs submitted over a socket.
+
+    Each worker thread holds its own connection, opened when the daemon
+    starts and reopened if it drops, and pulls files from a queue shared
+    by every job. Jobs are submitted as JSON lines on a Unix domain socket,
+    see `daemon_client.send_request`.
+
+    The warm connections are bounded by `workers` alone. The scheduler's
+    `MAX_CONNECTIONS` does not apply, as the daemon runs in its own process.
+
+    Parameters:
+        config (SFTPManagerConfig): The connection parameters.
+        socket_path (Union[str, Path]): The Unix domain socket to listen on.
+        workers (int): The number of warm connections. Defaults to 4.
+    """
+
+    def __init__(
+        self,
+        config: SFTPManagerConfig,
+        socket_path: Union[str, Path],
+        workers: int = 4,
+    ):
+        if not hasattr(socket, 'AF_UNIX'):
+            raise RuntimeError('Unix domain sockets are not supported here.')
+        self.config = config
+        self.socket_path = Path(socket_path)
+        self.workers = workers
+        self._tasks: SimpleQueue = SimpleQueue()
+        self._jobs: Dict[int, _Job] = {}
+        self._jobs_lock = threading.Lock()
+        self._job_ids = itertools.count(1)
+        self._server: Optional[socketserver.UnixStreamServer] = None
+
+    def serve_forever(self) -> None:
+        """Start the workers and answer requests until shut down.
+
+        The manager of every worker is built before any worker starts, so
+        an invalid configuration is raised here instead of stopping the
+        workers and leaving jobs waiting.
+
+        Raises:
+            ValueError: If the configuration is invalid.
+        """
+        managers = [SFTPManager(self.config) for _ in range(self.workers)]
+        for index, manager in enumerate(managers):
+            threading.Thread(
+                target=self._work,
+                args=(manager,),
+                name=f'transfer-worker-{index}',
+                daemon=True,
+            ).start()
+
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        if self.socket_path.exists():
+            self.socket_path.unlink()
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self) -> None:
+                for line in self.rfile:
+                    try:
+                        response = daemon.handle(json.loads(line))
+                    except Exception as e:
+                        logger.error(f'Daemon request failed: {e}')
+                        response = {'error': str(e)}
+                    self.wfile.write(json.dumps(response).encode() + b'\n')
+                    self.wfile.flush()
+
+        self._server = socketserver.ThreadingUnixStreamServer(
+            str(self.socket_path),
+            Handler,
+        )
+        self._server.daemon_threads = True
+        os.chmod(self.socket_path, 0o600)
+        logger.info(f'Transfer daemon listening on {self.socket_path}.')
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            for _ in range(self.workers):
+                self._tasks.put(None)
+            if self.socket_path.exists():
+                self.socket_path.unlink()
+            logger.info('Transfer daemon stopped.')
+
+    def shutdown(self) -> None:
+        """Stop answering requests, from another thread."""
+        if self._server is not None:
+            threading.Thread(target=self._server.shutdown).start()
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Answer a single request.
+
+        Supported actions are `ping`, `submit` (optionally with `wait`),
+        `status` and `shutdown`.
+
+        Args:
+            request (Dict[str, Any]): The decoded request.
+
+        Raises:
+            ValueError: If the action or job is unknown.
+
+        Returns:
+            Dict[str, Any]: The response.
+        """
+        action = request.get('action')
+        if action == 'ping':
+            return {'ok': True}
+        if action == 'submit':
+            job = self.submit(request['job'])
+            if request.get('wait'):
+                job.done.wait()
+            return job.snapshot()
+        if action == 'status':
+            with self._jobs_lock:
+                job = self._jobs.get(request.get('job_id'))
+            if job is None:
+                raise ValueError(f'Unknown job: {request.get("job_id")}')
+            return job.snapshot()
+        if action == 'shutdown':
+            self.shutdown()
+            return {'ok': True}
+        raise ValueError(f'Unknown action: {action}')
+
+    def submit(self, request: JobRequest) -> _Job:
+        """Select the files of a job and queue them for the workers.
+
+        Args:
+            request (JobRequest): The job to run.
+
+        Returns:
+            _Job: The job, tracking its progress.
+        """
+        entries = TransferPlanner.order_files(
+            FileManager.select_files(
+                request['local_paths'],
+                request.get('file_extension'),
+                request.get('t_delta'),
+            ),
+            request.get('schedule', 'none'),
+        )
+        job = _Job(next(self._job_ids), request['remote_path'], len(entries))
+        with self._jobs_lock:
+            self._jobs[job.status['job_id']] = job
+            while len(self._jobs) > MAX_JOB_HISTORY:
+                del self._jobs[next(iter(self._jobs))]
+        for entry in entries:
+            self._tasks.put((job, entry))
+        logger.info(
+            f'Queued job {job.status["job_id"]} with {len(entries)} files.',
+        )
+        return job
+
+    def _work(self, manager: SFTPManager) -> None:
+        """Upload queued files over a connection kept open between jobs."""
+        try:
+            manager.reconnect()
+        except Exception as e:
+            logger.error(f'Could not open a warm connection: {e}')
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                manager.close()
+                return
+            job, entry = task
+            job.complete(entry['path'], self._upload(manager, job, entry))
+
+    @staticmethod
+    def _upload(
+        manager: SFTPManager,
+        job: _Job,
+        entry: PlannedFile,
+    ) -> Optional[Exception]:
+        """Upload a file, reconnecting once if the connection dropped.
+
+        Returns:
+            Optional[Exception]: The error that made the upload fail, if any.
+        """
+        error: Optional[Exception] = None
+        for _ in range(2):
+            try:
+                if not manager.is_connected():
+                    manager.reconnect()
+                manager.upload_file(
+                    local_path=entry['path'],
+                    remote_path=f'{job.remote_path}/{entry["path"].name}',
+                )
+                return None
+            except Exception as e:
+                logger.error(f'Daemon upload of {entry["path"]} failed: {e}')
+                error = e
+                if manager.is_connected():
+                    break
+        return error
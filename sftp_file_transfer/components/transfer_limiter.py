@@ -0,0 +1,100 @@
+import threading
+from contextlib import contextmanager
+from logging import Logger
+from typing import Iterator, Optional
+
+from sftp_file_transfer.components.logger_setup import setup_logger
+
+logger: Logger = setup_logger()
+
+
+class TransferLimiter:
+    """Cap the connections and bytes in flight shared by concurrent jobs.
+
+    Every upload worker holds a connection slot while it sends its files,
+    and every file holds its size from the byte budget while it is sent.
+    A file larger than the whole budget waits until nothing else is in
+    flight, then takes the whole budget, so it cannot wait forever.
+
+    Parameters:
+        max_connections (Optional[int]): The maximum number of workers
+            sending at the same time. Unlimited when not given.
+        max_bytes_in_flight (Optional[int]): The maximum number of bytes of
+            the files being sent at the same time. Unlimited when not given.
+    """
+
+    def __init__(
+        self,
+        max_connections: Optional[int] = None,
+        max_bytes_in_flight: Optional[int] = None,
+    ):
+        if max_connections is not None and max_connections < 1:
+            raise ValueError('The connection limit must be at least 1.')
+        if max_bytes_in_flight is not None and max_bytes_in_flight < 1:
+            raise ValueError('The byte limit must be at least 1.')
+        self.max_connections = max_connections
+        self.max_bytes_in_flight = max_bytes_in_flight
+        self._connections = (
+            threading.BoundedSemaphore(max_connections)
+            if max_connections
+            else None
+        )
+        self._bytes = 0
+        self._bytes_changed = threading.Condition()
+
+    @contextmanager
+    def connection(self) -> Iterator[None]:
+        """Hold a connection slot, waiting for one to be free."""
+        if self._connections is None:
+            yield
+            return
+        with self._connections:
+            yield
+
+    @contextmanager
+    def extra_connections(self, wanted: int) -> Iterator[int]:
+        """Hold up to `wanted` more connection slots, without waiting.
+
+        A worker already holding a slot takes only the slots that are free,
+        so it never waits on a slot it would have to release itself.
+
+        Args:
+            wanted (int): The number of extra connections wanted.
+
+        Yields:
+            int: The number of slots held, from 0 to `wanted`.
+        """
+        if self._connections is None:
+            yield wanted
+            return
+        held = 0
+        while held < wanted and self._connections.acquire(blocking=False):
+            held += 1
+        try:
+            yield held
+        finally:
+            for _ in range(held):
+                self._connections.release()
+
+    @contextmanager
+    def bytes_in_flight(self, size: int) -> Iterator[None]:
+        """Hold part of the byte budget while a file is sent.
+
+        Args:
+            size (int): The size of the file being sent.
+        """
+        if self.max_bytes_in_flight is None:
+            yield
+            return
+        size = min(size, self.max_bytes_in_flight)
+        with self._bytes_changed:
+            self._bytes_changed.wait_for(
+                lambda: self._bytes + size <= self.max_bytes_in_flight,
+            )
+            self._bytes += size
+        try:
+            yield
+        finally:
+            with self._bytes_changed:
+                self._bytes -= size
+                self._bytes_changed.notify_all()
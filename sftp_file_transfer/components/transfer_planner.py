@@ -0,0 +1,175 @@
+import heapq
+from logging import Logger
+from pathlib import Path
+from typing import List, TypedDict
+
+from sftp_file_transfer.components.logger_setup import setup_logger
+
+logger: Logger = setup_logger()
+
+SCHEDULES = ('none', 'largest', 'smallest', 'newest', 'oldest')
+
+
+class _PlannedFileAttributes(TypedDict):
+    path: Path
+    size: int
+    mtime: float
+
+
+class PlannedFile(_PlannedFileAttributes, total=False):
+    """A local file with the attributes used for transfer planning.
+
+    When set, `remote_dir` replaces the remote directory of the batch for
+    this file and `remote_name` replaces its name on the remote side.
+    """
+
+    remote_dir: str
+    remote_name: str
+
+
+class TransferPlanner:
+    """Plan the order and worker assignment of a batch of uploads.
+
+    Each file is stat'ed exactly once. The resulting entries are ordered
+    according to a schedule and then assigned greedily to the least loaded
+    worker, so a `largest` schedule yields a longest-processing-time-first
+    packing that keeps a single huge file from running alone at the end of
+    the batch.
+    """
+
+    @staticmethod
+    def stat_files(files: List[Path]) -> List[PlannedFile]:
+        """Collect size and modification time for each file.
+
+        Args:
+            files (List[Path]): List of file paths to stat.
+
+        Returns:
+            List[PlannedFile]: The planned entries, in the same order.
+        """
+        entries: List[PlannedFile] = []
+        for file in files:
+            stat = file.stat()
+            entries.append(
+                PlannedFile(path=file, size=stat.st_size, mtime=stat.st_mtime)
+            )
+        return entries
+
+    @staticmethod
+    def order_files(
+        entries: List[PlannedFile],
+        schedule: str = 'none',
+    ) -> List[PlannedFile]:
+        """Order planned entries according to a schedule.
+
+        Args:
+            entries (List[PlannedFile]): The entries to order.
+            schedule (str): One of `SCHEDULES`. `none` keeps the given order,
+                `largest`/`smallest` order by size and `newest`/`oldest`
+                order by modification time.
+
+        Raises:
+            ValueError: If the schedule is unknown.
+
+        Returns:
+            List[PlannedFile]: The ordered entries.
+        """
+        if schedule not in SCHEDULES:
+            raise ValueError(
+                f'Invalid schedule: {schedule}. '
+                f'Expected one of {", ".join(SCHEDULES)}.',
+            )
+        if schedule == 'none':
+            return list(entries)
+        key = 'size' if schedule in {'largest', 'smallest'} else 'mtime'
+        reverse = schedule in {'largest', 'newest'}
+        return sorted(entries, key=lambda e: e[key], reverse=reverse)
+
+    @staticmethod
+    def assign_workers(
+        entries: List[PlannedFile],
+        workers: int = 1,
+    ) -> List[List[PlannedFile]]:
+        """Assign ordered entries to workers, balancing the bytes per worker.
+
+        Entries are taken in order and each one goes to the worker with the
+        fewest bytes assigned so far, so the relative order of the entries is
+        preserved within each worker.
+
+        Args:
+            entries (List[PlannedFile]): The ordered entries.
+            workers (int): The number of workers. Defaults to 1.
+
+        Raises:
+            ValueError: If the number of workers is lower than 1.
+
+        Returns:
+            List[List[PlannedFile]]: One list of entries per worker.
+        """
+        if workers < 1:
+            raise ValueError('The number of workers must be at least 1.')
+        bins: List[List[PlannedFile]] = [[] for _ in range(workers)]
+        loads = [(0, index) for index in range(workers)]
+        for entry in entries:
+            load, index = heapq.heappop(loads)
+            bins[index].append(entry)
+            heapq.heappush(loads, (load + entry['size'], index))
+        return bins
+
+    @classmethod
+    def plan(
+        cls,
+        files: List[Path],
+        schedule: str = 'none',
+        workers: int = 1,
+    ) -> List[List[PlannedFile]]:
+        """Stat, order and assign a batch of files to workers.
+
+        Args:
+            files (List[Path]): The files to transfer.
+            schedule (str): The schedule used to order the files.
+                Defaults to 'none'.
+            workers (int): The number of workers. Defaults to 1.
+
+        Returns:
+            List[List[PlannedFile]]: One list of entries per worker.
+        """
+        return cls.plan_entries(cls.stat_files(files), schedule, workers)
+
+    @classmethod
+    def plan_entries(
+        cls,
+        entries: List[PlannedFile],
+        schedule: str = 'none',
+        workers: int = 1,
+    ) -> List[List[PlannedFile]]:
+        """Order and assign already stat'ed entries to workers.
+
+        Args:
+            entries (List[PlannedFile]): The entries to transfer.
+            schedule (str): The schedule used to order the entries.
+                Defaults to 'none'.
+            workers (int): The number of workers. Defaults to 1.
+
+        Returns:
+            List[List[PlannedFile]]: One list of entries per worker.
+        """
+        entries = cls.order_files(entries, schedule)
+        plan = cls.assign_workers(entries, workers)
+        logger.info(
+            f'Planned {len(entries)} files over {workers} workers '
+            f'({schedule} schedule), makespan of {cls.makespan(plan)} bytes.',
+        )
+        return plan
+
+    @staticmethod
+    def makespan(plan: List[List[PlannedFile]]) -> int:
+        """Return the number of bytes assigned to the busiest worker.
+
+        Args:
+            plan (List[List[PlannedFile]]): One list of entries per worker.
+
+        Returns:
+            int: The largest per-worker byte count.
+        """
+        return max((sum(e['size'] for e in b) for b in plan), default=0)
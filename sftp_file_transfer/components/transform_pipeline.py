@@ -0,0 +1,452 @@
+import base64
+import gzip
+import hashlib
+import multiprocessing
+import os
+import struct
+import sys
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from logging import Logger
+from typing import (
+    BinaryIO,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypedDict,
+)
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from sftp_file_transfer.components.defaults import POOL_START_METHOD
+from sftp_file_transfer.components.logger_setup import setup_logger
+
+logger: Logger = setup_logger()
+
+DEFAULT_TRANSFORM_BLOCK_SIZE = 4 * 1024 * 1024  # 4 MB
+EXECUTORS = ('auto', 'process', 'thread', 'inline')
+
+
+class BlockTransform(ABC):
+    """A CPU-bound step applied to each block of an upload.
+
+    Blocks are transformed independently, possibly in another process, so
+    transforms must be picklable and must not keep state between blocks.
+
+    Attributes:
+        suffix (str): Appended to the remote file name.
+    """
+
+    suffix = ''
+
+    @abstractmethod
+    def apply(self, block: bytes, index: int, last: bool) -> bytes:
+        """Transform a block.
+
+        Args:
+            block (bytes): The block content.
+            index (int): The position of the block in the file.
+            last (bool): Whether this is the last block of the file.
+
+        Returns:
+            bytes: The transformed block.
+        """
+
+
+class GzipTransform(BlockTransform):
+    """Compress each block as a gzip member.
+
+    Concatenated members form a valid gzip file, which `gzip -d` and
+    `gzip.decompress` restore as a whole.
+
+    Parameters:
+        level (Optional[int]): The compression level, from 1 to 9.
+            Defaults to 6.
+    """
+
+    suffix = '.gz'
+
+    def __init__(self, level: Optional[int] = None):
+        self.level = 6 if level is None else level
+
+    def apply(self, block: bytes, index: int, last: bool) -> bytes:
+        return gzip.compress(block, compresslevel=self.level, mtime=0)
+
+
+class ZstdTransform(BlockTransform):
+    """Compress each block as a Zstandard frame.
+
+    Concatenated frames form a valid Zstandard file, which `zstd -d`
+    restores as a whole. Requires the optional `zstandard` package.
+
+    Parameters:
+        level (Optional[int]): The compression level. Defaults to 3.
+
+    Raises:
+        ImportError: If `zstandard` is not installed.
+    """
+
+    suffix = '.zst'
+
+    def __init__(self, level: Optional[int] = None):
+        try:
+            import zstandard  # noqa: F401, PLC0415
+        except ImportError as e:
+            raise ImportError(
+                'The zstd transform requires the zstandard package.',
+            ) from e
+        self.level = 3 if level is None else level
+
+    def apply(self, block: bytes, index: int, last: bool) -> bytes:
+        import zstandard  # noqa: PLC0415
+
+        return zstandard.ZstdCompressor(level=self.level).compress(block)
+
+
+class EncryptTransform(BlockTransform):
+    """Encrypt each block with AES-GCM before it leaves the host.
+
+    Each block is written as its length, a random nonce and the ciphertext.
+    The block index and whether it is the last one are authenticated with
+    the block, so reordered, dropped or truncated blocks fail `decrypt`.
+
+    Parameters:
+        key (str): A base64 encoded 128, 192 or 256-bit key.
+
+    Raises:
+        ValueError: If the key does not have a valid length.
+    """
+
+    suffix = '.enc'
+    NONCE_SIZE = 12
+    _LENGTH = struct.Struct('>I')
+    _ASSOCIATED = struct.Struct('>Q?')
+
+    def __init__(self, key: str):
+        self.key = base64.b64decode(key)
+        if len(self.key) not in {16, 24, 32}:
+            raise ValueError('The encryption key must be 16, 24 or 32 bytes.')
+
+    def apply(self, block: bytes, index: int, last: bool) -> bytes:
+        nonce = os.urandom(self.NONCE_SIZE)
+        sealed = nonce + AESGCM(self.key).encrypt(
+            nonce,
+            block,
+            self._ASSOCIATED.pack(index, last),
+        )
+        return self._LENGTH.pack(len(sealed)) + sealed
+
+    def decrypt(self, data: bytes) -> bytes:
+        """Restore the content of a file encrypted block by block.
+
+        Args:
+            data (bytes): The encrypted file.
+
+        Raises:
+            ValueError: If the file was altered or truncated.
+
+        Returns:
+            bytes: The decrypted content.
+        """
+        blocks = []
+        offset = index = 0
+        while offset < len(data):
+            (length,) = self._LENGTH.unpack_from(data, offset)
+            offset += self._LENGTH.size
+            sealed = data[offset : offset + length]
+            offset += length
+            try:
+                blocks.append(
+                    AESGCM(self.key).decrypt(
+                        sealed[: self.NONCE_SIZE],
+                        sealed[self.NONCE_SIZE :],
+                        self._ASSOCIATED.pack(index, offset >= len(data)),
+                    ),
+                )
+            except InvalidTag as e:
+                raise ValueError(f'Block {index} failed to decrypt.') from e
+            index += 1
+        return b''.join(blocks)
+
+
+TRANSFORMS = {
+    'gzip': GzipTransform,
+    'zstd': ZstdTransform,
+    'encrypt': EncryptTransform,
+}
+
+
+class TransformOptions(TypedDict, total=False):
+    """Settings of the transform stage of uploads.
+
+    Attributes:
+        transforms (List[str]): The names of the transforms applied in order,
+            among `TRANSFORMS`.
+        compression_level (Optional[int]): The level of `gzip` or `zstd`.
+        encryption_key (Optional[str]): The base64 encoded key of `encrypt`.
+        block_hash (Optional[str]): A `hashlib` algorithm used to hash each
+            block before it is transformed.
+        transform_workers (Optional[int]): The size of the pool. Defaults to
+            the number of CPUs.
+        transform_executor (str): One of `EXECUTORS`.
+        transform_block_size (int): The size of the blocks read from the
+            local file.
+    """
+
+    transforms: List[str]
+    compression_level: Optional[int]
+    encryption_key: Optional[str]
+    block_hash: Optional[str]
+    transform_workers: Optional[int]
+    transform_executor: str
+    transform_block_size: int
+
+
+def _transform_block(
+    transforms: Tuple[BlockTransform, ...],
+    block_hash: Optional[str],
+    block: bytes,
+    index: int,
+    last: bool,
+) -> Tuple[bytes, Optional[str]]:
+    """Hash and transform a block, in a worker of the pool."""
+    digest = hashlib.new(block_hash, block).hexdigest() if block_hash else None
+    for transform in transforms:
+        block = transform.apply(block, index, last)
+    return block, digest
+
+
+class TransformPipeline:
+    """Run the CPU-bound work of an upload in a pool, off the I/O thread.
+
+    Blocks are read from the local file, hashed and transformed by a pool of
+    workers and handed back in file order, so the SFTP connection keeps
+    writing while the CPUs work. At most `max_pending` blocks are in the
+    pool at a time, which bounds memory to about twice `max_pending` blocks.
+
+    The `auto` executor uses threads on free-threaded Python builds and
+    processes otherwise, since the GIL would keep threads on a single core.
+    Pools are shared by every pipeline of the process with the same
+    executor and size, so parallel uploads do not oversubscribe the CPUs.
+
+    Parameters:
+        transforms (Optional[List[BlockTransform]]): The transforms applied
+            in order to each block.
+        block_hash (Optional[str]): A `hashlib` algorithm used to hash each
+            block before it is transformed.
+        workers (Optional[int]): The size of the pool. Defaults to the
+            number of CPUs.
+        executor (str): One of `EXECUTORS`. `inline` runs the work on the
+            calling thread. Defaults to 'auto'.
+        block_size (int): The size of the blocks read from the local file.
+            Defaults to DEFAULT_TRANSFORM_BLOCK_SIZE.
+        max_pending (Optional[int]): The maximum number of blocks in the
+            pool. Defaults to twice the number of workers.
+
+    Raises:
+        ValueError: If the executor is unknown or `encrypt` is not the last
+            transform.
+    """
+
+    _pools: Dict[Tuple[str, int], Executor] = {}
+    _lock = threading.Lock()
+
+    def __init__(  # noqa: PLR0913, PLR0917
+        self,
+        transforms: Optional[List[BlockTransform]] = None,
+        block_hash: Optional[str] = None,
+        workers: Optional[int] = None,
+        executor: str = 'auto',
+        block_size: int = DEFAULT_TRANSFORM_BLOCK_SIZE,
+        max_pending: Optional[int] = None,
+    ):
+        if executor not in EXECUTORS:
+            raise ValueError(
+                f'Invalid executor: {executor}. '
+                f'Expected one of {", ".join(EXECUTORS)}.',
+            )
+        self.transforms = tuple(transforms or ())
+        if any(
+            isinstance(transform, EncryptTransform)
+            for transform in self.transforms[:-1]
+        ):
+            raise ValueError('The encrypt transform must come last.')
+        if block_hash is not None:
+            hashlib.new(block_hash)
+        self.block_hash = block_hash
+        self.workers = workers or os.cpu_count() or 1
+        if executor == 'auto':
+            gil_enabled = getattr(sys, '_is_gil_enabled', lambda: True)()
+            executor = 'process' if gil_enabled else 'thread'
+        self.executor = executor
+        self.block_size = block_size
+        self.max_pending = max_pending or 2 * self.workers
+        self.digests: List[str] = []
+
+    @classmethod
+    def from_options(cls, options: TransformOptions) -> 'TransformPipeline':
+        """Build a pipeline from the transform settings.
+
+        Args:
+            options (TransformOptions): The transform settings.
+
+        Raises:
+            ValueError: If a transform is unknown.
+
+        Returns:
+            TransformPipeline: The pipeline.
+        """
+        names = options.get('transforms', [])
+        unknown = [name for name in names if name not in TRANSFORMS]
+        if unknown:
+            raise ValueError(
+                f'Unknown transforms: {", ".join(unknown)}. '
+                f'Expected some of {", ".join(TRANSFORMS)}.',
+            )
+        transforms = []
+        for name in names:
+            if name == 'encrypt':
+                if not options.get('encryption_key'):
+                    raise ValueError('The encrypt transform requires a key.')
+                transforms.append(EncryptTransform(options['encryption_key']))
+            else:
+                transforms.append(
+                    TRANSFORMS[name](options.get('compression_level')),
+                )
+        return cls(
+            transforms,
+            block_hash=options.get('block_hash'),
+            workers=options.get('transform_workers'),
+            executor=options.get('transform_executor', 'auto'),
+            block_size=options.get(
+                'transform_block_size',
+                DEFAULT_TRANSFORM_BLOCK_SIZE,
+            ),
+        )
+
+    @property
+    def suffix(self) -> str:
+        """The suffix appended to the remote file name by the transforms."""
+        return ''.join(transform.suffix for transform in self.transforms)
+
+    def digest(self) -> Optional[str]:
+        """Combine the block digests of the last run, in file order.
+
+        Returns:
+            Optional[str]: The digest of the concatenated block digests, or
+                None without a block hash.
+        """
+        if self.block_hash is None:
+            return None
+        combined = hashlib.new(self.block_hash)
+        for digest in self.digests:
+            combined.update(bytes.fromhex(digest))
+        return combined.hexdigest()
+
+    def run(self, local_file: BinaryIO) -> Iterator[bytes]:
+        """Transform a file block by block.
+
+        Args:
+            local_file (BinaryIO): The open local file.
+
+        Returns:
+            Iterator[bytes]: The transformed blocks, in file order.
+        """
+        blocks = iter(lambda: local_file.read(self.block_size), b'')
+        return self.transform_blocks(blocks)
+
+    def transform_blocks(self, blocks: Iterable[bytes]) -> Iterator[bytes]:
+        """Transform blocks in the pool and yield them back in order.
+
+        Blocks are only read as room frees up in the pool, and the block
+        digests are collected in `digests`.
+
+        Args:
+            blocks (Iterable[bytes]): The blocks to transform.
+
+        Returns:
+            Iterator[bytes]: The transformed blocks, in the same order.
+        """
+        self.digests = []
+        pool = self._pool()
+        pending: deque = deque()
+        try:
+            for index, (block, last) in enumerate(self._mark_last(blocks)):
+                if len(pending) >= self.max_pending:
+                    yield self._collect(pending.popleft())
+                args = (self.transforms, self.block_hash, block, index, last)
+                if pool is None:
+                    yield self._collect(_transform_block(*args))
+                else:
+                    pending.append(pool.submit(_transform_block, *args))
+            while pending:
+                yield self._collect(pending.popleft())
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def _collect(self, result) -> bytes:
+        """Unpack a block result, waiting for it if it is a future."""
+        if isinstance(result, Future):
+            result = result.result()
+        block, digest = result
+        if digest is not None:
+            self.digests.append(digest)
+        return block
+
+    @staticmethod
+    def _mark_last(blocks: Iterable[bytes]) -> Iterator[Tuple[bytes, bool]]:
+        """Pair each block with whether it is the last one.
+
+        An empty file still yields one empty block, so compressed and
+        encrypted files are never empty.
+        """
+        blocks = iter(blocks)
+        current = next(blocks, b'')
+        while current is not None:
+            following = next(blocks, None)
+            yield current, following is None
+            current = following
+
+    def _pool(self) -> Optional[Executor]:
+        """Get the shared pool of this executor and size."""
+        if self.executor == 'inline':
+            return None
+        with self._lock:
+            pool = self._pools.get((self.executor, self.workers))
+            if pool is None:
+                if self.executor == 'process':
+                    pool = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context(
+                            POOL_START_METHOD,
+                        ),
+                    )
+                else:
+                    pool = ThreadPoolExecutor(max_workers=self.workers)
+                self._pools[self.executor, self.workers] = pool
+                logger.info(
+                    f'Started a {self.executor} pool of {self.workers} '
+                    'workers for upload transforms.',
+                )
+        return pool
+
+    @classmethod
+    def shutdown(cls) -> None:
+        """Stop the shared pools."""
+        with cls._lock:
+            pools = list(cls._pools.values())
+            cls._pools = {}
+        for pool in pools:
+            pool.shutdown()
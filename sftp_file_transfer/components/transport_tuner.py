@@ -0,0 +1,236 @@
+import json
+import os
+import tempfile
+import time
+from logging import Logger
+from pathlib import Path
+from typing import Dict, List, Optional, TypedDict, Union
+
+from sftp_file_transfer.components.defaults import (
+    DEFAULT_PROBE_SIZE,
+    DEFAULT_PROFILE_PATH,
+)
+from sftp_file_transfer.components.logger_setup import setup_logger
+from sftp_file_transfer.components.sftp_manager import (
+    SFTPManager,
+    SFTPManagerConfig,
+    SFTPTransportOptions,
+)
+from sftp_file_transfer.components.transform_pipeline import TransformOptions
+
+logger: Logger = setup_logger()
+
+PROBE_CHUNK_SIZE = 1024 * 1024  # 1 MB
+# The window and packet sizes only bound what the server may send to us, so
+# an upload probe cannot measure them.
+RECEIVE_OPTIONS = ('window_size', 'max_packet_size')
+# Settings of the configuration that the probes do not inherit.
+PROBE_EXCLUDED_OPTIONS = frozenset(
+    set(SFTPTransportOptions.__annotations__)
+    | set(TransformOptions.__annotations__),
+)
+
+CANDIDATE_PROFILES: Dict[str, SFTPTransportOptions] = {
+    'default': {},
+    'aes128-ctr': {
+        'ciphers': ['aes128-ctr'],
+        'macs': ['hmac-sha2-256-etm@openssh.com'],
+    },
+    'aes128-gcm': {'ciphers': ['aes128-gcm@openssh.com']},
+}
+
+
+class ProbeResult(TypedDict):
+    """The measured upload throughput of a candidate transport profile.
+
+    Attributes:
+        profile (str): The name of the candidate.
+        cipher (Optional[str]): The cipher negotiated with the server.
+        throughput (float): The best upload rate, in bytes per second.
+        error (Optional[str]): Why the candidate could not be measured.
+    """
+
+    profile: str
+    cipher: Optional[str]
+    throughput: float
+    error: Optional[str]
+
+
+class TransportTuner:
+    """Pick the fastest SSH transport settings for a target by measuring.
+
+    Each candidate profile uploads the same probe file to the target, and
+    the profile with the best throughput is saved as JSON so later runs can
+    apply it with `load_profile`.
+    """
+
+    @staticmethod
+    def load_profile(
+        path: Union[str, Path] = DEFAULT_PROFILE_PATH,
+    ) -> SFTPTransportOptions:
+        """Read the transport settings saved by a previous tuning run.
+
+        Args:
+            path (Union[str, Path]): The saved profile.
+
+        Returns:
+            SFTPTransportOptions: The saved settings, or no settings if the
+                profile does not exist.
+        """
+        path = Path(path)
+        if not path.is_file():
+            return SFTPTransportOptions()
+        with path.open(encoding='utf-8') as profile:
+            return SFTPTransportOptions(**json.load(profile)['options'])
+
+    @staticmethod
+    def save_profile(
+        result: ProbeResult,
+        options: SFTPTransportOptions,
+        path: Union[str, Path] = DEFAULT_PROFILE_PATH,
+    ) -> None:
+        """Save the settings of the fastest candidate.
+
+        Args:
+            result (ProbeResult): The measurement of the candidate.
+            options (SFTPTransportOptions): The settings of the candidate.
+            path (Union[str, Path]): Where the profile is written.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open('w', encoding='utf-8') as profile:
+            json.dump({**result, 'options': options}, profile, indent=2)
+        logger.info(f'Saved transport profile {result["profile"]} to {path}.')
+
+    @staticmethod
+    def probe(
+        config: SFTPManagerConfig,
+        name: str,
+        local_path: Path,
+        remote_path: str,
+        repeats: int = 2,
+    ) -> ProbeResult:
+        """Measure the upload throughput of a configuration.
+
+        Only the transfers are timed, not the connection handshake.
+
+        Args:
+            config (SFTPManagerConfig): The configuration to measure.
+            name (str): The name reported for the configuration.
+            local_path (Path): The probe file to upload.
+            remote_path (str): The remote directory used for the probe.
+            repeats (int): The number of uploads; the best one is kept.
+
+        Returns:
+            ProbeResult: The measurement, with the error if it failed.
+        """
+        size = local_path.stat().st_size
+        remote_file = f'{remote_path}/.sftp-autotune-{os.getpid()}.tmp'
+        result = ProbeResult(
+            profile=name,
+            cipher=None,
+            throughput=0.0,
+            error=None,
+        )
+        try:
+            with SFTPManager(config) as sftp:
+                result['cipher'] = sftp.negotiated_cipher()
+                try:
+                    for _ in range(repeats):
+                        start = time.perf_counter()
+                        sftp.upload_file(local_path, remote_file)
+                        elapsed = time.perf_counter() - start
+                        result['throughput'] = max(
+                            result['throughput'],
+                            size / elapsed,
+                        )
+                finally:
+                    # Failures are only logged, so they do not hide the
+                    # error of the upload.
+                    for error in sftp.remove_files([remote_file]).values():
+                        logger.warning(
+                            f'Could not remove probe file {remote_file}: '
+                            f'{error}'
+                        )
+        except Exception as e:
+            logger.error(f'Transport profile {name} failed: {e}')
+            result['error'] = str(e)
+        return result
+
+    @classmethod
+    def autotune(
+        cls,
+        config: SFTPManagerConfig,
+        remote_path: str,
+        candidates: Optional[Dict[str, SFTPTransportOptions]] = None,
+        probe_size: int = DEFAULT_PROBE_SIZE,
+        repeats: int = 2,
+    ) -> List[ProbeResult]:
+        """Measure every candidate profile against the target.
+
+        Segmented and delta transfers are disabled while probing, so every
+        candidate sends the whole probe file over a single connection, and
+        the transport and transform settings already in the configuration
+        are ignored.
+
+        Only the algorithms are compared. The `window_size` and
+        `max_packet_size` settings size the window paramiko advertises for
+        data it receives, so they speed up downloads, while the window of
+        an upload is set by the server.
+
+        Args:
+            config (SFTPManagerConfig): The connection parameters.
+            remote_path (str): A writable remote directory for the probe.
+            candidates (Optional[Dict[str, SFTPTransportOptions]]): The
+                profiles to measure. Defaults to `CANDIDATE_PROFILES`.
+            probe_size (int): The size in bytes of the probe file.
+            repeats (int): The number of uploads per candidate.
+
+        Raises:
+            ValueError: If a candidate sets the window or packet size.
+
+        Returns:
+            List[ProbeResult]: The measurements, fastest first.
+        """
+        candidates = candidates or CANDIDATE_PROFILES
+        receive_side = sorted(
+            name
+            for name, options in candidates.items()
+            if any(key in options for key in RECEIVE_OPTIONS)
+        )
+        if receive_side:
+            raise ValueError(
+                f'Upload probes cannot measure the window or packet size of '
+                f'{", ".join(receive_side)}.',
+            )
+        with tempfile.NamedTemporaryFile(delete=False) as probe_file:
+            for offset in range(0, probe_size, PROBE_CHUNK_SIZE):
+                chunk = min(PROBE_CHUNK_SIZE, probe_size - offset)
+                probe_file.write(os.urandom(chunk))
+        local_path = Path(probe_file.name)
+        try:
+            results = []
+            for name, options in candidates.items():
+                probe_config = SFTPManagerConfig(**{
+                    key: value
+                    for key, value in config.items()
+                    if key not in PROBE_EXCLUDED_OPTIONS
+                })
+                probe_config.update(
+                    segment_threshold=None,
+                    delta_transfer=False,
+                )
+                probe_config.update(options)
+                results.append(
+                    cls.probe(
+                        probe_config,
+                        name,
+                        local_path,
+                        remote_path,
+                        repeats,
+                    )
+                )
+        finally:
+            local_path.unlink()
+        results.sort(key=lambda r: r['throughput'], reverse=True)
+        return results
@@ -1,21 +1,86 @@
-from datetime import datetime, timedelta
+from datetime import datetime
 from pathlib import Path
 from typing import List, Optional
 
-from typer import Context, Option, Typer
+from click.core import ParameterSource
+from typer import BadParameter, Context, Option, Typer
 
-from sftp_file_transfer.components.env_loader import EnvLoader
+from sftp_file_transfer.components.backlog_planner import BacklogPlanner
+from sftp_file_transfer.components.daemon_client import (
+    DEFAULT_SOCKET_PATH,
+    send_request,
+)
+from sftp_file_transfer.components.defaults import (
+    DEFAULT_PROBE_SIZE,
+    DEFAULT_PROFILE_PATH,
+    DEFAULT_REMOVE_WINDOW,
+    DEFAULT_SEGMENT_CONCURRENCY,
+    DEFAULT_SEGMENT_SIZE,
+    TRANSFORM_NAMES,
+)
 from sftp_file_transfer.components.file_manager import FileManager
-from sftp_file_transfer.components.sftp_manager import (
-    SFTPManager,
-    SFTPManagerConfig,
+from sftp_file_transfer.components.job_journal import (
+    DEFAULT_JOURNAL_PATH,
+    JobJournal,
 )
+from sftp_file_transfer.components.transfer_planner import (
+    SCHEDULES,
+    TransferPlanner,
+)
+
+# The SFTP stack (paramiko, cryptography) is imported by the commands that
+# connect, so submitting a job to the daemon does not pay for it.
 
 app = Typer()
+MEGABYTE = 1024 * 1024
+# The parameters of a job submitted to the daemon with --daemon-socket.
+DAEMON_JOB_PARAMETERS = {
+    'daemon_socket',
+    'wait',
+    'local_path',
+    'remote_path',
+    'file_extension',
+    't_delta',
+    'schedule',
+}
+
+
+def _check_options(ctx: Context, since: Optional[datetime]) -> None:
+    """Reject combinations of options that cannot be honoured.
+
+    Args:
+        ctx (Context): The context of the main command.
+        since (Optional[datetime]): The first day sent with --since.
+
+    Raises:
+        BadParameter: If an option is set that the chosen mode ignores.
+    """
+    params = ctx.params
+    if since is None and (params['until'] is not None or params['day_dirs']):
+        raise BadParameter('--until and --day-dirs require --since.')
+    if since is not None and params['t_delta'] is not None:
+        raise BadParameter(
+            '--since cannot be combined with --timedelta.',
+            param_hint='--since',
+        )
+    if params['daemon_socket'] is None:
+        return
+    unsupported = [
+        param.opts[0]
+        for param in ctx.command.params
+        if param.name not in DAEMON_JOB_PARAMETERS
+        and ctx.get_parameter_source(param.name) is ParameterSource.COMMANDLINE
+    ]
+    if unsupported:
+        raise BadParameter(
+            f'{", ".join(unsupported)} cannot be combined with '
+            '--daemon-socket, as the daemon only runs plain uploads.',
+            param_hint='--daemon-socket',
+        )
 
 
 @app.callback(invoke_without_command=True)
-def main(
+def main(  # noqa: PLR0913, PLR0917
     ctx: Context,
     t_delta: Optional[int] = Option(
         None,
@@ -41,42 +106,446 @@ def main(
         '-L',
         help='The local path from which the files must be fetched.',
     ),
+    schedule: str = Option(
+        'none',
+        '--schedule',
+        '-S',
+        help=f'The order in which files are sent: {", ".join(SCHEDULES)}.',
+    ),
+    workers: int = Option(
+        1,
+        '--workers',
+        '-W',
+        help='The number of parallel SFTP connections used to send files.',
+    ),
+    segment_threshold: Optional[int] = Option(
+        None,
+        '--segment-threshold',
+        help='Size in MB from which a file is sent in parallel segments.',
+    ),
+    segment_size: int = Option(
+        DEFAULT_SEGMENT_SIZE // MEGABYTE,
+        '--segment-size',
+        help='The size in MB of each segment of a segmented transfer.',
+    ),
+    segment_concurrency: int = Option(
+        DEFAULT_SEGMENT_CONCURRENCY,
+        '--segment-concurrency',
+        help='The number of connections used by a segmented transfer.',
+    ),
+    verify_segments: bool = Option(
+        False,
+        '--verify-segments',
+        help='Compare each segment with the local file after a transfer.',
+    ),
+    delta: bool = Option(
+        False,
+        '--delta',
+        help='Only send the blocks that changed on existing remote files.',
+    ),
+    verify_delta: bool = Option(
+        False,
+        '--verify-delta',
+        help='Read delta uploads back whole instead of the written blocks.',
+    ),
+    batch_confirm: bool = Option(
+        False,
+        '--batch-confirm',
+        help='Confirm uploads with one remote listing instead of per file.',
+    ),
+    confirm_mtime: bool = Option(
+        False,
+        '--confirm-mtime',
+        help='Stamp remote copies with the local mtime and require a match.',
+    ),
+    transforms: Optional[List[str]] = Option(
+        None,
+        '--transform',
+        help=(
+            f'Apply to each file before sending: {", ".join(TRANSFORM_NAMES)}.'
+        ),
+    ),
+    compression_level: Optional[int] = Option(
+        None,
+        '--compression-level',
+        help='The level of the gzip or zstd transform.',
+    ),
+    block_hash: Optional[str] = Option(
+        None,
+        '--block-hash',
+        help='Hash each block with this algorithm, such as sha256.',
+    ),
+    transform_workers: Optional[int] = Option(
+        None,
+        '--transform-workers',
+        help='The number of processes running transforms and hashing.',
+    ),
+    daemon_socket: Optional[Path] = Option(
+        None,
+        '--daemon-socket',
+        envvar='SFTP_DAEMON_SOCKET',
+        help='Submit the transfer to the daemon listening on this socket.',
+    ),
+    wait: bool = Option(
+        False,
+        '--wait',
+        help='Wait for a transfer submitted to the daemon to finish.',
+    ),
+    journal_path: Optional[Path] = Option(
+        None,
+        '--journal',
+        envvar='SFTP_JOURNAL',
+        help='Journal the batch here and resume it if it was interrupted.',
+    ),
+    since: Optional[datetime] = Option(
+        None,
+        '--since',
+        formats=['%Y-%m-%d'],
+        help='Send the files modified from this day on, oldest day first.',
+    ),
+    until: Optional[datetime] = Option(
+        None,
+        '--until',
+        formats=['%Y-%m-%d'],
+        help='The last day sent with --since. Defaults to today.',
+    ),
+    day_dirs: bool = Option(
+        False,
+        '--day-dirs',
+        help='Send each day selected with --since to its own subdirectory.',
+    ),
+    key_file: Optional[Path] = Option(
+        None,
+        '--key-file',
+        help='Authenticate with this RSA, ECDSA or Ed25519 private key.',
+    ),
+    agent: bool = Option(
+        False,
+        '--agent',
+        help='Authenticate with the keys of the running ssh-agent.',
+    ),
 ):
+    # The authentication options apply to the connections of every command.
+    ctx.obj = {}
+    if key_file is not None:
+        ctx.obj['key_filepath'] = str(key_file)
+    if agent:
+        ctx.obj['use_agent'] = True
     if ctx.invoked_subcommand:
         return
+    _check_options(ctx, since)
     try:
-        env = EnvLoader()
-        config = SFTPManagerConfig(
-            sftp_host=env.SFTP_HOST,
-            sftp_port=int(env.SFTP_PORT),
-            sftp_user=env.SFTP_USER,
-            sftp_password=env.SFTP_PASSWORD,
-            key_filepath=None,
-            key_password=None,
+        if daemon_socket is not None:
+            response = send_request(
+                daemon_socket,
+                {
+                    'action': 'submit',
+                    'wait': wait,
+                    'job': {
+                        'local_paths': [str(Path(local_path).absolute())],
+                        'remote_path': remote_path,
+                        'file_extension': file_extension,
+                        't_delta': t_delta,
+                        'schedule': schedule,
+                    },
+                },
+            )
+            print(response.get('error') or response)
+            return
+
+        from sftp_file_transfer.components.batch_uploader import (  # noqa: PLC0415
+            BatchUploader,
+        )
+        from sftp_file_transfer.components.config_loader import (  # noqa: PLC0415
+            load_config,
         )
+        from sftp_file_transfer.components.sftp_manager import (  # noqa: PLC0415
+            SFTPManager,
+        )
+
+        config = load_config()
+        options = {
+            'segment_verify': verify_segments,
+            'delta_transfer': delta,
+            'delta_verify': verify_delta,
+            'batch_confirm': batch_confirm,
+            'confirm_mtime': confirm_mtime,
+            'transforms': transforms or None,
+            'compression_level': compression_level,
+            'block_hash': block_hash,
+            'transform_workers': transform_workers,
+        }
+        if segment_threshold is not None:
+            options.update(
+                segment_threshold=segment_threshold * MEGABYTE,
+                segment_size=segment_size * MEGABYTE,
+                segment_concurrency=segment_concurrency,
+            )
+        # Options left unset keep the settings read from the environment.
+        config.update({
+            key: value
+            for key, value in options.items()
+            if value is not None and value is not False
+        })
+        config.update(ctx.obj)
         manager = SFTPManager(config)
+        journal = JobJournal(journal_path) if journal_path else None
+        # The files of an interrupted batch are resumed first, and left out
+        # of the new batch unless they changed since.
+        journaled = journal.batch_files() if journal is not None else {}
 
-        all_files: List[Path] = []
-        if file_extension:
-            all_files = FileManager.fetch_files_filtered_by_extension(
-                directory=local_path,
-                extension=file_extension,
+        if since is not None:
+            plan = BacklogPlanner.plan(
+                [local_path],
+                since.date(),
+                (until or datetime.today()).date(),
+                remote_path,
+                file_extension,
+                workers,
+                day_dirs,
             )
+            plan = [
+                [
+                    entry
+                    for entry in entries
+                    if journaled.get(str(entry['path'])) != entry['mtime']
+                ]
+                for entries in plan
+            ]
         else:
-            all_files = FileManager.fetch_files(local_path)
-
-        if t_delta is not None:
-            target_day = datetime.today() - timedelta(days=t_delta)
-            all_files = FileManager.filter_files_by_date(all_files, target_day)
+            entries = [
+                entry
+                for entry in FileManager.select_files(
+                    [local_path],
+                    file_extension,
+                    t_delta,
+                )
+                if journaled.get(str(entry['path'])) != entry['mtime']
+            ]
+            plan = TransferPlanner.plan_entries(entries, schedule, workers)
 
         with manager as sftp:
-            for file in all_files:
-                sftp.upload_file(
-                    local_path=file,
-                    remote_path=f'{remote_path}/{file.name}',
-                )
+            uploader = BatchUploader(config, sftp, journal)
+            if journal is not None and journal.pending() is not None:
+                print(f'Resuming the interrupted batch in {journal_path}.')
+                uploader.resume()
+            uploader.upload(plan, remote_path)
+
+    except Exception as e:
+        print(e)
+
+
+@app.command()
+def daemon(
+    ctx: Context,
+    socket_path: Path = Option(
+        DEFAULT_SOCKET_PATH,
+        '--socket',
+        envvar='SFTP_DAEMON_SOCKET',
+        help='The Unix domain socket on which jobs are submitted.',
+    ),
+    workers: int = Option(
+        4,
+        '--workers',
+        '-W',
+        help='The number of warm SFTP connections kept open.',
+    ),
+):
+    """Keep warm connections open and run jobs submitted over a socket."""
+    from sftp_file_transfer.components.config_loader import (  # noqa: PLC0415
+        load_config,
+    )
+    from sftp_file_transfer.components.transfer_daemon import (  # noqa: PLC0415
+        TransferDaemon,
+    )
+
+    try:
+        config = load_config()
+        config.update(ctx.obj)
+        TransferDaemon(config, socket_path, workers).serve_forever()
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        print(e)
+
+
+@app.command()
+def resume(
+    ctx: Context,
+    journal_path: Path = Option(
+        DEFAULT_JOURNAL_PATH,
+        '--journal',
+        envvar='SFTP_JOURNAL',
+        help='The journal of the interrupted batch.',
+    ),
+):
+    """Send the remaining files of a batch interrupted by a crash."""
+    from sftp_file_transfer.components.batch_uploader import (  # noqa: PLC0415
+        BatchUploader,
+    )
+    from sftp_file_transfer.components.config_loader import (  # noqa: PLC0415
+        load_config,
+    )
+    from sftp_file_transfer.components.sftp_manager import (  # noqa: PLC0415
+        SFTPManager,
+    )
+
+    try:
+        journal = JobJournal(journal_path)
+        if journal.pending() is None:
+            print(f'No interrupted batch in {journal_path}.')
+            return
+        config = load_config()
+        config.update(ctx.obj)
+        with SFTPManager(config) as sftp:
+            BatchUploader(config, sftp, journal).resume()
+        print('Interrupted batch completed.')
+
+    except Exception as e:
+        print(e)
+
+
+@app.command()
+def autotune(  # noqa: PLR0913, PLR0917
+    ctx: Context,
+    remote_path: str = Option(
+        ...,
+        '--remote',
+        '-R',
+        help='A writable remote directory used for the probe uploads.',
+    ),
+    size_mb: int = Option(
+        DEFAULT_PROBE_SIZE // MEGABYTE,
+        '--size-mb',
+        help='The size in MB of the probe file.',
+    ),
+    repeats: int = Option(
+        2,
+        '--repeats',
+        help='The number of probe uploads per candidate.',
+    ),
+    profile_path: Path = Option(
+        DEFAULT_PROFILE_PATH,
+        '--profile',
+        envvar='SFTP_TRANSPORT_PROFILE',
+        help='Where the fastest transport profile is saved.',
+    ),
+    dry_run: bool = Option(
+        False,
+        '--dry-run',
+        help='Only report the measurements, without saving a profile.',
+    ),
+):
+    """Measure candidate SSH transport settings and keep the fastest."""
+    from sftp_file_transfer.components.config_loader import (  # noqa: PLC0415
+        load_config,
+    )
+    from sftp_file_transfer.components.transport_tuner import (  # noqa: PLC0415
+        CANDIDATE_PROFILES,
+        TransportTuner,
+    )
 
-            sftp.list_files(remote_path)
+    try:
+        config = load_config()
+        config.update(ctx.obj)
+        results = TransportTuner.autotune(
+            config,
+            remote_path,
+            probe_size=size_mb * MEGABYTE,
+            repeats=repeats,
+        )
+        for result in results:
+            outcome = result['error'] or (
+                f'{result["throughput"] / MEGABYTE:.1f} MB/s '
+                f'({result["cipher"]})'
+            )
+            print(f'{result["profile"]}: {outcome}')
+        best = results[0]
+        if best['error']:
+            raise RuntimeError('No transport profile could be measured.')
+        if not dry_run:
+            TransportTuner.save_profile(
+                best,
+                CANDIDATE_PROFILES[best['profile']],
+                profile_path,
+            )
+            print(f'Saved transport profile {best["profile"]}.')
+
+    except Exception as e:
+        print(e)
+
+
+@app.command()
+def prune(  # noqa: PLR0913, PLR0917
+    ctx: Context,
+    remote_path: str = Option(
+        ...,
+        '--remote',
+        '-R',
+        help='The remote directory to prune.',
+    ),
+    max_age_days: Optional[float] = Option(
+        None,
+        '--max-age-days',
+        help='Remove files older than this many days.',
+    ),
+    keep_last: Optional[int] = Option(
+        None,
+        '--keep-last',
+        help='Keep only this many of the newest files.',
+    ),
+    max_total_mb: Optional[int] = Option(
+        None,
+        '--max-total-mb',
+        help='Keep the newest files fitting in this many MB.',
+    ),
+    pattern: Optional[str] = Option(
+        None,
+        '--pattern',
+        help='Only consider files matching this glob pattern.',
+    ),
+    dry_run: bool = Option(
+        False,
+        '--dry-run',
+        help='Only list the files that would be removed.',
+    ),
+    window: int = Option(
+        DEFAULT_REMOVE_WINDOW,
+        '--window',
+        help='The maximum number of removals in flight.',
+    ),
+):
+    """Remove remote files according to a retention policy."""
+    from sftp_file_transfer.components.config_loader import (  # noqa: PLC0415
+        load_config,
+    )
+    from sftp_file_transfer.components.retention import (  # noqa: PLC0415
+        RetentionPolicy,
+    )
+    from sftp_file_transfer.components.sftp_manager import (  # noqa: PLC0415
+        SFTPManager,
+    )
+
+    try:
+        if max_age_days is None and keep_last is None and max_total_mb is None:
+            raise ValueError(
+                'At least one of --max-age-days, --keep-last or '
+                '--max-total-mb must be set.',
+            )
+        policy = RetentionPolicy(
+            max_age_days=max_age_days,
+            keep_last=keep_last,
+            max_total_bytes=(
+                max_total_mb * MEGABYTE if max_total_mb is not None else None
+            ),
+            pattern=pattern,
+        )
+        config = load_config()
+        config.update(ctx.obj)
+        with SFTPManager(config) as sftp:
+            removed = sftp.prune(remote_path, policy, dry_run, window)
+        action = 'Would remove' if dry_run else 'Removed'
+        print(f'{action} {len(removed)} files from {remote_path}.')
 
     except Exception as e:
         print(e)
@@ -1,93 +1,135 @@
 import asyncio
 import os
-from datetime import datetime, timedelta
-from pathlib import Path
-from typing import List
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Iterator, List
 
-from aioclock import AioClock, At
+from aioclock import AioClock, At, Cron, Every
 from aioclock.group import Group
+from aioclock.triggers import BaseTrigger
 
-from sftp_file_transfer.components.env_loader import EnvLoader
-from sftp_file_transfer.components.file_manager import FileManager
-from sftp_file_transfer.components.sftp_manager import (
-    SFTPManager,
-    SFTPManagerConfig,
+from sftp_file_transfer.components.config_loader import load_config
+from sftp_file_transfer.components.deduplicator import (
+    DEFAULT_HASH_CACHE_PATH,
 )
+from sftp_file_transfer.components.job_journal import DEFAULT_JOURNAL_PATH
+from sftp_file_transfer.components.scheduled_jobs import (
+    JobRunner,
+    ScheduledJob,
+)
+from sftp_file_transfer.components.transfer_limiter import TransferLimiter
 
 group = Group()
+MEGABYTE = 1024 * 1024
+DEFAULT_TZ = 'America/Recife'
 
 
-@group.task(
-    trigger=At(
-        hour=0,
-        minute=1,
-        second=1,
-        max_loop_count=None,
-        tz='America/Recife',
-    ),
-)
-def scheduled_task():
-    print('Starting scheduled SFTP file transfer...')
-    try:
-        env = EnvLoader()
-        config = SFTPManagerConfig(
-            sftp_host=env.SFTP_HOST,
-            sftp_port=int(env.SFTP_PORT),
-            sftp_user=env.SFTP_USER,
-            sftp_password=env.SFTP_PASSWORD,
-            key_filepath=None,
-            key_password=None,
+def _load_jobs() -> List[ScheduledJob]:
+    jobs_file = os.getenv('JOBS_FILE')
+    if jobs_file:
+        return JobRunner.load_jobs(jobs_file)
+
+    local_dir_list = os.getenv('LOCAL_PATH')
+    remote_dir = os.getenv('REMOTE_PATH')
+    if not local_dir_list or not remote_dir:
+        raise ValueError(
+            'JOBS_FILE, or LOCAL_PATH and REMOTE_PATH, must be set in env',
         )
-        local_dir_list = os.getenv('LOCAL_PATH')
-        remote_dir = os.getenv('REMOTE_PATH')
-        file_extension = os.getenv('FILE_EXTENSION')
-        t_delta = os.getenv('TIME_DELTA')
-
-        if not local_dir_list or not remote_dir:
-            raise ValueError('LOCAL_PATH and REMOTE_PATH must be set in env')
-        local_dir_list = local_dir_list.split(';')
-        manager = SFTPManager(config)
-
-        all_files: List[Path] = []
-
-        for local_dir in local_dir_list:
-            fetched_files: List[Path] = []
-            if file_extension:
-                fetched_files = FileManager.fetch_files_filtered_by_extension(
-                    directory=local_dir,
-                    extension=file_extension
-                )
-            else:
-                fetched_files = FileManager.fetch_files(directory=local_dir)
-
-            if t_delta:
-                target_day = datetime.now() - timedelta(days=int(t_delta))
-                fetched_files = FileManager.filter_files_by_date(
-                    fetched_files,
-                    target_day,
+    t_delta = os.getenv('TIME_DELTA')
+    return [
+        ScheduledJob(
+            name='default',
+            local_paths=local_dir_list.split(';'),
+            remote_path=remote_dir,
+            file_extension=os.getenv('FILE_EXTENSION'),
+            t_delta=int(t_delta) if t_delta else None,
+            schedule=os.getenv('TRANSFER_SCHEDULE', 'none'),
+            workers=int(os.getenv('TRANSFER_WORKERS', '1')),
+            at='00:01:01',
+            journal_path=os.getenv('JOURNAL_PATH', str(DEFAULT_JOURNAL_PATH)),
+            deduplicate=os.getenv('DEDUPLICATE') == '1',
+            collisions=os.getenv('NAME_COLLISIONS', 'rename'),
+            hash_cache_path=os.getenv(
+                'HASH_CACHE_PATH',
+                str(DEFAULT_HASH_CACHE_PATH),
+            ),
+        )
+    ]
+
+
+def _trigger(job: ScheduledJob) -> BaseTrigger:
+    tz = job.get('tz', DEFAULT_TZ)
+    if 'every_minutes' in job:
+        return Every(minutes=job['every_minutes'])
+    if 'cron' in job:
+        return Cron(cron=job['cron'], tz=tz)
+    hour, minute, second = (int(part) for part in job['at'].split(':'))
+    return At(
+        hour=hour,
+        minute=minute,
+        second=second,
+        max_loop_count=None,
+        tz=tz,
+    )
+
+
+def _describe(job: ScheduledJob) -> str:
+    if 'every_minutes' in job:
+        return f'every {job["every_minutes"]} minutes'
+    if 'cron' in job:
+        return f'on "{job["cron"]}" ({job.get("tz", DEFAULT_TZ)} timezone)'
+    return f'every day at {job["at"]} ({job.get("tz", DEFAULT_TZ)} timezone)'
+
+
+def _job_task(runner: JobRunner) -> Callable[[], None]:
+    def task():
+        print(f'Starting scheduled SFTP file transfer {runner.name}...')
+        try:
+            if runner.run():
+                print(
+                    f'Scheduled SFTP file transfer {runner.name} completed '
+                    f'at {datetime.now()}.',
                 )
-            all_files.extend(fetched_files)
+        except Exception as e:
+            print(e)
 
-        with manager as sftp:
-            for file in all_files:
-                sftp.upload_file(
-                    local_path=file,
-                    remote_path=f'{remote_dir}/{file.name}',
-                )
-            sftp.list_files(remote_dir)
+    task.__name__ = f'transfer_{runner.name}'
+    return task
 
-        print(f'Scheduled SFTP file transfer completed at {datetime.now()}.')
 
-    except Exception as e:
-        print(e)
+config = load_config()
+max_connections = os.getenv('MAX_CONNECTIONS')
+max_in_flight = os.getenv('MAX_IN_FLIGHT_MB')
+limiter = TransferLimiter(
+    int(max_connections) if max_connections else None,
+    int(max_in_flight) * MEGABYTE if max_in_flight else None,
+)
+runners = [JobRunner(config, job, limiter) for job in _load_jobs()]
+for runner in runners:
+    group.task(trigger=_trigger(runner.job))(_job_task(runner))
+
+
+@contextmanager
+def resume_interrupted_batches(_app: AioClock) -> Iterator[None]:
+    for runner in runners:
+        try:
+            if runner.resume():
+                print(
+                    f'Interrupted SFTP file transfer {runner.name} completed '
+                    f'at {datetime.now()}.',
+                )
+        except Exception as e:
+            print(e)
+    yield
 
 
-app = AioClock()
+app = AioClock(lifespan=resume_interrupted_batches)
 app.include_group(group)
 
 
 if __name__ == '__main__':
-    print('Starting scheduled SFTP file transfer...')
-    print('It will run every day at 00:01:01 (America/Recife timezone).')
+    print('Starting scheduled SFTP file transfers...')
+    for runner in runners:
+        print(f'Job {runner.name} runs {_describe(runner.job)}.')
     print('Press Ctrl+C to exit.')
     asyncio.run(app.serve())
@@ -0,0 +1,83 @@
+import os
+from datetime import date, datetime
+
+import pytest
+
+from sftp_file_transfer.components.backlog_planner import BacklogPlanner
+
+
+def _make_file(directory, name, size, modified):
+    path = directory / name
+    path.write_bytes(b'x' * size)
+    mtime = modified.timestamp()
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+@pytest.fixture
+def backlog(tmp_path):
+    _make_file(tmp_path, 'before.csv', 1, datetime(2024, 3, 9, 23, 59, 59))
+    _make_file(tmp_path, 'first.csv', 4, datetime(2024, 3, 10))
+    _make_file(tmp_path, 'first.log', 4, datetime(2024, 3, 10, 8))
+    _make_file(tmp_path, 'second.csv', 2, datetime(2024, 3, 11, 12))
+    _make_file(tmp_path, 'third.csv', 3, datetime(2024, 3, 12, 23, 59))
+    _make_file(tmp_path, 'after.csv', 1, datetime(2024, 3, 13))
+    return tmp_path
+
+
+def _names(entries):
+    return [entry['path'].name for entry in entries]
+
+
+def test_day_boundaries():
+    """Test computing the midnights around each day of a range."""
+    boundaries = BacklogPlanner.day_boundaries(
+        date(2024, 3, 10),
+        date(2024, 3, 11),
+    )
+
+    assert boundaries == [
+        datetime(2024, 3, 10).timestamp(),
+        datetime(2024, 3, 11).timestamp(),
+        datetime(2024, 3, 12).timestamp(),
+    ]
+
+
+def test_day_boundaries_with_empty_range():
+    """Test rejecting a range ending before it starts."""
+    with pytest.raises(ValueError, match='is empty'):
+        BacklogPlanner.day_boundaries(date(2024, 3, 11), date(2024, 3, 10))
+
+
+def test_scan_days(backlog):
+    """Test bucketing files by day, oldest first."""
+    days = BacklogPlanner.scan_days(
+        [backlog],
+        date(2024, 3, 10),
+        date(2024, 3, 12),
+        extension='.csv',
+    )
+
+    assert {day: _names(entries) for day, entries in days.items()} == {
+        date(2024, 3, 10): ['first.csv'],
+        date(2024, 3, 11): ['second.csv'],
+        date(2024, 3, 12): ['third.csv'],
+    }
+
+
+def test_plan_assigns_whole_days(backlog):
+    """Test sending whole days in parallel into per-day directories."""
+    plan = BacklogPlanner.plan(
+        [backlog],
+        date(2024, 3, 10),
+        date(2024, 3, 12),
+        '/upload',
+        workers=2,
+        day_dirs=True,
+    )
+
+    assert [_names(entries) for entries in plan] == [
+        ['first.csv', 'first.log'],
+        ['second.csv', 'third.csv'],
+    ]
+    assert plan[1][1]['remote_dir'] == '/upload/2024-03-12'
@@ -0,0 +1,86 @@
+import os
+
+import pytest
+
+from sftp_file_transfer.components.batch_uploader import BatchUploader
+from sftp_file_transfer.components.job_journal import JobJournal
+from sftp_file_transfer.components.transfer_planner import TransferPlanner
+from tests.conftest import planned_names
+
+
+def test_batch_confirmation_resends_mismatches(tmp_path, files, fake_manager):
+    """Test that only files failing the batched check are sent again."""
+    journal = JobJournal(tmp_path / 'journal.jsonl')
+    fake_manager.unconfirmed = ['file1.txt']
+    manager = fake_manager()
+
+    BatchUploader({'batch_confirm': True}, manager, journal).upload(
+        TransferPlanner.plan(files),
+        '/upload',
+    )
+
+    assert manager.uploaded == [
+        '/upload/file0.txt',
+        '/upload/file1.txt',
+        '/upload/file2.txt',
+        '/upload/file3.txt',
+        '/upload/file1.txt',
+    ]
+    assert manager.confirmed == [
+        ['file0.txt', 'file1.txt', 'file2.txt', 'file3.txt'],
+        ['file1.txt'],
+    ]
+    assert not journal.path.exists()
+
+
+def test_batch_confirmation_gives_up(tmp_path, files, fake_manager):
+    """Test that a file never matching its upload fails the batch."""
+    journal = JobJournal(tmp_path / 'journal.jsonl')
+    manager = fake_manager()
+    manager.confirm_uploads = lambda remote_path, expected: ['file3.txt']
+
+    with pytest.raises(IOError, match='file3.txt'):
+        BatchUploader({'batch_confirm': True}, manager, journal).upload(
+            TransferPlanner.plan(files),
+            '/upload',
+        )
+
+    _, plan = journal.pending()
+    assert planned_names(plan) == ['file3.txt']
+
+
+@pytest.mark.parametrize('clock_skew', [-3600, 0, 3600])
+def test_confirm_mtime_ignores_server_clock(files, clock_skew, fake_manager):
+    """Test that stamped uploads are confirmed whatever the server time."""
+    for index, path in enumerate(files):
+        os.utime(path, (1_700_000_000.5 + index, 1_700_000_000.5 + index))
+    fake_manager.clock_skew = clock_skew
+    manager = fake_manager()
+    config = {'batch_confirm': True, 'confirm_mtime': True}
+
+    BatchUploader(config, manager).upload(TransferPlanner.plan(files), '/up')
+
+    assert len(manager.uploaded) == len(files)
+    assert manager.remote['/up/file2.txt'] == (3, 1_700_000_002)
+
+
+def test_confirm_mtime_resends_files_changed_after_upload(
+    files,
+    fake_manager,
+):
+    """Test sending a file again when it changed once it was sent."""
+    manager = fake_manager()
+    upload_file = manager.upload_file
+
+    def upload_then_touch(local_path, remote_path, **kwargs):
+        upload_file(local_path, remote_path, **kwargs)
+        if len(manager.uploaded) == 1:
+            mtime = local_path.stat().st_mtime + 10
+            os.utime(local_path, (mtime, mtime))
+
+    manager.upload_file = upload_then_touch
+    config = {'batch_confirm': True, 'confirm_mtime': True}
+
+    BatchUploader(config, manager).upload(TransferPlanner.plan(files), '/up')
+
+    assert manager.uploaded.count(manager.uploaded[0]) == 2  # noqa: PLR2004
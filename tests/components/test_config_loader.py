@@ -0,0 +1,69 @@
+import pytest
+
+from sftp_file_transfer.components.config_loader import load_config
+
+MEGABYTE = 1024 * 1024
+
+
+@pytest.fixture
+def env(monkeypatch, tmp_path):
+    values = {
+        'SFTP_HOST': 'sftp.example.com',
+        'SFTP_PORT': '2222',
+        'SFTP_USER': 'user',
+        'SFTP_PASSWORD': 'pw',
+        'SFTP_TRANSPORT_PROFILE': str(tmp_path / 'missing.json'),
+    }
+    for name, value in values.items():
+        monkeypatch.setenv(name, value)
+    return monkeypatch
+
+
+def test_load_config_defaults(env):
+    """Test the settings when only the connection is configured."""
+    config = load_config()
+
+    assert config['sftp_host'] == 'sftp.example.com'
+    assert config['sftp_port'] == 2222  # noqa: PLR2004
+    assert not config['delta_transfer']
+    assert not config['batch_confirm']
+    assert 'segment_threshold' not in config
+    assert 'transforms' not in config
+
+
+def test_load_config_without_password(env):
+    """Test that keys given elsewhere can replace the password."""
+    env.delenv('SFTP_PASSWORD')
+    env.delenv('SFTP_KEY_FILE', raising=False)
+    env.delenv('SFTP_USE_AGENT', raising=False)
+
+    config = load_config()
+
+    assert not config['sftp_password']
+    assert config['key_filepath'] is None
+
+
+def test_load_config_reads_transfer_settings(env):
+    """Test that every transfer setting is read from the environment."""
+    env.setenv('SFTP_KEY_FILE', '/keys/id_ed25519')
+    env.setenv('SFTP_USE_AGENT', '1')
+    env.setenv('DELTA_TRANSFER', '1')
+    env.setenv('BATCH_CONFIRM', '1')
+    env.setenv('TRANSFORMS', 'gzip;encrypt')
+    env.setenv('COMPRESSION_LEVEL', '3')
+    env.setenv('SEGMENT_THRESHOLD_MB', '100')
+    env.setenv('SEGMENT_CONCURRENCY', '8')
+    env.setenv('SSH_KEEPALIVE', '30')
+
+    config = load_config()
+
+    assert config['key_filepath'] == '/keys/id_ed25519'
+    assert config['use_agent']
+    assert config['delta_transfer']
+    assert config['batch_confirm']
+    assert config['transforms'] == ['gzip', 'encrypt']
+    assert config['compression_level'] == 3  # noqa: PLR2004
+    assert config['segment_threshold'] == 100 * MEGABYTE
+    assert config['segment_size'] == 256 * MEGABYTE
+    assert config['segment_concurrency'] == 8  # noqa: PLR2004
+    assert config['keepalive'] == 30  # noqa: PLR2004
@@ -0,0 +1,139 @@
+import json
+
+import pytest
+
+from sftp_file_transfer.components import deduplicator
+from sftp_file_transfer.components.deduplicator import Deduplicator
+
+
+@pytest.fixture
+def sources(tmp_path):
+    first = tmp_path / 'first'
+    second = tmp_path / 'second'
+    first.mkdir()
+    second.mkdir()
+    (first / 'shared.csv').write_bytes(b'same content')
+    (second / 'shared.csv').write_bytes(b'same content')
+    (second / 'copy.csv').write_bytes(b'same content')
+    (first / 'report.csv').write_bytes(b'first report')
+    (second / 'report.csv').write_bytes(b'other report')
+    (first / 'unique.csv').write_bytes(b'unique size content')
+    return first, second
+
+
+def _files(sources):
+    return [path for source in sources for path in sorted(source.iterdir())]
+
+
+def test_deduplicate_sends_each_content_once(sources):
+    """Test keeping the first file of each content, renaming collisions."""
+    first, second = sources
+
+    result = Deduplicator(processes=1).deduplicate(_files(sources))
+
+    assert [entry['path'] for entry in result['entries']] == [
+        first / 'report.csv',
+        first / 'shared.csv',
+        first / 'unique.csv',
+        second / 'report.csv',
+    ]
+    assert result['duplicates'] == {
+        str(second / 'copy.csv'): str(first / 'shared.csv'),
+        str(second / 'shared.csv'): str(first / 'shared.csv'),
+    }
+    assert result['collisions'] == {
+        'report.csv': [str(first / 'report.csv'), str(second / 'report.csv')],
+    }
+    digest = deduplicator.hash_file(str(second / 'report.csv'))
+    assert result['entries'][-1]['remote_name'] == f'report-{digest[:8]}.csv'
+
+
+def test_deduplicate_renames_collisions_of_different_sizes(tmp_path):
+    """Test renaming a collision whose size is unique."""
+    (tmp_path / 'a').mkdir()
+    (tmp_path / 'b').mkdir()
+    (tmp_path / 'a' / 'data.bin').write_bytes(b'short')
+    (tmp_path / 'b' / 'data.bin').write_bytes(b'much longer')
+
+    result = Deduplicator(processes=1).deduplicate(
+        [tmp_path / 'a' / 'data.bin', tmp_path / 'b' / 'data.bin'],
+    )
+
+    kept, renamed = result['entries']
+    assert 'remote_name' not in kept
+    assert renamed['remote_name'].startswith('data-')
+
+
+def test_deduplicate_skips_collisions(sources):
+    """Test only sending the first file of a colliding name."""
+    first, _ = sources
+
+    result = Deduplicator(processes=1, collisions='skip').deduplicate(
+        _files(sources),
+    )
+
+    assert [entry['path'] for entry in result['entries']] == [
+        first / 'report.csv',
+        first / 'shared.csv',
+        first / 'unique.csv',
+    ]
+    assert all('remote_name' not in entry for entry in result['entries'])
+    assert 'report.csv' in result['collisions']
+
+
+def test_deduplicate_rejects_collisions(sources):
+    """Test raising on colliding names with the error policy."""
+    with pytest.raises(ValueError, match='report.csv'):
+        Deduplicator(processes=1, collisions='error').deduplicate(
+            _files(sources),
+        )
+
+
+def test_invalid_collision_policy():
+    """Test rejecting an unknown collision policy."""
+    with pytest.raises(ValueError, match='Invalid collision policy'):
+        Deduplicator(collisions='overwrite')
+
+
+def test_hash_cache_skips_unchanged_files(tmp_path, sources, monkeypatch):
+    """Test reusing cached hashes until a file changes."""
+    cache_path = tmp_path / 'cache' / 'hashes.json'
+    files = _files(sources)
+    Deduplicator(cache_path, processes=2).deduplicate(files)
+    assert len(json.loads(cache_path.read_text())) == len(files) - 1
+
+    hashed = []
+    real_hash_file = deduplicator.hash_file
+
+    def counting_hash_file(path):
+        hashed.append(path)
+        return real_hash_file(path)
+
+    monkeypatch.setattr(deduplicator, 'hash_file', counting_hash_file)
+    Deduplicator(cache_path, processes=1).deduplicate(files)
+    assert hashed == []
+
+    changed = sources[1] / 'copy.csv'
+    changed.write_bytes(b'new content!')
+    result = Deduplicator(cache_path, processes=1).deduplicate(files)
+    assert hashed == [str(changed)]
+    assert str(changed) not in result['duplicates']
+
+
+def test_hash_cache_drops_removed_files(tmp_path, sources):
+    """Test pruning the cached hashes of files that no longer exist."""
+    cache_path = tmp_path / 'hashes.json'
+    files = _files(sources)
+    Deduplicator(cache_path, processes=1).deduplicate(files)
+    removed = sources[1] / 'copy.csv'
+    removed.unlink()
+    files.remove(removed)
+    (sources[0] / 'copy.csv').write_bytes(b'first report')
+
+    Deduplicator(cache_path, processes=1).deduplicate(
+        [*files, sources[0] / 'copy.csv'],
+    )
+
+    cache = json.loads(cache_path.read_text())
+    assert str(removed) not in cache
+    assert str(sources[0] / 'copy.csv') in cache
@@ -0,0 +1,304 @@
+import itertools
+import json
+import os
+
+import pytest
+from paramiko import SFTPAttributes
+
+from sftp_file_transfer.components.delta_sync import DeltaSync
+
+BLOCK_SIZE = 64
+
+
+def _apply(old, new, ops):
+    """Rebuild the new content from the old one and the delta operations."""
+    out = bytearray()
+    for kind, offset, length in ops:
+        source = old if kind == 'copy' else new
+        out += source[offset : offset + length]
+    return bytes(out)
+
+
+def test_signature_does_not_depend_on_chunking():
+    """Test that the signature is the same for any chunk boundaries."""
+    data = os.urandom(1000)
+
+    whole = DeltaSync.signature([data], BLOCK_SIZE)
+    chunked = DeltaSync.signature(
+        [data[i : i + 37] for i in range(0, len(data), 37)],
+        BLOCK_SIZE,
+    )
+
+    assert whole == chunked
+    assert len(whole['blocks']) == -(-len(data) // BLOCK_SIZE)
+
+
+def test_is_append():
+    """Test detecting content that only appends to the old file."""
+    old = os.urandom(1000)
+    signature = DeltaSync.signature([old], BLOCK_SIZE)
+
+    assert DeltaSync.is_append(old + b'new rows', signature)
+    assert not DeltaSync.is_append(b'x' + old, signature)
+    assert not DeltaSync.is_append(old[:-1], signature)
+
+
+def test_compute_delta_for_in_place_edit():
+    """Test that an in-place edit only sends the changed block."""
+    old = os.urandom(1000)
+    new = bytearray(old)
+    new[300:310] = b'0123456789'
+    signature = DeltaSync.signature([old], BLOCK_SIZE)
+
+    ops = DeltaSync.compute_delta(new, signature)
+
+    assert _apply(old, new, ops) == bytes(new)
+    assert DeltaSync.is_in_place(ops)
+    assert sum(n for kind, _, n in ops if kind == 'data') == BLOCK_SIZE
+
+
+def test_compute_delta_for_insertion():
+    """Test that blocks shifted by an insertion are found by rolling."""
+    old = os.urandom(1000)
+    new = old[:100] + b'inserted' + old[100:]
+    signature = DeltaSync.signature([old], BLOCK_SIZE)
+
+    ops = DeltaSync.compute_delta(new, signature)
+
+    assert _apply(old, new, ops) == new
+    assert not DeltaSync.is_in_place(ops)
+    assert sum(n for kind, _, n in ops if kind == 'data') < 2 * BLOCK_SIZE
+
+
+def test_compute_delta_for_unrelated_content():
+    """Test that a delta is not proposed for unrelated content."""
+    signature = DeltaSync.signature([os.urandom(1000)], BLOCK_SIZE)
+
+    assert DeltaSync.compute_delta(os.urandom(1000), signature) is None
+
+
+class _FakeRemoteFile:
+    """An open remote file of a fake server."""
+
+    def __init__(self, server, path):
+        self.server = server
+        self.handle = path
+        self.position = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def prefetch(self, size=None):
+        pass
+
+    def set_pipelined(self, pipelined=True):
+        pass
+
+    def seek(self, offset):
+        self.position = offset
+
+    def read(self, size=None):
+        content = self.server.files[self.handle]
+        end = len(content) if size is None else self.position + size
+        data = bytes(content[self.position : end])
+        self.position += len(data)
+        return data
+
+    def readv(self, chunks):
+        content = self.server.files[self.handle]
+        for offset, length in chunks:
+            self.server.read_back += length
+            yield bytes(content[offset : offset + length])
+
+    def write(self, data):
+        if not self.handle.endswith('.sftpsig'):
+            self.server.sent += len(data)
+        self.server.place(self.handle, self.position, data)
+        self.position += len(data)
+
+
+class _FakeSFTP:
+    """An in-memory SFTP client, with or without the `copy-data` extension."""
+
+    def __init__(self, copy_data=True):
+        self.copy_data = copy_data
+        self.files = {}
+        self.mtimes = {}
+        self.clock = itertools.count(1000)
+        self.sent = 0
+        self.read_back = 0
+
+    def place(self, path, offset, data):
+        content = self.files[path]
+        end = offset + len(data)
+        content[len(content) : end] = bytes(max(0, end - len(content)))
+        content[offset:end] = data
+        self.mtimes[path] = next(self.clock)
+
+    def stat(self, path):
+        if path not in self.files:
+            raise FileNotFoundError(path)
+        attributes = SFTPAttributes()
+        attributes.st_size = len(self.files[path])
+        attributes.st_mtime = self.mtimes[path]
+        return attributes
+
+    def open(self, path, mode='r', bufsize=-1):
+        if 'w' in mode:
+            self.files[path] = bytearray()
+            self.mtimes[path] = next(self.clock)
+        elif path not in self.files:
+            raise FileNotFoundError(path)
+        return _FakeRemoteFile(self, path)
+
+    def _request(self, command, name, *args):
+        if not self.copy_data:
+            raise IOError('Operation unsupported')
+        source, offset, length, target, at = args
+        data = self.files[source][offset : offset + length]
+        self.place(target, at, data)
+
+    def posix_rename(self, old_path, new_path):
+        self.files[new_path] = self.files.pop(old_path)
+        self.mtimes[new_path] = self.mtimes.pop(old_path)
+
+    def remove(self, path):
+        if path not in self.files:
+            raise FileNotFoundError(path)
+        del self.files[path]
+
+
+def _upload(sftp, local_path, content, full_uploads, verify_all=False):
+    """Write the local file and delta upload it to `/data.bin`."""
+    local_path.write_bytes(content)
+
+    def full_upload():
+        full_uploads.append(local_path)
+        with sftp.open('/data.bin', 'wb') as remote_file:
+            remote_file.write(content)
+        return sftp.stat('/data.bin')
+
+    sftp.sent = 0
+    sftp.read_back = 0
+    return DeltaSync.upload(
+        sftp,
+        local_path,
+        '/data.bin',
+        full_upload,
+        block_size=BLOCK_SIZE,
+        verify_all=verify_all,
+    )
+
+
+@pytest.fixture
+def old():
+    return os.urandom(1000)
+
+
+def test_upload_append(tmp_path, old):
+    """Test that an append only sends the new tail."""
+    sftp = _FakeSFTP(copy_data=False)
+    full_uploads = []
+    _upload(sftp, tmp_path / 'data.bin', old, full_uploads)
+
+    result = _upload(sftp, tmp_path / 'data.bin', old + b'tail', full_uploads)
+
+    assert sftp.files['/data.bin'] == old + b'tail'
+    assert result.st_size == len(old) + len(b'tail')
+    assert len(full_uploads) == 1
+    assert sftp.sent < BLOCK_SIZE
+    # Only the last block, which holds the tail, is read back.
+    assert sftp.read_back == len(old) % BLOCK_SIZE + len(b'tail')
+
+
+def test_upload_detects_bad_write(tmp_path, old, monkeypatch):
+    """Test sending the file whole when a written block does not match."""
+    sftp = _FakeSFTP(copy_data=False)
+    full_uploads = []
+    _upload(sftp, tmp_path / 'data.bin', old, full_uploads)
+    append = DeltaSync._append
+
+    def corrupt_append(sftp, remote_path, view, old_size):
+        append(sftp, remote_path, view, old_size)
+        sftp.files[remote_path][-1] ^= 0xFF
+
+    monkeypatch.setattr(DeltaSync, '_append', staticmethod(corrupt_append))
+
+    _upload(sftp, tmp_path / 'data.bin', old + b'tail', full_uploads)
+
+    assert sftp.files['/data.bin'] == old + b'tail'
+    assert len(full_uploads) == 2  # noqa: PLR2004
+
+
+def test_upload_patch(tmp_path, old):
+    """Test that an in-place edit is patched into a copy of the file."""
+    sftp = _FakeSFTP()
+    full_uploads = []
+    _upload(sftp, tmp_path / 'data.bin', old, full_uploads)
+    new = bytearray(old)
+    new[300:310] = b'0123456789'
+
+    _upload(sftp, tmp_path / 'data.bin', bytes(new[:990]), full_uploads)
+
+    assert sftp.files['/data.bin'] == new[:990]
+    assert len(full_uploads) == 1
+    assert sftp.sent < 2 * BLOCK_SIZE
+    assert sftp.read_back <= 2 * BLOCK_SIZE
+    assert '/data.bin.delta-tmp' not in sftp.files
+
+
+def test_upload_rebuild(tmp_path, old):
+    """Test that shifted blocks are copied server-side."""
+    sftp = _FakeSFTP()
+    full_uploads = []
+    _upload(sftp, tmp_path / 'data.bin', old, full_uploads)
+    new = old[:100] + b'inserted' + old[100:]
+
+    _upload(sftp, tmp_path / 'data.bin', new, full_uploads)
+
+    assert sftp.files['/data.bin'] == new
+    assert len(full_uploads) == 1
+    assert sftp.sent < 2 * BLOCK_SIZE
+
+
+def test_upload_without_copy_data(tmp_path, old):
+    """Test falling back to a full upload without server-side copies."""
+    sftp = _FakeSFTP(copy_data=False)
+    full_uploads = []
+    _upload(sftp, tmp_path / 'data.bin', old, full_uploads)
+    new = old[:100] + b'inserted' + old[100:]
+
+    _upload(sftp, tmp_path / 'data.bin', new, full_uploads)
+
+    assert sftp.files['/data.bin'] == new
+    assert len(full_uploads) == 2  # noqa: PLR2004
+    assert '/data.bin.delta-tmp' not in sftp.files
+
+
+def test_upload_with_stale_signature(tmp_path, old):
+    """Test that a full check catches a sidecar not matching the file."""
+    sftp = _FakeSFTP()
+    full_uploads = []
+    _upload(sftp, tmp_path / 'data.bin', old, full_uploads)
+    # The remote file changes behind the sidecar's back, keeping its
+    # size and mtime.
+    mtime = sftp.mtimes['/data.bin']
+    sftp.place('/data.bin', 0, b'changed!')
+    sftp.mtimes['/data.bin'] = mtime
+    sidecar = json.loads(sftp.files['/data.bin.sftpsig'])
+    assert sidecar['mtime'] == mtime
+
+    _upload(
+        sftp,
+        tmp_path / 'data.bin',
+        old + b'tail',
+        full_uploads,
+        verify_all=True,
+    )
+
+    assert sftp.files['/data.bin'] == old + b'tail'
+    assert len(full_uploads) == 2  # noqa: PLR2004
+    assert sftp.read_back == 0
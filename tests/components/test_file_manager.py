@@ -1,7 +1,11 @@
+import os
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 from pathlib import Path
 
 import pytest
 
+from sftp_file_transfer.components import file_manager as fm_module
 from sftp_file_transfer.components.file_manager import FileManager
 
 
@@ -146,3 +150,54 @@ def test_copy_files_to_non_existent_directory(tmp_path):
     # Check if the file was copied correctly
     copied_file = dest_dir / 'file1.txt'
     assert copied_file.exists()
+
+
+class _CountingScandir:
+    """Wrap `os.scandir`, recording the entries whose stat is taken."""
+
+    def __init__(self, stats):
+        self.stats = stats
+        self.scandir = os.scandir
+
+    def __call__(self, path):
+        stats = self.stats
+
+        class Entry:
+            def __init__(self, entry):
+                self.entry = entry
+                self.name = entry.name
+                self.is_file = entry.is_file
+
+            def stat(self):
+                stats.append(self.name)
+                return self.entry.stat()
+
+        @contextmanager
+        def scan():
+            with self.scandir(path) as entries:
+                yield (Entry(entry) for entry in entries)
+
+        return scan()
+
+
+def test_select_files(tmp_path, monkeypatch):
+    """Test selecting files by extension and date, stat'ing each once."""
+    first = tmp_path / 'first'
+    second = tmp_path / 'second'
+    first.mkdir()
+    second.mkdir()
+    (first / 'today.txt').write_bytes(b'abc')
+    (first / 'today.py').touch()
+    (second / 'old.txt').touch()
+    old = (datetime.now() - timedelta(days=3)).timestamp()
+    os.utime(second / 'old.txt', (old, old))
+    (second / 'subdir.txt').mkdir()
+    stats = []
+    monkeypatch.setattr(fm_module.os, 'scandir', _CountingScandir(stats))
+
+    entries = FileManager.select_files([first, second], '.txt', t_delta=0)
+
+    assert [(entry['path'], entry['size']) for entry in entries] == [
+        (first / 'today.txt', 3),
+    ]
+    assert sorted(stats) == ['old.txt', 'today.txt']
@@ -0,0 +1,72 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from sftp_file_transfer.components.batch_uploader import BatchUploader
+from sftp_file_transfer.components.job_journal import JobJournal
+from sftp_file_transfer.components.transfer_planner import TransferPlanner
+from tests.conftest import planned_names
+
+
+def test_pending_skips_completed_files(tmp_path, files):
+    """Test that only files not marked as done are pending."""
+    journal = JobJournal(tmp_path / 'state' / 'journal.jsonl')
+    journal.start(TransferPlanner.plan(files, workers=2), '/upload')
+    journal.mark_done(files[0])
+    journal.mark_done(files[2])
+
+    remote_path, plan = journal.pending()
+
+    assert remote_path == '/upload'
+    assert planned_names(plan) == ['file1.txt', 'file3.txt']
+
+
+def test_pending_without_journal(tmp_path):
+    """Test that there is nothing to resume without a journal."""
+    assert JobJournal(tmp_path / 'journal.jsonl').pending() is None
+
+
+def test_pending_discards_torn_record(tmp_path, files):
+    """Test recovering from a crash in the middle of a record."""
+    journal = JobJournal(tmp_path / 'journal.jsonl')
+    journal.start(TransferPlanner.plan(files), '/upload')
+    journal.mark_done(files[0])
+    with journal.path.open('a') as f:
+        f.write('{"type": "done", "pa')
+
+    _, plan = journal.pending()
+    journal.mark_done(files[1])
+    _, plan_after_repair = journal.pending()
+
+    assert planned_names(plan) == ['file1.txt', 'file2.txt', 'file3.txt']
+    assert planned_names(plan_after_repair) == ['file2.txt', 'file3.txt']
+
+
+def test_concurrent_mark_done(tmp_path, files):
+    """Test that records from parallel workers are not interleaved."""
+    journal = JobJournal(tmp_path / 'journal.jsonl')
+    journal.start(TransferPlanner.plan(files * 50), '/upload')
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(journal.mark_done, files * 50))
+
+    _, plan = journal.pending()
+    assert planned_names(plan) == []
+
+
+def test_resume_interrupted_batch(tmp_path, files, fake_manager):
+    """Test that a failed batch resumes with the remaining files only."""
+    journal = JobJournal(tmp_path / 'journal.jsonl')
+    plan = TransferPlanner.plan(files)
+    manager = fake_manager()
+
+    fake_manager.fail_on = 'file2.txt'
+    with pytest.raises(OSError, match='connection lost'):
+        BatchUploader({}, manager, journal).upload(plan, '/upload')
+    fake_manager.fail_on = None
+    resumed = BatchUploader({}, manager, journal).resume()
+
+    assert resumed
+    assert manager.uploaded[2:] == ['/upload/file2.txt', '/upload/file3.txt']
+    assert not journal.path.exists()
+    assert not BatchUploader({}, manager, journal).resume()
@@ -0,0 +1,95 @@
+import os
+import threading
+import time
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from paramiko.agent import AgentSSH
+
+from sftp_file_transfer.components import key_store
+from sftp_file_transfer.components.key_store import KeyStore
+
+
+def _write_key(path, private_key, password=None):
+    encryption = (
+        serialization.BestAvailableEncryption(password.encode())
+        if password
+        else serialization.NoEncryption()
+    )
+    path.write_bytes(
+        private_key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.OpenSSH,
+            encryption,
+        )
+    )
+    return path
+
+
+@pytest.fixture(autouse=True)
+def _clear_key_store():
+    KeyStore.clear()
+    yield
+    KeyStore.clear()
+
+
+@pytest.mark.parametrize(
+    ('private_key', 'name'),
+    [
+        (ed25519.Ed25519PrivateKey.generate(), 'ssh-ed25519'),
+        (ec.generate_private_key(ec.SECP256R1()), 'ecdsa-sha2-nistp256'),
+    ],
+)
+def test_load_detects_key_type(tmp_path, private_key, name):
+    """Test loading modern key types from the same option."""
+    path = _write_key(tmp_path / 'id', private_key, password='secret')
+
+    assert KeyStore.load(path, 'secret').get_name() == name
+
+
+def test_load_is_cached(tmp_path):
+    """Test that a key file is only read once."""
+    path = _write_key(tmp_path / 'id', ed25519.Ed25519PrivateKey.generate())
+
+    assert KeyStore.load(path) is KeyStore.load(str(path))
+
+
+def test_load_reads_changed_file(tmp_path):
+    """Test that a replaced key file is read again."""
+    path = _write_key(tmp_path / 'id', ed25519.Ed25519PrivateKey.generate())
+    first = KeyStore.load(path)
+    _write_key(path, ed25519.Ed25519PrivateKey.generate())
+    mtime = path.stat().st_mtime + 1
+    os.utime(path, (mtime, mtime))
+
+    assert KeyStore.load(path) != first
+
+
+def test_agent_requests_do_not_interleave(monkeypatch):
+    """Test that concurrent signatures wait for each other's replies."""
+    monkeypatch.delenv('SSH_AUTH_SOCK', raising=False)
+    state = {'active': 0, 'peak': 0}
+    lock = threading.Lock()
+
+    def send_message(self, msg):
+        with lock:
+            state['active'] += 1
+            state['peak'] = max(state['peak'], state['active'])
+        time.sleep(0.01)
+        with lock:
+            state['active'] -= 1
+        return 14, msg
+
+    monkeypatch.setattr(AgentSSH, '_send_message', send_message)
+    agent = key_store._SerializedAgent()
+    threads = [
+        threading.Thread(target=agent._send_message, args=(b'sign',))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert state['peak'] == 1
@@ -0,0 +1,85 @@
+import stat
+
+import pytest
+from paramiko import SFTPAttributes
+
+from sftp_file_transfer.components.retention import (
+    SECONDS_PER_DAY,
+    Retention,
+)
+
+NOW = 1_000 * SECONDS_PER_DAY
+
+
+def _entry(name, age_days, size=10, mode=stat.S_IFREG):
+    entry = SFTPAttributes()
+    entry.filename = name
+    entry.st_mtime = NOW - age_days * SECONDS_PER_DAY
+    entry.st_size = size
+    entry.st_mode = mode | 0o644
+    return entry
+
+
+@pytest.fixture
+def listing():
+    return [
+        _entry('day0.csv', 0),
+        _entry('day1.csv', 1),
+        _entry('day2.csv', 2),
+        _entry('day3.log', 3),
+        _entry('archive', 10, mode=stat.S_IFDIR),
+    ]
+
+
+def _names(entries):
+    return [e.filename for e in entries]
+
+
+def test_select_by_age(listing):
+    """Test selecting files older than the maximum age."""
+    selected = Retention.select_for_removal(
+        listing,
+        {'max_age_days': 1.5},
+        now=NOW,
+    )
+
+    assert _names(selected) == ['day2.csv', 'day3.log']
+
+
+def test_select_by_count(listing):
+    """Test keeping only the newest files."""
+    selected = Retention.select_for_removal(listing, {'keep_last': 1}, NOW)
+
+    assert _names(selected) == ['day1.csv', 'day2.csv', 'day3.log']
+
+
+def test_select_by_total_size(listing):
+    """Test keeping the newest files within a size budget."""
+    selected = Retention.select_for_removal(
+        listing,
+        {'max_total_bytes': 25},
+        now=NOW,
+    )
+
+    assert _names(selected) == ['day2.csv', 'day3.log']
+
+
+def test_select_with_pattern(listing):
+    """Test only considering files matching the pattern."""
+    selected = Retention.select_for_removal(
+        listing,
+        {'max_age_days': 0.5, 'pattern': '*.csv'},
+        now=NOW,
+    )
+
+    assert _names(selected) == ['day1.csv', 'day2.csv']
+
+
+def test_select_removes_sidecar_with_its_file(listing):
+    """Test that delta sidecars follow their file."""
+    listing.append(_entry('day0.csv.sftpsig', 0))
+    listing.append(_entry('day2.csv.sftpsig', 0))
+
+    selected = Retention.select_for_removal(listing, {'keep_last': 2}, NOW)
+
+    assert _names(selected) == ['day2.csv', 'day2.csv.sftpsig', 'day3.log']
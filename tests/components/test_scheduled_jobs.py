@@ -0,0 +1,144 @@
+import json
+import os
+import threading
+from pathlib import Path
+
+import pytest
+
+from sftp_file_transfer.components.job_journal import JobJournal
+from sftp_file_transfer.components.scheduled_jobs import JobRunner
+from sftp_file_transfer.components.transfer_limiter import TransferLimiter
+from sftp_file_transfer.components.transfer_planner import TransferPlanner
+
+
+@pytest.fixture
+def job(tmp_path):
+    return {
+        'name': 'reports',
+        'local_paths': [str(tmp_path)],
+        'remote_path': '/upload',
+        'every_minutes': 5,
+        'journal_path': str(tmp_path / 'reports.jsonl'),
+    }
+
+
+def test_job_overrides_connection(job, unreachable_config):
+    """Test that a job may send to another target."""
+    job['sftp_host'] = 'backup.example.com'
+
+    runner = JobRunner(unreachable_config, job)
+
+    assert runner.config['sftp_host'] == 'backup.example.com'
+    assert unreachable_config['sftp_host'] == '127.0.0.1'
+
+
+@pytest.mark.parametrize(
+    'triggers',
+    [{}, {'every_minutes': 5, 'at': '00:01:01'}],
+)
+def test_job_needs_exactly_one_trigger(job, triggers, unreachable_config):
+    """Test rejecting jobs without a trigger or with several."""
+    del job['every_minutes']
+    job.update(triggers)
+
+    with pytest.raises(ValueError, match='exactly one of'):
+        JobRunner(unreachable_config, job)
+
+
+def test_job_needs_a_source(job, unreachable_config):
+    """Test rejecting jobs without local directories."""
+    del job['local_paths']
+
+    with pytest.raises(ValueError, match='missing local_paths'):
+        JobRunner(unreachable_config, job)
+
+
+def test_load_jobs_rejects_duplicate_names(tmp_path, job):
+    """Test that every job has its own name."""
+    jobs_file = tmp_path / 'jobs.json'
+    jobs_file.write_text(json.dumps([job, job]))
+
+    with pytest.raises(ValueError, match='Duplicate job names: reports'):
+        JobRunner.load_jobs(jobs_file)
+
+
+def test_running_job_is_not_started_again(job, unreachable_config):
+    """Test that a run is skipped while the previous one is running."""
+    runner = JobRunner(unreachable_config, job)
+
+    with runner._running:
+        assert not runner.run()
+
+
+def test_run_resumes_before_planning(job, unreachable_config, fake_manager):
+    """Test that journaled files are not sent again by the new batch."""
+    data = Path(job['local_paths'][0])
+    paths = {}
+    for name in ('done', 'pending', 'changed', 'new'):
+        paths[name] = data / f'{name}.csv'
+        paths[name].write_text(name)
+    journal = JobJournal(job['journal_path'])
+    journal.start(
+        TransferPlanner.plan([
+            paths['done'],
+            paths['pending'],
+            paths['changed'],
+        ]),
+        '/upload',
+    )
+    journal.mark_done(paths['done'])
+    journal.mark_done(paths['changed'])
+    mtime = paths['changed'].stat().st_mtime + 60
+    os.utime(paths['changed'], (mtime, mtime))
+    job['file_extension'] = '.csv'
+
+    assert JobRunner(unreachable_config, job).run()
+
+    resumed, *planned = fake_manager.uploaded
+    assert resumed == '/upload/pending.csv'
+    assert sorted(planned) == ['/upload/changed.csv', '/upload/new.csv']
+
+
+def test_run_without_files_does_not_connect(
+    job,
+    unreachable_config,
+    fake_manager,
+):
+    """Test that an empty batch never opens a session."""
+    assert JobRunner(unreachable_config, job).run()
+    assert fake_manager.most_sessions == 0
+
+
+def test_jobs_share_connection_slots(
+    tmp_path, unreachable_config, job, fake_manager
+):
+    """Test that concurrent jobs never hold more sessions than allowed."""
+    limiter = TransferLimiter(max_connections=1)
+    fake_manager.delay = 0.01
+    runners = []
+    for name in ('first', 'second'):
+        data = tmp_path / name
+        data.mkdir()
+        for index in range(3):
+            (data / f'{name}-{index}.csv').write_text(name)
+        runners.append(
+            JobRunner(
+                unreachable_config,
+                {
+                    **job,
+                    'name': name,
+                    'local_paths': [str(data)],
+                    'journal_path': str(tmp_path / f'{name}.jsonl'),
+                    'workers': 2,
+                },
+                limiter,
+            ),
+        )
+    threads = [threading.Thread(target=runner.run) for runner in runners]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(fake_manager.uploaded) == 6  # noqa: PLR2004
+    assert fake_manager.most_sessions == 1
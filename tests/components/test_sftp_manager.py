@@ -1,6 +1,28 @@
+import errno
+import itertools
+import os
+import threading
+import time
+from collections import deque
+
 import pytest
+from paramiko import (
+    AuthenticationException,
+    Message,
+    SFTPAttributes,
+    SFTPClient,
+)
+from paramiko.sftp import (
+    CMD_FSETSTAT,
+    CMD_STATUS,
+    SFTP_NO_SUCH_FILE,
+    SFTP_OK,
+    SFTP_PERMISSION_DENIED,
+)
 
+from sftp_file_transfer.components import sftp_manager
 from sftp_file_transfer.components.sftp_manager import SFTPManager
+from sftp_file_transfer.components.transfer_limiter import TransferLimiter
 
 
 def test_sftp_connection(sftp_fixture):
@@ -82,3 +104,533 @@ def test_sftp_fetch(sftp_fixture, tmp_path):
                 local_file.read_text()
                 == 'This is a test file for pytest-sftpserver.'
             )  # noqa
+
+
+def test_split_segments():
+    """Test splitting a file size into contiguous byte ranges."""
+    segments = SFTPManager.split_segments(size=25, segment_size=10)
+
+    assert segments == [(0, 10), (10, 10), (20, 5)]
+
+
+def test_split_segments_with_invalid_segment_size():
+    """Test splitting a file size with a non-positive segment size."""
+    with pytest.raises(ValueError, match='must be positive'):
+        SFTPManager.split_segments(size=25, segment_size=0)
+
+
+def test_prefer_algorithms():
+    """Test offering the preferred algorithms before the others."""
+    algorithms = SFTPManager.prefer(('a', 'b', 'c'), ['c'])
+
+    assert algorithms == ('c', 'a', 'b')
+
+
+def test_prefer_unsupported_algorithm():
+    """Test preferring an algorithm that is not supported."""
+    with pytest.raises(ValueError, match='Unsupported SSH algorithms: d'):
+        SFTPManager.prefer(('a', 'b', 'c'), ['d'])
+
+
+def _attributes(filename, size, mtime):
+    attributes = SFTPAttributes()
+    attributes.filename = filename
+    attributes.st_size = size
+    attributes.st_mtime = mtime
+    return attributes
+
+
+class _FakeAuthTransport:
+    """Accept only the given credentials and record every attempt."""
+
+    def __init__(self, accepted):
+        self.accepted = accepted
+        self.attempts = []
+
+    def start_client(self):
+        pass
+
+    def auth_publickey(self, user, key):
+        self.attempts.append(key)
+        if key not in self.accepted:
+            raise AuthenticationException(f'{key} rejected')
+
+    def auth_password(self, user, password):
+        self.attempts.append('password')
+        if 'password' not in self.accepted:
+            raise AuthenticationException('password rejected')
+
+
+@pytest.fixture
+def auth_manager(unreachable_config, monkeypatch):
+    monkeypatch.setattr(
+        sftp_manager.KeyStore,
+        'agent_keys',
+        staticmethod(lambda: ['agent-1', 'agent-2']),
+    )
+    monkeypatch.setattr(
+        sftp_manager.KeyStore,
+        'load',
+        staticmethod(lambda path, password: 'key-file'),
+    )
+    return SFTPManager({
+        **unreachable_config,
+        'key_filepath': 'id_ed25519',
+        'use_agent': True,
+    })
+
+
+@pytest.mark.parametrize(
+    ('accepted', 'attempts'),
+    [
+        (['agent-2'], ['agent-1', 'agent-2']),
+        (['key-file'], ['agent-1', 'agent-2', 'key-file']),
+        (['password'], ['agent-1', 'agent-2', 'key-file', 'password']),
+    ],
+)
+def test_authenticate_order(auth_manager, accepted, attempts):
+    """Test trying the agent keys, then the key file, then the password."""
+    transport = _FakeAuthTransport(accepted)
+
+    auth_manager._authenticate(transport)
+
+    assert transport.attempts == attempts
+
+
+def test_authenticate_without_password(auth_manager):
+    """Test raising the last key error when there is no password."""
+    auth_manager.password = None
+    transport = _FakeAuthTransport([])
+
+    with pytest.raises(AuthenticationException, match='key-file rejected'):
+        auth_manager._authenticate(transport)
+    assert transport.attempts == ['agent-1', 'agent-2', 'key-file']
+
+
+def test_authenticate_with_password_only(unreachable_config):
+    """Test using the password when no key is configured."""
+    transport = _FakeAuthTransport(['password'])
+
+    SFTPManager(unreachable_config)._authenticate(transport)
+
+    assert transport.attempts == ['password']
+
+
+def test_authenticate_without_credentials(unreachable_config):
+    """Test failing before the handshake without a password or a key."""
+    transport = _FakeAuthTransport(['password'])
+
+    with pytest.raises(AuthenticationException, match='No password'):
+        SFTPManager({
+            **unreachable_config,
+            'sftp_password': '',
+        })._authenticate(transport)
+    assert transport.attempts == []
+
+
+def test_confirm_uploads(monkeypatch):
+    """Test checking uploads against a single directory listing."""
+    manager = SFTPManager({
+        'sftp_host': 'localhost',
+        'sftp_port': 22,
+        'sftp_user': 'user',
+        'sftp_password': 'pw',
+        'key_filepath': None,
+        'key_password': None,
+    })
+    listings = []
+
+    def iter_attributes(remote_path):
+        listings.append(remote_path)
+        return iter([
+            _attributes('ok.txt', 10, 150),
+            _attributes('short.txt', 5, 200),
+            _attributes('stale.txt', 10, 100),
+            _attributes('ahead.txt', 10, 200),
+            _attributes('other.txt', 1, 100),
+        ])
+
+    monkeypatch.setattr(manager, 'iter_attributes', iter_attributes)
+    mismatches = manager.confirm_uploads(
+        '/upload',
+        {
+            'ok.txt': (10, 150.5),
+            'short.txt': (10, None),
+            'stale.txt': (10, 150.5),
+            'ahead.txt': (10, 150.5),
+            'missing.txt': (10, None),
+        },
+    )
+
+    assert mismatches == [
+        'short.txt',
+        'stale.txt',
+        'ahead.txt',
+        'missing.txt',
+    ]
+    assert listings == ['/upload']
+
+
+class _FakeRemoteFile:
+    """An open remote file writing into the content of a fake server."""
+
+    def __init__(self, server, path):
+        self.server = server
+        self.sftp = server
+        self.path = path
+        self.handle = path
+        self.position = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def set_pipelined(self, pipelined=True):
+        pass
+
+    def seek(self, offset):
+        self.position = offset
+
+    def write(self, data):
+        self.server.writes.append(type(data))
+        with self.server.lock:
+            content = self.server.files[self.path]
+            end = self.position + len(data)
+            content[len(content) : end] = bytes(max(0, end - len(content)))
+            content[self.position : end] = data
+        self.position = end
+
+    def readv(self, chunks):
+        content = self.server.files[self.path]
+        for offset, length in chunks:
+            yield bytes(content[offset : offset + length])
+
+
+class _FakeSFTP:
+    """An in-memory SFTP client recording the writes it receives."""
+
+    def __init__(self, files=None, size_error=0):
+        self.files = files if files is not None else {}
+        self.size_error = size_error
+        self.writes = []
+        self.times = {}
+        self.setstats = []
+        self.lock = threading.Lock()
+
+    def open(self, path, mode='r', bufsize=-1):
+        if 'w' in mode:
+            self.files[path] = bytearray()
+        return _FakeRemoteFile(self, path)
+
+    def stat(self, path):
+        attributes = SFTPAttributes()
+        attributes.st_size = len(self.files[path]) + self.size_error
+        return attributes
+
+    def utime(self, path, times):
+        self.setstats.append('utime')
+        self.times[path] = times
+
+    def _async_request(self, fileobj, t, handle, attributes):
+        self.setstats.append(t)
+        self.times[handle] = (attributes.st_atime, attributes.st_mtime)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_sftp():
+    return _FakeSFTP()
+
+
+@pytest.fixture
+def manager(unreachable_config, fake_sftp):
+    manager = SFTPManager(unreachable_config)
+    manager._sftp = fake_sftp
+    return manager
+
+
+@pytest.mark.parametrize(
+    'size',
+    [0, 1000, 2 * sftp_manager.READ_BLOCK_SIZE + 1000],
+)
+def test_put_zero_copy_buffered(manager, fake_sftp, tmp_path, size):
+    """Test uploading files below the memory-map threshold."""
+    local_path = tmp_path / 'upload.bin'
+    local_path.write_bytes((b'0123456789' * (size // 10 + 1))[:size])
+
+    result = manager._put_zero_copy(local_path, '/upload.bin')
+
+    assert result.st_size == size
+    assert fake_sftp.files['/upload.bin'] == local_path.read_bytes()
+    assert set(fake_sftp.writes) <= {memoryview}
+    assert len(fake_sftp.writes) == -(-size // sftp_manager.READ_BLOCK_SIZE)
+
+
+def test_put_zero_copy_mapped(manager, fake_sftp, tmp_path, monkeypatch):
+    """Test uploading a memory-mapped file in blocks."""
+    monkeypatch.setattr(sftp_manager, 'MMAP_THRESHOLD', 4096)
+    local_path = tmp_path / 'upload.bin'
+    local_path.write_bytes(b'0123456789' * 250_000)
+    mapped = []
+    write_mapped = SFTPManager._write_mapped
+
+    def record_mapped(local_file, remote_file):
+        mapped.append(write_mapped(local_file, remote_file))
+        return mapped[-1]
+
+    monkeypatch.setattr(
+        SFTPManager,
+        '_write_mapped',
+        staticmethod(record_mapped),
+    )
+    result = manager._put_zero_copy(local_path, '/upload.bin')
+
+    assert mapped == [result.st_size]
+    assert result.st_size == local_path.stat().st_size
+    assert fake_sftp.files['/upload.bin'] == local_path.read_bytes()
+    assert fake_sftp.writes == [memoryview] * 3
+
+
+def test_put_zero_copy_without_confirm(manager, fake_sftp, tmp_path):
+    """Test skipping the remote size check."""
+    local_path = tmp_path / 'upload.bin'
+    local_path.write_bytes(b'content')
+    fake_sftp.size_error = 1
+
+    result = manager._put_zero_copy(local_path, '/upload.bin', confirm=False)
+
+    assert result.st_size is None
+
+
+def test_upload_preserves_mtime(manager, fake_sftp, tmp_path):
+    """Test stamping the upload on its handle, behind the writes."""
+    local_path = tmp_path / 'upload.bin'
+    local_path.write_bytes(b'content')
+    os.utime(local_path, (1_700_000_000.5, 1_700_000_000.5))
+
+    manager.upload_file(local_path, '/upload.bin', preserve_mtime=True)
+
+    assert fake_sftp.times == {'/upload.bin': (1_700_000_000, 1_700_000_000)}
+    assert fake_sftp.setstats == [CMD_FSETSTAT]
+
+
+def test_put_zero_copy_size_mismatch(manager, fake_sftp, tmp_path):
+    """Test raising when the remote size differs from the bytes sent."""
+    local_path = tmp_path / 'upload.bin'
+    local_path.write_bytes(b'content')
+    fake_sftp.size_error = -1
+
+    with pytest.raises(IOError, match='Size mismatch in upload: 6 != 7'):
+        manager._put_zero_copy(local_path, '/upload.bin')
+
+
+class _FakeTransport:
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def segmented_manager(unreachable_config, fake_sftp, monkeypatch):
+    manager = SFTPManager({
+        **unreachable_config,
+        'segment_threshold': 1,
+        'segment_size': 700_000,
+        'segment_concurrency': 3,
+        'segment_verify': True,
+    })
+    manager._sftp = fake_sftp
+    opened = []
+
+    def open_client():
+        opened.append(fake_sftp)
+        return _FakeTransport(), fake_sftp
+
+    monkeypatch.setattr(manager, '_open_client', open_client)
+    manager.opened = opened
+    return manager
+
+
+@pytest.fixture
+def content():
+    return bytes(range(251)) * 10_000
+
+
+def test_upload_segmented(segmented_manager, fake_sftp, tmp_path, content):
+    """Test assembling and verifying an upload sent in segments."""
+    local_path = tmp_path / 'upload.bin'
+    local_path.write_bytes(content)
+
+    result = segmented_manager.upload_file(local_path, '/upload.bin')
+
+    assert result.st_size == len(content)
+    assert fake_sftp.files['/upload.bin'] == content
+    # Two extra connections for the upload, then two for the verification.
+    assert segmented_manager.opened == [fake_sftp] * 4
+
+
+def test_upload_segmented_within_free_slots(
+    segmented_manager,
+    fake_sftp,
+    tmp_path,
+    content,
+):
+    """Test that segment workers only open the free connection slots."""
+    local_path = tmp_path / 'upload.bin'
+    local_path.write_bytes(content)
+    limiter = TransferLimiter(max_connections=2)
+    segmented_manager.limiter = limiter
+
+    with limiter.connection():
+        segmented_manager.upload_file(local_path, '/upload.bin')
+
+    assert fake_sftp.files['/upload.bin'] == content
+    assert segmented_manager.opened == [fake_sftp] * 2
+
+
+def test_download_segmented(segmented_manager, fake_sftp, tmp_path, content):
+    """Test assembling and verifying a download received in segments."""
+    fake_sftp.files['/download.bin'] = bytearray(content)
+    local_path = tmp_path / 'download.bin'
+
+    segmented_manager.download_file('/download.bin', local_path)
+
+    assert local_path.read_bytes() == content
+
+
+def test_verify_segments_detects_corruption(
+    segmented_manager,
+    fake_sftp,
+    tmp_path,
+    content,
+):
+    """Test rejecting a remote segment that differs from the local file."""
+    local_path = tmp_path / 'upload.bin'
+    local_path.write_bytes(content)
+    corrupted = bytearray(content)
+    corrupted[1_500_000] ^= 0xFF
+    fake_sftp.files['/upload.bin'] = corrupted
+    segments = SFTPManager.split_segments(len(content), 700_000)
+
+    with pytest.raises(IOError, match='offset 1400000 of /upload.bin'):
+        segmented_manager._verify_segments(segments, '/upload.bin', local_path)
+
+
+def test_failed_segment_worker_stops_the_others(
+    segmented_manager,
+    monkeypatch,
+):
+    """Test that a failing worker aborts the segments not yet started."""
+    monkeypatch.setattr(
+        segmented_manager,
+        '_open_client',
+        lambda: (_FakeTransport(), _FakeSFTP()),
+    )
+    segments = SFTPManager.split_segments(10_000, 1000)
+    failed = threading.Event()
+    processed = []
+
+    def worker(sftp, queue):
+        if sftp is segmented_manager._sftp:
+            failed.set()
+            raise IOError('Connection lost')
+        failed.wait()
+        deadline = time.monotonic() + 5
+        while not queue.empty() and time.monotonic() < deadline:
+            time.sleep(0.001)
+        processed.extend(segmented_manager._drain(queue))
+
+    with pytest.raises(IOError, match='Connection lost'):
+        segmented_manager._run_segments(segments, worker)
+    assert processed == []
+
+
+class _FakeRemovingSFTP:
+    """An SFTP client answering removals, pipelined or one at a time."""
+
+    _convert_status = SFTPClient._convert_status
+
+    def __init__(self, statuses):
+        self.statuses = statuses
+        self.numbers = itertools.count()
+        self.in_flight = deque()
+        self.max_in_flight = 0
+        self.removed = []
+
+    @staticmethod
+    def _adjust_cwd(path):
+        return path
+
+    def _async_request(self, fileobj, command, path):
+        num = next(self.numbers)
+        self.in_flight.append((fileobj, num, path))
+        self.max_in_flight = max(self.max_in_flight, len(self.in_flight))
+        return num
+
+    def _read_response(self):
+        fileobj, num, path = self.in_flight.popleft()
+        code, text = self.statuses.get(path, (SFTP_OK, 'OK'))
+        if code == SFTP_OK:
+            self.removed.append(path)
+        msg = Message()
+        msg.add_int(code)
+        msg.add_string(text)
+        msg.rewind()
+        fileobj._async_response(CMD_STATUS, msg, num)
+
+    def remove(self, path):
+        code, text = self.statuses.get(path, (SFTP_OK, 'OK'))
+        if code == SFTP_NO_SUCH_FILE:
+            raise IOError(errno.ENOENT, text)
+        if code == SFTP_PERMISSION_DENIED:
+            raise IOError(errno.EACCES, text)
+        self.removed.append(path)
+
+
+@pytest.fixture
+def removing_sftp():
+    return _FakeRemovingSFTP({
+        '/missing.txt': (SFTP_NO_SUCH_FILE, 'No such file'),
+        '/locked.txt': (SFTP_PERMISSION_DENIED, 'Permission denied'),
+    })
+
+
+REMOVED_PATHS = ['/a.txt', '/missing.txt', '/locked.txt', '/b.txt', '/c.txt']
+
+
+def test_remove_files_pipelined(manager, removing_sftp):
+    """Test removing files with a bounded number of pending requests."""
+    manager._sftp = removing_sftp
+
+    errors = manager.remove_files(REMOVED_PATHS, window=2)
+
+    assert removing_sftp.removed == ['/a.txt', '/b.txt', '/c.txt']
+    assert removing_sftp.max_in_flight == 2  # noqa: PLR2004
+    assert isinstance(errors.pop('/missing.txt'), FileNotFoundError)
+    assert isinstance(errors.pop('/locked.txt'), PermissionError)
+    assert not errors
+
+
+def test_remove_files_with_unknown_paramiko(
+    manager,
+    removing_sftp,
+    monkeypatch,
+):
+    """Test removing files one at a time outside the known versions."""
+    monkeypatch.setattr(
+        sftp_manager,
+        'PIPELINED_REMOVE_VERSIONS',
+        ((0, 0), (1, 0)),
+    )
+    manager._sftp = removing_sftp
+
+    errors = manager.remove_files(REMOVED_PATHS, window=2)
+
+    assert removing_sftp.removed == ['/a.txt', '/b.txt', '/c.txt']
+    assert removing_sftp.max_in_flight == 0
+    assert isinstance(errors.pop('/missing.txt'), FileNotFoundError)
+    assert isinstance(errors.pop('/locked.txt'), PermissionError)
+    assert not errors
@@ -0,0 +1,88 @@
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from sftp_file_transfer.components import transfer_daemon
+from sftp_file_transfer.components.daemon_client import send_request
+from sftp_file_transfer.components.transfer_daemon import TransferDaemon
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(socket, 'AF_UNIX'),
+    reason='Unix domain sockets are not supported.',
+)
+
+
+def test_submit_empty_job(tmp_path, unreachable_config):
+    """Test that a job without files is done as soon as it is submitted."""
+    daemon = TransferDaemon(unreachable_config, tmp_path / 'd.sock', 0)
+
+    status = daemon.handle({
+        'action': 'submit',
+        'wait': True,
+        'job': {'local_paths': [str(tmp_path)], 'remote_path': '/upload'},
+    })
+
+    assert status['state'] == 'done'
+    assert status['total'] == 0
+    assert daemon.handle({'action': 'status', 'job_id': 1}) == status
+
+
+def test_unknown_requests(tmp_path, unreachable_config):
+    """Test answering unknown actions and jobs."""
+    daemon = TransferDaemon(unreachable_config, tmp_path / 'd.sock', 0)
+
+    with pytest.raises(ValueError, match='Unknown action'):
+        daemon.handle({'action': 'bogus'})
+    with pytest.raises(ValueError, match='Unknown job'):
+        daemon.handle({'action': 'status', 'job_id': 42})
+
+
+def test_socket_round_trip(tmp_path, unreachable_config):
+    """Test talking to a running daemon over its socket."""
+    socket_path = tmp_path / 'd.sock'
+    daemon = TransferDaemon(unreachable_config, socket_path, 1)
+    server = threading.Thread(target=daemon.serve_forever, daemon=True)
+    server.start()
+    for _ in range(100):
+        if socket_path.exists():
+            break
+        time.sleep(0.05)
+
+    assert send_request(socket_path, {'action': 'ping'}) == {'ok': True}
+    assert 'error' in send_request(socket_path, {'action': 'bogus'})
+    assert send_request(socket_path, {'action': 'shutdown'}) == {'ok': True}
+
+    server.join(timeout=5)
+    assert not server.is_alive()
+    assert not socket_path.exists()
+
+
+def test_invalid_config_stops_before_serving(tmp_path, unreachable_config):
+    """Test that a config the workers cannot use is raised at startup."""
+    socket_path = tmp_path / 'd.sock'
+    config = dict(
+        unreachable_config,
+        delta_transfer=True,
+        block_hash='sha256',
+    )
+    daemon = TransferDaemon(config, socket_path, 2)
+
+    with pytest.raises(ValueError, match='Delta transfers cannot'):
+        daemon.serve_forever()
+    assert not socket_path.exists()
+
+
+def test_job_history_is_trimmed(tmp_path, unreachable_config, monkeypatch):
+    """Test that concurrent submissions keep the newest jobs only."""
+    monkeypatch.setattr(transfer_daemon, 'MAX_JOB_HISTORY', 5)
+    daemon = TransferDaemon(unreachable_config, tmp_path / 'd.sock', 0)
+    job = {'local_paths': [str(tmp_path)], 'remote_path': '/upload'}
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda _: daemon.submit(job), range(40)))
+
+    assert sorted(daemon._jobs) == [36, 37, 38, 39, 40]
+    assert daemon.handle({'action': 'status', 'job_id': 40})['total'] == 0
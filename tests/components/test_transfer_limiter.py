@@ -0,0 +1,98 @@
+import threading
+import time
+
+import pytest
+
+from sftp_file_transfer.components.transfer_limiter import TransferLimiter
+
+
+def _run_concurrently(target, count):
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+
+
+def _peak_tracker():
+    lock = threading.Lock()
+    state = {'current': 0, 'peak': 0}
+
+    def enter(amount):
+        with lock:
+            state['current'] += amount
+            state['peak'] = max(state['peak'], state['current'])
+
+    def leave(amount):
+        with lock:
+            state['current'] -= amount
+
+    return state, enter, leave
+
+
+def test_connection_limit():
+    """Test that no more workers than allowed send at the same time."""
+    limiter = TransferLimiter(max_connections=2)
+    state, enter, leave = _peak_tracker()
+
+    def worker():
+        with limiter.connection():
+            enter(1)
+            time.sleep(0.05)
+            leave(1)
+
+    _run_concurrently(worker, 6)
+
+    assert state['peak'] == 2  # noqa: PLR2004
+
+
+def test_bytes_in_flight_limit():
+    """Test that files wait for room in the byte budget."""
+    limiter = TransferLimiter(max_bytes_in_flight=100)
+    state, enter, leave = _peak_tracker()
+
+    def worker():
+        with limiter.bytes_in_flight(40):
+            enter(40)
+            time.sleep(0.05)
+            leave(40)
+
+    _run_concurrently(worker, 6)
+
+    assert state['peak'] == 80  # noqa: PLR2004
+
+
+def test_oversized_file_takes_whole_budget():
+    """Test that a file larger than the budget is still sent."""
+    limiter = TransferLimiter(max_bytes_in_flight=100)
+
+    with limiter.bytes_in_flight(1_000):
+        pass
+    with limiter.bytes_in_flight(100):
+        pass
+
+
+def test_extra_connections_take_only_free_slots():
+    """Test taking extra slots without waiting for them."""
+    limiter = TransferLimiter(max_connections=3)
+
+    with limiter.connection(), limiter.extra_connections(4) as extra:
+        assert extra == 2  # noqa: PLR2004
+        with limiter.extra_connections(1) as more:
+            assert more == 0
+    with limiter.extra_connections(3) as extra:
+        assert extra == 3  # noqa: PLR2004
+
+
+def test_unlimited_extra_connections():
+    """Test that every extra connection is granted without a limit."""
+    with TransferLimiter().extra_connections(5) as extra:
+        assert extra == 5  # noqa: PLR2004
+
+
+def test_invalid_limits():
+    """Test rejecting limits that would block every transfer."""
+    with pytest.raises(ValueError, match='at least 1'):
+        TransferLimiter(max_connections=0)
+    with pytest.raises(ValueError, match='at least 1'):
+        TransferLimiter(max_bytes_in_flight=0)
@@ -0,0 +1,74 @@
+import os
+
+import pytest
+
+from sftp_file_transfer.components.transfer_planner import TransferPlanner
+
+
+def _make_file(directory, name, size, mtime):
+    path = directory / name
+    path.write_bytes(b'x' * size)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_stat_files(tmp_path):
+    """Test collecting the size and mtime of each file."""
+    expected_size = 10
+    expected_mtime = 1_000_000
+    file = _make_file(tmp_path, 'file1.txt', expected_size, expected_mtime)
+
+    entries = TransferPlanner.stat_files([file])
+
+    assert entries[0]['path'] == file
+    assert entries[0]['size'] == expected_size
+    assert entries[0]['mtime'] == expected_mtime
+
+
+@pytest.mark.parametrize(
+    ('schedule', 'expected'),
+    [
+        ('none', ['a.txt', 'b.txt', 'c.txt']),
+        ('largest', ['b.txt', 'c.txt', 'a.txt']),
+        ('smallest', ['a.txt', 'c.txt', 'b.txt']),
+        ('newest', ['c.txt', 'a.txt', 'b.txt']),
+        ('oldest', ['b.txt', 'a.txt', 'c.txt']),
+    ],
+)
+def test_order_files(tmp_path, schedule, expected):
+    """Test ordering files according to each schedule."""
+    files = [
+        _make_file(tmp_path, 'a.txt', 1, 2_000_000),
+        _make_file(tmp_path, 'b.txt', 30, 1_000_000),
+        _make_file(tmp_path, 'c.txt', 20, 3_000_000),
+    ]
+    entries = TransferPlanner.stat_files(files)
+
+    ordered = TransferPlanner.order_files(entries, schedule)
+
+    assert [e['path'].name for e in ordered] == expected
+
+
+def test_order_files_with_invalid_schedule():
+    """Test ordering files with an unknown schedule."""
+    with pytest.raises(ValueError, match='Invalid schedule'):
+        TransferPlanner.order_files([], 'random')
+
+
+def test_plan_largest_balances_workers(tmp_path):
+    """Test that the largest schedule keeps the huge file on its own."""
+    files = [_make_file(tmp_path, f'small{i}.txt', 10, 0) for i in range(8)]
+    files.append(_make_file(tmp_path, 'huge.txt', 80, 0))
+
+    plan = TransferPlanner.plan(files, schedule='largest', workers=2)
+
+    expected_makespan = 80
+    assert TransferPlanner.makespan(plan) == expected_makespan
+    assert [e['path'].name for e in plan[0]] == ['huge.txt']
+    assert len(plan[1]) == len(files) - 1
+
+
+def test_assign_workers_with_invalid_worker_count():
+    """Test assigning files to less than one worker."""
+    with pytest.raises(ValueError, match='at least 1'):
+        TransferPlanner.assign_workers([], workers=0)
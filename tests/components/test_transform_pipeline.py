@@ -0,0 +1,164 @@
+import base64
+import gzip
+import hashlib
+import io
+
+import pytest
+
+from sftp_file_transfer.components.defaults import TRANSFORM_NAMES
+from sftp_file_transfer.components.transform_pipeline import (
+    TRANSFORMS,
+    BlockTransform,
+    EncryptTransform,
+    GzipTransform,
+    TransformPipeline,
+    ZstdTransform,
+)
+
+KEY = base64.b64encode(bytes(range(32))).decode()
+
+
+@pytest.fixture
+def content():
+    return b''.join(
+        hashlib.sha256(str(index).encode()).digest() * 40
+        for index in range(100)
+    )
+
+
+@pytest.mark.parametrize('executor', ['inline', 'thread', 'process'])
+def test_blocks_are_reassembled_in_order(content, executor):
+    """Test that transformed blocks come back in file order."""
+    pipeline = TransformPipeline(
+        [GzipTransform(level=1)],
+        block_hash='sha256',
+        workers=2,
+        executor=executor,
+        block_size=1000,
+    )
+
+    output = b''.join(pipeline.run(io.BytesIO(content)))
+
+    assert gzip.decompress(output) == content
+    assert pipeline.digests == [
+        hashlib.sha256(content[offset : offset + 1000]).hexdigest()
+        for offset in range(0, len(content), 1000)
+    ]
+
+
+def test_pending_blocks_are_bounded():
+    """Test that blocks are only read as room frees up in the pool."""
+    read = []
+
+    def blocks():
+        for index in range(20):
+            read.append(index)
+            yield bytes([index]) * 10
+
+    pipeline = TransformPipeline(workers=2, executor='thread', max_pending=3)
+    output = pipeline.transform_blocks(blocks())
+
+    assert next(output) == bytes([0]) * 10
+    # The pool holds max_pending blocks, plus the next block read ahead.
+    assert len(read) <= pipeline.max_pending + 2
+    assert b''.join(output) == b''.join(bytes([i]) * 10 for i in range(1, 20))
+
+
+@pytest.mark.parametrize('executor', ['inline', 'process'])
+def test_zstd_frames_form_one_file(content, executor):
+    """Test that concatenated Zstandard frames decompress as a whole."""
+    zstandard = pytest.importorskip('zstandard')
+    pipeline = TransformPipeline(
+        [ZstdTransform(level=1)],
+        workers=2,
+        executor=executor,
+        block_size=1000,
+    )
+
+    output = b''.join(pipeline.run(io.BytesIO(content)))
+
+    assert pipeline.suffix == '.zst'
+    reader = zstandard.ZstdDecompressor().stream_reader(
+        io.BytesIO(output),
+        read_across_frames=True,
+    )
+    assert reader.read() == content
+
+
+def test_transform_must_implement_apply():
+    """Test that a transform without `apply` cannot be built."""
+
+    class NoopTransform(BlockTransform):
+        suffix = '.noop'
+
+    with pytest.raises(TypeError, match='abstract'):
+        NoopTransform()
+
+
+def test_encrypt_round_trip(content):
+    """Test decrypting a file encrypted block by block."""
+    transform = EncryptTransform(KEY)
+    pipeline = TransformPipeline(
+        [GzipTransform(), transform],
+        executor='inline',
+        block_size=1000,
+    )
+
+    output = b''.join(pipeline.run(io.BytesIO(content)))
+
+    assert gzip.decompress(transform.decrypt(output)) == content
+
+
+def test_encrypt_detects_truncation(content):
+    """Test that dropping the last blocks fails to decrypt."""
+    transform = EncryptTransform(KEY)
+    pipeline = TransformPipeline(
+        [transform],
+        executor='inline',
+        block_size=1000,
+    )
+    blocks = list(pipeline.run(io.BytesIO(content)))
+
+    with pytest.raises(ValueError, match='failed to decrypt'):
+        transform.decrypt(b''.join(blocks[:-1]))
+    with pytest.raises(ValueError, match='failed to decrypt'):
+        transform.decrypt(b''.join([blocks[1], blocks[0], *blocks[2:]]))
+
+
+def test_empty_file_yields_one_block():
+    """Test that an empty file still produces a valid compressed file."""
+    pipeline = TransformPipeline([GzipTransform()], executor='inline')
+
+    output = b''.join(pipeline.run(io.BytesIO()))
+
+    assert output
+    assert not gzip.decompress(output)
+
+
+def test_encrypt_must_come_last():
+    """Test rejecting a transform applied to encrypted blocks."""
+    with pytest.raises(ValueError, match='must come last'):
+        TransformPipeline([EncryptTransform(KEY), GzipTransform()])
+
+
+def test_from_options():
+    """Test building a pipeline from the transform settings."""
+    pipeline = TransformPipeline.from_options({
+        'transforms': ['gzip', 'encrypt'],
+        'encryption_key': KEY,
+        'transform_executor': 'thread',
+    })
+
+    assert pipeline.suffix == '.gz.enc'
+    assert pipeline.executor == 'thread'
+
+
+def test_transform_names():
+    """Test that the CLI offers every registered transform."""
+    assert tuple(TRANSFORMS) == TRANSFORM_NAMES
+
+
+def test_from_options_with_unknown_transform():
+    """Test rejecting an unknown transform."""
+    with pytest.raises(ValueError, match='Unknown transforms: lz4'):
+        TransformPipeline.from_options({'transforms': ['lz4']})
@@ -0,0 +1,117 @@
+import pytest
+
+from sftp_file_transfer.components import transport_tuner
+from sftp_file_transfer.components.transport_tuner import (
+    CANDIDATE_PROFILES,
+    ProbeResult,
+    TransportTuner,
+)
+
+
+def test_profile_round_trip(tmp_path):
+    """Test saving a tuned profile and loading it back."""
+    path = tmp_path / 'tuning' / 'profile.json'
+    result = ProbeResult(
+        profile='aes128-ctr',
+        cipher='aes128-ctr',
+        throughput=1.0,
+        error=None,
+    )
+
+    TransportTuner.save_profile(
+        result,
+        CANDIDATE_PROFILES['aes128-ctr'],
+        path,
+    )
+
+    assert TransportTuner.load_profile(path) == (
+        CANDIDATE_PROFILES['aes128-ctr']
+    )
+
+
+def test_load_missing_profile(tmp_path):
+    """Test that no settings apply before tuning."""
+    assert TransportTuner.load_profile(tmp_path / 'profile.json') == {}
+
+
+def test_autotune_reports_failures(unreachable_config):
+    """Test that candidates that cannot connect are reported last."""
+    results = TransportTuner.autotune(
+        unreachable_config,
+        '/upload',
+        candidates={'default': {}},
+        probe_size=10,
+    )
+
+    assert len(results) == 1
+    assert results[0]['profile'] == 'default'
+    assert results[0]['throughput'] == 0
+    assert results[0]['error']
+
+
+def test_autotune_rejects_window_candidates(unreachable_config):
+    """Test that upload probes do not pretend to rank window sizes."""
+    with pytest.raises(ValueError, match='window or packet size of wide'):
+        TransportTuner.autotune(
+            unreachable_config,
+            '/upload',
+            candidates={'default': {}, 'wide': {'window_size': 1 << 24}},
+            probe_size=10,
+        )
+
+
+class _FailingProbeManager:
+    """Records the probe configuration and fails the upload."""
+
+    configs = []
+    removed = []
+
+    def __init__(self, config):
+        self.configs.append(config)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    @staticmethod
+    def negotiated_cipher():
+        return 'aes128-ctr'
+
+    @staticmethod
+    def upload_file(local_path, remote_path):
+        raise OSError('disk full')
+
+    def remove_files(self, remote_paths):
+        self.removed.extend(remote_paths)
+        return {}
+
+
+def test_autotune_probes_without_transforms(monkeypatch, unreachable_config):
+    """Test that the probe ignores transforms and is always removed."""
+    monkeypatch.setattr(
+        transport_tuner,
+        'SFTPManager',
+        _FailingProbeManager,
+    )
+    config = dict(
+        unreachable_config,
+        transforms=['gzip'],
+        block_hash='sha256',
+        compression_level=6,
+    )
+
+    results = TransportTuner.autotune(
+        config,
+        '/upload',
+        candidates={'default': {}},
+        probe_size=10,
+    )
+
+    assert results[0]['error'] == 'disk full'
+    probe_config = _FailingProbeManager.configs[-1]
+    assert 'transforms' not in probe_config
+    assert 'block_hash' not in probe_config
+    assert 'compression_level' not in probe_config
+    assert _FailingProbeManager.removed[-1].endswith('.tmp')
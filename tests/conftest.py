@@ -1,5 +1,10 @@
+import threading
+import time
+
 import pytest
 
+from sftp_file_transfer.components import batch_uploader
+
 
 # https://github.com/ulope/pytest-sftpserver/issues/30#issuecomment-1530896213
 @pytest.fixture
@@ -8,3 +13,117 @@ def sftp_fixture(sftpserver):
     sftpserver.daemon_threads = True
     sftpserver.block_on_close = False
     yield sftpserver  # noqa
+
+
+@pytest.fixture
+def unreachable_config():
+    """Connection settings of a server that refuses connections."""
+    return {
+        'sftp_host': '127.0.0.1',
+        'sftp_port': 1,
+        'sftp_user': 'user',
+        'sftp_password': 'pw',
+        'key_filepath': None,
+        'key_password': None,
+    }
+
+
+class FakeSFTPManager:
+    """Stand in for `SFTPManager`, keeping the size and mtime of uploads.
+
+    The records are class attributes, so the managers built by the workers
+    of a batch share them. Use the `fake_manager` fixture, which returns a
+    fresh subclass and makes `BatchUploader` build it.
+
+    Attributes:
+        fail_on: The name of a file whose upload raises `OSError`.
+        unconfirmed: The names reported by the next `confirm_uploads`.
+        clock_skew: The offset of the server clock, in seconds.
+        delay: The time each upload takes, in seconds.
+    """
+
+    fail_on = None
+    unconfirmed = ()
+    clock_skew = 0
+    delay = 0
+
+    def __init__(self, config=None, limiter=None):
+        self.config = config
+
+    def __enter__(self):
+        cls = type(self)
+        with cls.lock:
+            cls.sessions += 1
+            cls.most_sessions = max(cls.most_sessions, cls.sessions)
+        return self
+
+    def __exit__(self, *args):
+        cls = type(self)
+        with cls.lock:
+            cls.sessions -= 1
+
+    def upload_file(
+        self,
+        local_path,
+        remote_path,
+        confirm=True,
+        preserve_mtime=False,
+    ):
+        if local_path.name == self.fail_on:
+            raise OSError('connection lost')
+        self.uploaded.append(remote_path)
+        stat = local_path.stat()
+        # Unless stamped, the server dates the copy with its own clock.
+        self.remote[remote_path] = (
+            stat.st_size,
+            int(stat.st_mtime)
+            if preserve_mtime
+            else int(time.time() + self.clock_skew),
+        )
+        time.sleep(self.delay)
+
+    def confirm_uploads(self, remote_path, expected):
+        self.confirmed.append(sorted(expected))
+        mismatches = []
+        for name, (size, mtime) in expected.items():
+            remote_size, remote_mtime = self.remote[f'{remote_path}/{name}']
+            if (
+                name in self.unconfirmed
+                or remote_size != size
+                or (mtime is not None and remote_mtime != int(mtime))
+            ):
+                mismatches.append(name)
+        type(self).unconfirmed = ()
+        return mismatches
+
+
+@pytest.fixture
+def fake_manager(monkeypatch):
+    """A `FakeSFTPManager` class with empty records."""
+
+    class Manager(FakeSFTPManager):
+        uploaded = []
+        confirmed = []
+        remote = {}
+        sessions = 0
+        most_sessions = 0
+        lock = threading.Lock()
+
+    monkeypatch.setattr(batch_uploader, 'SFTPManager', Manager)
+    return Manager
+
+
+@pytest.fixture
+def files(tmp_path):
+    """Four small files of 1 to 4 bytes."""
+    paths = []
+    for index in range(4):
+        path = tmp_path / f'file{index}.txt'
+        path.write_bytes(b'x' * (index + 1))
+        paths.append(path)
+    return paths
+
+
+def planned_names(plan):
+    """Return the sorted names of the files of a plan."""
+    return sorted(entry['path'].name for entries in plan for entry in entries)
@@ -0,0 +1,204 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from typer.testing import CliRunner
+
+from sftp_file_transfer.components import sftp_manager
+from sftp_file_transfer.components.job_journal import JobJournal
+from sftp_file_transfer.components.transfer_planner import TransferPlanner
+from sftp_file_transfer.main import app
+
+
+@pytest.fixture
+def runner():
+    return CliRunner()
+
+
+def _message(result):
+    """Return the output of a command without the error box around it."""
+    return ' '.join(result.output.replace('│', ' ').split())
+
+
+def test_main_does_not_import_the_sftp_stack():
+    """Test that building the CLI leaves paramiko and cryptography out."""
+    modules = subprocess.run(
+        [
+            sys.executable,
+            '-c',
+            'import sys, sftp_file_transfer.main; print(*sys.modules)',
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.split()
+
+    assert 'paramiko' not in modules
+    assert 'cryptography' not in modules
+
+
+@pytest.mark.parametrize(
+    ('options', 'rejected'),
+    [
+        (['--delta', '--journal', 'batch.jsonl'], '--delta, --journal'),
+        (['--since', '2024-01-01'], '--since'),
+        (['-W', '4', '--transform', 'gzip'], '--workers, --transform'),
+    ],
+)
+def test_daemon_socket_rejects_unsupported_options(
+    runner,
+    tmp_path,
+    options,
+    rejected,
+):
+    """Test that options the daemon would ignore are refused."""
+    result = runner.invoke(
+        app,
+        ['--daemon-socket', str(tmp_path / 'daemon.sock'), *options],
+    )
+
+    assert result.exit_code == 2  # noqa: PLR2004
+    assert f'{rejected} cannot be combined with' in _message(result)
+
+
+def test_daemon_socket_submits_plain_uploads(runner, tmp_path):
+    """Test that the options of a daemon job pass the checks."""
+    result = runner.invoke(
+        app,
+        [
+            '--daemon-socket',
+            str(tmp_path / 'daemon.sock'),
+            '-L',
+            str(tmp_path),
+            '-R',
+            '/upload',
+            '-T',
+            '0',
+            '-S',
+            'largest',
+        ],
+    )
+
+    assert result.exit_code == 0
+    assert 'No such file or directory' in _message(result)
+
+
+def test_since_rejects_timedelta(runner):
+    """Test that --since and --timedelta are mutually exclusive."""
+    result = runner.invoke(app, ['--since', '2024-01-01', '-T', '1'])
+
+    assert result.exit_code == 2  # noqa: PLR2004
+    assert 'cannot be combined with --timedelta' in _message(result)
+
+
+def test_auth_options_reach_the_config(runner, tmp_path, monkeypatch):
+    """Test that --key-file and --agent replace a missing password."""
+    for name, value in {
+        'SFTP_HOST': 'example.com',
+        'SFTP_PORT': '22',
+        'SFTP_USER': 'user',
+        'SFTP_TRANSPORT_PROFILE': str(tmp_path / 'missing.json'),
+    }.items():
+        monkeypatch.setenv(name, value)
+    for name in ('SFTP_PASSWORD', 'SFTP_KEY_FILE', 'SFTP_USE_AGENT'):
+        monkeypatch.delenv(name, raising=False)
+    configs = []
+
+    class FakeSFTPManager:
+        def __init__(self, config):
+            configs.append(config)
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            pass
+
+        @staticmethod
+        def prune(remote_path, policy, dry_run, window):
+            return []
+
+    monkeypatch.setattr(sftp_manager, 'SFTPManager', FakeSFTPManager)
+    key_file = tmp_path / 'id_ed25519'
+
+    result = runner.invoke(
+        app,
+        [
+            '--key-file',
+            str(key_file),
+            '--agent',
+            'prune',
+            '--remote',
+            '/upload',
+            '--keep-last',
+            '1',
+        ],
+    )
+
+    assert 'Removed 0 files' in result.output
+    (config,) = configs
+    assert config['sftp_host'] == 'example.com'
+    assert not config['sftp_password']
+    assert config['key_filepath'] == str(key_file)
+    assert config['use_agent']
+    assert 'SFTP_KEY_FILE' not in os.environ
+    assert 'SFTP_USE_AGENT' not in os.environ
+
+
+def test_journal_resumes_before_new_batch(
+    runner,
+    tmp_path,
+    monkeypatch,
+    fake_manager,
+):
+    """Test that an interrupted batch does not drop the new upload."""
+    for name, value in {
+        'SFTP_HOST': 'example.com',
+        'SFTP_PORT': '22',
+        'SFTP_USER': 'user',
+        'SFTP_TRANSPORT_PROFILE': str(tmp_path / 'missing.json'),
+    }.items():
+        monkeypatch.setenv(name, value)
+    monkeypatch.setattr(sftp_manager, 'SFTPManager', fake_manager)
+    data = tmp_path / 'data'
+    data.mkdir()
+    paths = {}
+    for name in ('done', 'pending', 'changed', 'new'):
+        paths[name] = data / f'{name}.csv'
+        paths[name].write_text(name)
+    journal = JobJournal(tmp_path / 'batch.jsonl')
+    journal.start(
+        TransferPlanner.plan([
+            paths['done'],
+            paths['pending'],
+            paths['changed'],
+        ]),
+        '/upload',
+    )
+    journal.mark_done(paths['done'])
+    mtime = paths['changed'].stat().st_mtime + 60
+    os.utime(paths['changed'], (mtime, mtime))
+
+    result = runner.invoke(
+        app,
+        [
+            '--local',
+            str(data),
+            '--remote',
+            '/upload',
+            '--file_ext',
+            '.csv',
+            '--journal',
+            str(journal.path),
+        ],
+    )
+
+    assert 'Resuming the interrupted batch' in result.output
+    resumed = fake_manager.uploaded[:2]
+    assert sorted(resumed) == ['/upload/changed.csv', '/upload/pending.csv']
+    assert sorted(fake_manager.uploaded[2:]) == [
+        '/upload/changed.csv',
+        '/upload/new.csv',
+    ]
+    assert not journal.path.exists()